@@ -0,0 +1,26 @@
+import os
+import threading
+
+
+def write_atomic(path, data, fsync=False):
+    """
+    data(str 또는 bytes)를 임시 파일에 쓴 뒤 os.replace 로 교체하여, 쓰기 도중 중단되어도 기존 파일이 깨지지 않도록 저장합니다.
+    임시 파일 이름에 프로세스 id 와 스레드 id 를 넣어 여러 프로세스/스레드가 같은 파일을 써도 서로 덮어쓰지 않습니다.
+    fsync=True 이면 교체 전에 내용을 디스크에 확정합니다. 실패하면 임시 파일을 지우고 예외를 다시 발생시킵니다.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
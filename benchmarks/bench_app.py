@@ -0,0 +1,384 @@
+"""
+앱 전체 벤치마크 (합성 사용자 + 로컬 Groq 스텁)
+
+Streamlit AppTest 로 main.py 를 실제 화면 흐름대로 실행하며 재실행(rerun) 지연 시간, 최대 메모리, I/O 바이트를 측정합니다.
+Groq API 대신 같은 프로세스 안의 스텁 서버(groq_stub.py)를 사용하므로 네트워크 없이 재현할 수 있습니다.
+
+- chats:     채팅 기록이 N 개인 사용자의 로그인, 상담 화면 재실행, 질문 제출
+- schedules: 일정이 N 개인 사용자의 일정 관리 화면, 일정 추가, 일정 분석 작업
+- pdf:       N 페이지 PDF 업로드부터 요약 작업 완료까지
+
+시나리오마다 별도 프로세스에서 실행하여 메모리와 I/O 가 서로 섞이지 않게 하고,
+결과(JSON)는 커밋별로 저장해 --compare 로 비교할 수 있습니다.
+
+    python benchmarks/bench_app.py
+    python benchmarks/bench_app.py --scenarios chats --sizes 10 1000 --repeat 3 --latency 0.2
+    python benchmarks/bench_app.py --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fixtures import create_user, make_pdf # noqa: E402
+from metrics import get_metrics, percentile # noqa: E402
+
+DEFAULT_SIZES = {
+    "chats": [10, 1000, 10000],
+    "schedules": [10, 1000, 50000],
+    "pdf": [1, 50, 500],
+}
+USERNAME = "bench"
+PASSWORD = "bench-password"
+PDF_NAME = "bench.pdf"
+RESULT_DIR = os.path.join(BENCH_DIR, "results")
+
+
+class BenchmarkError(Exception):
+    """앱 실행 중 예외가 표시되었거나 작업이 제한 시간 안에 끝나지 않았을 때 발생합니다."""
+
+
+# --- 프로세스 자원 측정 ---
+def read_io():
+    """/proc/self/io 의 누적 I/O 바이트를 반환합니다. (rchar/wchar: 소켓 포함 읽기/쓰기, read/write_bytes: 디스크)"""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(":", 1) for line in f.read().splitlines())
+    except OSError:
+        return {}
+    return {key: int(fields[key]) for key in ("rchar", "wchar", "read_bytes", "write_bytes") if key in fields}
+
+
+def current_rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10 # macOS 는 바이트, Linux 는 KB
+
+
+def summarize_times(samples):
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "min": ordered[0],
+        "p50": percentile(ordered, 0.5),
+        "p95": percentile(ordered, 0.95),
+        "max": ordered[-1],
+    }
+
+
+# --- 시나리오 (자식 프로세스) ---
+class AppDriver:
+    """AppTest 로 main.py 를 실행하고 각 동작(재실행)의 소요 시간을 단계별로 기록합니다."""
+
+    def __init__(self, run_timeout):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(os.path.join(REPO_DIR, "main.py"), default_timeout=run_timeout)
+        self.at.secrets["GROQ_API_KEY"] = "bench"
+        self.steps = {}
+
+    def _check(self):
+        if self.at.exception:
+            raise BenchmarkError("; ".join(str(e.value) for e in self.at.exception))
+
+    def timed(self, step, action=None):
+        start = time.perf_counter()
+        (action or self.at.run)()
+        self.steps.setdefault(step, []).append(time.perf_counter() - start)
+        self._check()
+
+    def button(self, label):
+        return next(b for b in self.at.button if b.label == label)
+
+    def login(self):
+        self.timed("first_paint")
+        self.at.text_input(key="login_user").input(USERNAME)
+        self.at.text_input(key="login_pw").input(PASSWORD)
+        self.timed("login", lambda: self.button("로그인").click().run())
+        if not self.at.session_state.login_status:
+            raise BenchmarkError("로그인에 실패했습니다.")
+
+    def wait_for_jobs(self, step, timeout, poll=0.05):
+        """세션의 백그라운드 작업이 모두 끝날 때까지 재실행하며 기다리고, 걸린 시간을 step 으로 기록합니다."""
+        start = time.perf_counter()
+        while self.at.session_state.jobs:
+            if time.perf_counter() - start > timeout:
+                raise BenchmarkError(f"{step}: 작업이 {timeout}초 안에 끝나지 않았습니다.")
+            if self.at.error:
+                raise BenchmarkError(f"{step}: {self.at.error[0].value}")
+            time.sleep(poll)
+            self.at.run()
+            self._check()
+        self.steps.setdefault(step, []).append(time.perf_counter() - start)
+
+
+def scenario_chats(driver, args):
+    driver.login()
+    for _ in range(args.repeat):
+        driver.timed("idle_rerun")
+    if any(n.key == "chat_page" for n in driver.at.number_input):
+        driver.timed("next_page", lambda: driver.at.number_input(key="chat_page").increment().run())
+    for i in range(args.repeat):
+        driver.at.text_input(key="chat_input").input(f"벤치마크 질문 {i}")
+        driver.timed("submit_question", lambda: driver.button("질문 제출").click().run())
+
+
+def scenario_schedules(driver, args):
+    driver.login()
+    driver.timed("open_tab", lambda: driver.at.sidebar.selectbox[0].set_value("일정 관리").run())
+    for _ in range(args.repeat):
+        driver.timed("idle_rerun")
+    for i in range(args.repeat):
+        next(t for t in driver.at.text_input if t.label == "일정 내용").input(f"벤치마크 일정 {i}")
+        driver.timed("add_schedule", lambda: driver.button("일정 추가").click().run())
+    driver.timed("request_analysis", lambda: driver.button("일정 분석 및 다음 주 추천 일정 요청").click().run())
+    driver.wait_for_jobs("analysis_job", args.job_timeout)
+
+
+def scenario_pdf(driver, args):
+    driver.login()
+    with open(PDF_NAME, "rb") as f:
+        pdf_bytes = f.read()
+    driver.timed("upload", lambda: driver.at.file_uploader[0].set_value((PDF_NAME, pdf_bytes, "application/pdf")).run())
+    driver.wait_for_jobs("summary_job", args.job_timeout)
+    for _ in range(args.repeat):
+        driver.timed("idle_rerun")
+
+
+SCENARIOS = {"chats": scenario_chats, "schedules": scenario_schedules, "pdf": scenario_pdf}
+
+
+def run_child(args):
+    """(자식 프로세스) 현재 디렉터리의 fixture 로 시나리오 하나를 실행하고 결과를 JSON 한 줄로 출력합니다."""
+    from groq_stub import StubConfig, start_stub_server
+
+    server, base_url = start_stub_server(0, StubConfig(latency=args.latency, chunk_delay=args.chunk_delay, seed=0))
+    os.environ["GROQ_BASE_URL"] = base_url
+
+    driver = AppDriver(args.run_timeout)
+    rss_start = current_rss_mb()
+    io_start = read_io()
+    wall_start = time.perf_counter()
+    error = None
+    try:
+        SCENARIOS[args.child](driver, args)
+    except (BenchmarkError, StopIteration) as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - wall_start
+    io_end = read_io()
+    snapshot = get_metrics().snapshot()
+    server.shutdown()
+
+    result = {
+        "wall_seconds": wall,
+        "steps": {step: summarize_times(samples) for step, samples in driver.steps.items()},
+        "rss_start_mb": rss_start,
+        "peak_rss_mb": peak_rss_mb(),
+        "io": {key: io_end[key] - io_start.get(key, 0) for key in io_end},
+        "stages": [
+            {key: row[key] for key in ("name", "labels", "count", "p50", "p95", "max")} for row in snapshot["stages"]
+        ],
+        "counters": snapshot["counters"],
+        "error": error,
+    }
+    print(json.dumps(result, ensure_ascii=False))
+
+
+# --- 실행 / 결과 저장 (부모 프로세스) ---
+def prepare_fixtures(work_dir, scenario, size, backend):
+    if scenario == "chats":
+        create_user(work_dir, USERNAME, PASSWORD, chats=size, backend_kind=backend)
+    elif scenario == "schedules":
+        create_user(work_dir, USERNAME, PASSWORD, schedules=size, backend_kind=backend)
+    else:
+        create_user(work_dir, USERNAME, PASSWORD, backend_kind=backend)
+        with open(os.path.join(work_dir, PDF_NAME), "wb") as f:
+            f.write(make_pdf(size))
+
+
+def run_scenario(scenario, size, args):
+    """임시 디렉터리에 fixture 를 만들고 자식 프로세스에서 시나리오를 실행합니다."""
+    work_dir = tempfile.mkdtemp(prefix=f"bench_{scenario}_{size}_")
+    try:
+        setup_start = time.perf_counter()
+        prepare_fixtures(work_dir, scenario, size, args.backend)
+        setup_seconds = time.perf_counter() - setup_start
+
+        env = dict(
+            os.environ,
+            STORAGE_BACKEND=args.backend,
+            SQLITE_PATH=os.path.join(work_dir, "assistant.db"),
+            SUMMARY_REQUESTS_PER_MINUTE=str(args.requests_per_minute),
+        )
+        env.pop("METRICS_EXPORT_PATH", None)
+        command = [
+            sys.executable, os.path.abspath(__file__), "--child", scenario,
+            "--repeat", str(args.repeat), "--latency", str(args.latency), "--chunk-delay", str(args.chunk_delay),
+            "--run-timeout", str(args.run_timeout), "--job-timeout", str(args.job_timeout),
+        ]
+        try:
+            completed = subprocess.run(
+                command, cwd=work_dir, env=env, capture_output=True, text=True, timeout=args.scenario_timeout
+            )
+        except subprocess.TimeoutExpired:
+            result = {"error": f"시나리오가 {args.scenario_timeout}초 안에 끝나지 않았습니다."}
+        else:
+            lines = completed.stdout.strip().splitlines()
+            try:
+                result = json.loads(lines[-1])
+            except (IndexError, ValueError):
+                result = {"error": f"자식 프로세스 실패 (exit {completed.returncode}): {completed.stderr.strip()[-2000:]}"}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {"scenario": scenario, "size": size, "backend": args.backend, "setup_seconds": setup_seconds, **result}
+
+
+def git_revision():
+    """(커밋 해시, 작업 트리 변경 여부) 를 반환합니다. git 저장소가 아니면 (None, None)."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR, capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def environment_info():
+    from importlib import metadata
+
+    packages = {}
+    for name in ("streamlit", "pandas", "numpy", "PyPDF2", "groq", "httpx"):
+        try:
+            packages[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            packages[name] = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": packages,
+    }
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}"
+
+
+def print_result(result):
+    label = f"{result['scenario']}={result['size']}"
+    if result.get("error"):
+        print(f"{label:<18} 오류: {result['error']}")
+    if "steps" not in result:
+        return
+    io = result.get("io", {})
+    print(
+        f"{label:<18} 전체 {result['wall_seconds']:.2f}s, 최대 메모리 {result['peak_rss_mb']:.0f}MB, "
+        f"I/O 읽기 {io.get('rchar', 0) / 2**20:.1f}MB 쓰기 {io.get('wchar', 0) / 2**20:.1f}MB "
+        f"(디스크 쓰기 {io.get('write_bytes', 0) / 2**20:.1f}MB)"
+    )
+    for step, stats in result["steps"].items():
+        print(f"    {step:<18} n={stats['count']:<3} p50 {_ms(stats['p50']):>9}ms  p95 {_ms(stats['p95']):>9}ms  "
+              f"max {_ms(stats['max']):>9}ms")
+
+
+def compare(baseline_path, results):
+    """이전 결과 파일과 단계별 p50 을 비교하여 출력합니다."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["scenario"], r["size"], r.get("backend")): r for r in baseline["results"]}
+    print(f"\n--- {baseline_path} ({baseline['meta'].get('commit')}) 대비 p50 ---")
+    for result in results:
+        old = previous.get((result["scenario"], result["size"], result["backend"]))
+        if old is None or "steps" not in old or "steps" not in result:
+            continue
+        for step, stats in result["steps"].items():
+            old_stats = old["steps"].get(step)
+            if old_stats is None or not old_stats["p50"]:
+                continue
+            ratio = stats["p50"] / old_stats["p50"]
+            print(f"{result['scenario']}={result['size']:<8} {step:<18} {_ms(old_stats['p50']):>9}ms -> "
+                  f"{_ms(stats['p50']):>9}ms  x{ratio:.2f}")
+        if old.get("peak_rss_mb") and result.get("peak_rss_mb"):
+            print(f"{result['scenario']}={result['size']:<8} {'peak_rss_mb':<18} {old['peak_rss_mb']:>9.0f}MB -> "
+                  f"{result['peak_rss_mb']:>9.0f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(DEFAULT_SIZES))
+    parser.add_argument("--sizes", nargs="+", type=int, help="모든 시나리오에 사용할 크기 (기본: 시나리오별 기본값)")
+    parser.add_argument("--repeat", type=int, default=5, help="단계별 반복 횟수")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--latency", type=float, default=0.05, help="스텁의 응답 지연(초)")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="스텁의 스트리밍 조각 사이 지연(초)")
+    parser.add_argument("--requests-per-minute", type=int, default=0, help="문서 구간 요약 요청 제한 (0: 제한 없음)")
+    parser.add_argument("--run-timeout", type=float, default=300, help="재실행 한 번의 제한 시간(초)")
+    parser.add_argument("--job-timeout", type=float, default=900, help="백그라운드 작업의 제한 시간(초)")
+    parser.add_argument("--scenario-timeout", type=float, default=1800, help="시나리오 하나의 제한 시간(초)")
+    parser.add_argument("--output", help=f"결과 JSON 경로 (기본: {os.path.relpath(RESULT_DIR)}/<커밋>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 경로")
+    parser.add_argument("--child", choices=sorted(SCENARIOS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    commit, dirty = git_revision()
+    results = []
+    for scenario in args.scenarios:
+        for size in args.sizes or DEFAULT_SIZES[scenario]:
+            result = run_scenario(scenario, size, args)
+            print_result(result)
+            results.append(result)
+
+    output = args.output or os.path.join(RESULT_DIR, f"{commit or 'unknown'}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "config": {
+                key: getattr(args, key)
+                for key in ("repeat", "backend", "latency", "chunk_delay", "requests_per_minute")
+            },
+            **environment_info(),
+        },
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+    if any(r.get("error") for r in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
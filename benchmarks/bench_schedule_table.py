@@ -0,0 +1,125 @@
+"""
+일정 표 파이프라인 벤치마크
+
+이전 방식(행 단위 strptime 루프 + df.apply + iterrows + 전체 튜플 비교)과
+schedule_table 의 벡터화 파이프라인(to_datetime + NumPy 정렬 + id 기준 행 비교)을 비교합니다.
+
+    python benchmarks/bench_schedule_table.py --sizes 1000 10000 50000
+"""
+import argparse
+import os
+import random
+import sys
+import time as time_module
+from datetime import date, datetime, time, timedelta
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from schedule_table import diff_schedules, schedules_to_frame # noqa: E402
+
+
+def make_schedules(n, seed=0):
+    """n 개의 임의 일정을 만듭니다."""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    return [
+        {
+            "id": f"s{i}",
+            "date": (start + timedelta(days=rng.randrange(730))).isoformat(),
+            "time": f"{rng.randrange(24):02d}:{rng.randrange(60):02d}",
+            "event": f"일정 {i}",
+        }
+        for i in range(n)
+    ]
+
+
+# --- 이전 방식 (main.py 에서 옮겨 온 행 단위 처리) ---
+def _legacy_parse_time(value):
+    if isinstance(value, time):
+        return value
+    if not isinstance(value, str):
+        return None
+    for fmt in ["%H:%M:%S.%f", "%H:%M:%S", "%H:%M"]:
+        try:
+            return datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+def legacy_to_frame(schedules):
+    rows = []
+    for i, s in enumerate(schedules):
+        rows.append({
+            "날짜": datetime.strptime(s["date"], "%Y-%m-%d").date(),
+            "시간": _legacy_parse_time(s["time"]),
+            "일정 내용": s["event"],
+            "_original_id": f"{s['date']}_{s['time']}_{s['event']}_{i}",
+        })
+    df = pd.DataFrame(rows)
+    df["날짜"] = pd.to_datetime(df["날짜"], errors="coerce").dt.date
+    df["시간"] = df["시간"].apply(_legacy_parse_time)
+    df["sort_key"] = df.apply(
+        lambda row: datetime.combine(row["날짜"], row["시간"] if row["시간"] else time(0, 0)),
+        axis=1,
+    )
+    return df.sort_values(by="sort_key", na_position="first").drop(columns="sort_key").reset_index(drop=True)
+
+
+def legacy_diff(edited_df, schedules):
+    new_schedules = []
+    for _, row in edited_df.iterrows():
+        if not row["일정 내용"] or str(row["일정 내용"]).strip() == "":
+            continue
+        new_schedules.append({
+            "date": row["날짜"].strftime("%Y-%m-%d") if isinstance(row["날짜"], date) else "",
+            "time": row["시간"].strftime("%H:%M") if isinstance(row["시간"], time) else "",
+            "event": row["일정 내용"],
+        })
+    changed = sorted((s["date"], s["time"], s["event"]) for s in new_schedules) != sorted(
+        (s["date"], s["time"], s["event"]) for s in schedules
+    )
+    return changed, new_schedules
+
+
+def _timed(fn, *args):
+    start = time_module.perf_counter()
+    result = fn(*args)
+    return time_module.perf_counter() - start, result
+
+
+def run(sizes, skip_legacy_over):
+    print(f"{'rows':>8} | {'legacy build':>12} | {'legacy diff':>11} | {'vector build':>12} | {'vector diff':>11} | {'speedup':>7}")
+    print("-" * 78)
+    for n in sizes:
+        schedules = make_schedules(n)
+
+        vector_build, (df, _) = _timed(schedules_to_frame, schedules)
+        edited = df.copy()
+        edited.loc[0, "일정 내용"] = "변경된 일정" # 한 행만 편집
+        vector_diff, (inserts, updates, deletes) = _timed(diff_schedules, df, edited)
+        assert len(updates) == 1 and not inserts and not deletes
+
+        if n <= skip_legacy_over:
+            legacy_build, legacy_df = _timed(legacy_to_frame, schedules)
+            legacy_diff_time, _ = _timed(legacy_diff, legacy_df, schedules)
+            speedup = f"{(legacy_build + legacy_diff_time) / (vector_build + vector_diff):6.1f}x"
+            legacy_cols = f"{legacy_build * 1000:10.1f}ms | {legacy_diff_time * 1000:9.1f}ms"
+        else:
+            speedup = "-"
+            legacy_cols = f"{'skipped':>12} | {'skipped':>11}"
+        print(f"{n:>8} | {legacy_cols} | {vector_build * 1000:10.1f}ms | {vector_diff * 1000:9.1f}ms | {speedup:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--skip-legacy-over", type=int, default=50000, help="이보다 큰 크기는 이전 방식 측정을 건너뜀")
+    args = parser.parse_args()
+    run(args.sizes, args.skip_legacy_over)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+콜드 스타트 벤치마크 (모듈 import 시간 + 첫 화면 렌더링)
+
+새 프로세스에서 앱을 처음 실행할 때의 비용을 측정합니다.
+
+- imports: `python -X importtime` 으로 streamlit 을 불러온 뒤 앱 모듈과 무거운 의존성(pandas, PyPDF2, groq 등)을
+           하나씩 import 하는 데 걸리는 시간 (각각 새 프로세스)
+- startup: 새 프로세스에서 Streamlit AppTest 로 로그인 화면 첫 렌더링(first_paint), 로그인, 각 탭을 처음 열 때까지의
+           단계별 시간과, 각 단계에서 새로 불러온 무거운 모듈, 메모리(RSS)
+
+Groq API 는 호출하지 않으므로 스텁 서버가 필요 없습니다.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 --compare benchmarks/results/startup-abc1234.json
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_app import ( # noqa: E402
+    PASSWORD, RESULT_DIR, USERNAME, AppDriver, BenchmarkError, _ms, current_rss_mb, environment_info, git_revision,
+    summarize_times,
+)
+
+HEAVY_MODULES = ["pandas", "numpy", "scipy", "pyarrow", "PyPDF2", "groq", "httpx"]
+APP_MODULES = [
+    "storage", "user_store", "llm_cache", "jobs", "metrics", "model_router", "groq_client", "conversation",
+    "chat_search", "summarizer", "schedule_index", "schedule_analysis", "schedule_table", "retrieval", "pdf_extract",
+]
+TABS = ["일정 관리", "AI 비서 설정", "문서 요약 & 상담"]
+FIXTURE_CHATS = 100
+FIXTURE_SCHEDULES = 100
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# --- import 시간 ---
+def import_seconds(module):
+    """streamlit 을 불러온 새 프로세스에서 module 을 import 하는 데 걸린 시간(초)을 -X importtime 으로 측정합니다."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import streamlit; import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        return None
+    # 출력은 import 가 끝난 순서이므로 마지막에 나오는 최상위 module 줄이 이번 import 의 누적 시간입니다.
+    seconds = None
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(4) == module and len(match.group(3)) == 1:
+            seconds = int(match.group(2)) / 1e6
+    return seconds
+
+
+def profile_imports(repeat):
+    results = {}
+    for module in ["streamlit"] + HEAVY_MODULES + APP_MODULES + ["main"]:
+        if module == "streamlit":
+            command = [sys.executable, "-c", "import time; t = time.perf_counter(); import streamlit; "
+                                              "print(time.perf_counter() - t)"]
+            samples = [float(subprocess.run(command, capture_output=True, text=True).stdout) for _ in range(repeat)]
+        elif module == "main":
+            samples = [main_import_seconds() for _ in range(repeat)]
+        else:
+            samples = [import_seconds(module) for _ in range(repeat)]
+        samples = [s for s in samples if s is not None]
+        if samples:
+            results[module] = summarize_times(samples)
+    return results
+
+
+def main_import_seconds():
+    """
+    main.py 를 실행하지 않고 모듈 수준 import 문만 실행하는 데 걸린 시간(초)입니다.
+    (화면을 그리는 코드는 Streamlit 세션이 필요하므로 startup 의 first_paint 로 따로 측정합니다.)
+    """
+    with open(os.path.join(REPO_DIR, "main.py"), encoding="utf-8") as f:
+        source = f.read()
+    imports = "\n".join(
+        statement for statement in re.findall(r"^(?:import|from) [^\n(]+(?:\([^)]*\))?", source, re.M)
+    )
+    code = f"import streamlit, time\nt = time.perf_counter()\n{imports}\nprint(time.perf_counter() - t)"
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+    try:
+        return float(completed.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return None
+
+
+# --- 첫 화면 (자식 프로세스) ---
+def loaded_heavy_modules():
+    return {name for name in HEAVY_MODULES if name in sys.modules}
+
+
+def run_child(args):
+    """(자식 프로세스) 현재 디렉터리의 fixture 로 로그인 화면부터 각 탭까지 처음 열고 결과를 JSON 한 줄로 출력합니다."""
+    steps = []
+    before = loaded_heavy_modules()
+
+    def record(step, seconds):
+        nonlocal before
+        now = loaded_heavy_modules()
+        steps.append({"step": step, "seconds": seconds, "new_modules": sorted(now - before), "rss_mb": current_rss_mb()})
+        before = now
+
+    start = time.perf_counter()
+    import streamlit # noqa: F401
+    record("import_streamlit", time.perf_counter() - start)
+
+    driver = AppDriver(args.run_timeout)
+    error = None
+    try:
+        driver.timed("first_paint")
+        record("first_paint", driver.steps["first_paint"][-1])
+        driver.at.text_input(key="login_user").input(USERNAME)
+        driver.at.text_input(key="login_pw").input(PASSWORD)
+        driver.timed("login", lambda: driver.button("로그인").click().run())
+        record("login", driver.steps["login"][-1])
+        for tab in TABS:
+            driver.timed(tab, lambda: driver.at.sidebar.selectbox[0].set_value(tab).run())
+            record(f"open:{tab}", driver.steps[tab][-1])
+    except (BenchmarkError, StopIteration) as e:
+        error = f"{type(e).__name__}: {e}"
+    print(json.dumps({"steps": steps, "error": error}, ensure_ascii=False))
+
+
+def run_startup(args):
+    """새 프로세스에서 콜드 스타트를 repeat 번 측정합니다. 단계별 시간과 (첫 실행 기준) 새로 불러온 모듈을 반환합니다."""
+    from fixtures import create_user
+
+    work_dir = tempfile.mkdtemp(prefix="bench_startup_")
+    runs = []
+    try:
+        create_user(work_dir, USERNAME, PASSWORD, chats=FIXTURE_CHATS, schedules=FIXTURE_SCHEDULES, backend_kind=args.backend)
+        env = dict(os.environ, STORAGE_BACKEND=args.backend, SQLITE_PATH=os.path.join(work_dir, "assistant.db"))
+        env.pop("METRICS_EXPORT_PATH", None)
+        command = [sys.executable, os.path.abspath(__file__), "--child", "--run-timeout", str(args.run_timeout)]
+        for _ in range(args.repeat):
+            completed = subprocess.run(command, cwd=work_dir, env=env, capture_output=True, text=True)
+            try:
+                runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+            except (IndexError, ValueError):
+                runs.append({"steps": [], "error": f"자식 프로세스 실패 (exit {completed.returncode}): "
+                                                   f"{completed.stderr.strip()[-2000:]}"})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    steps = {}
+    for run in runs:
+        for row in run["steps"]:
+            steps.setdefault(row["step"], []).append(row["seconds"])
+    first = runs[0]["steps"] if runs else []
+    return {
+        "steps": {step: summarize_times(samples) for step, samples in steps.items()},
+        "new_modules": {row["step"]: row["new_modules"] for row in first},
+        "rss_mb": {row["step"]: row["rss_mb"] for row in first},
+        "errors": [run["error"] for run in runs if run.get("error")],
+    }
+
+
+# --- 출력 ---
+def print_report(report):
+    print("--- import 시간 (streamlit 이후, 새 프로세스) ---")
+    for module, stats in report["imports"].items():
+        print(f"    {module:<18} p50 {_ms(stats['p50']):>8}ms  max {_ms(stats['max']):>8}ms")
+    startup = report["startup"]
+    print("--- 콜드 스타트 ---")
+    for step, stats in startup["steps"].items():
+        modules = ", ".join(startup["new_modules"].get(step, [])) or "-"
+        rss = startup["rss_mb"].get(step)
+        print(f"    {step:<22} p50 {_ms(stats['p50']):>8}ms  p95 {_ms(stats['p95']):>8}ms  "
+              f"RSS {rss or 0:>5.0f}MB  새 모듈: {modules}")
+    for error in startup["errors"]:
+        print(f"    오류: {error}")
+
+
+def compare(baseline_path, report):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n--- {baseline_path} ({baseline['meta'].get('commit')}) 대비 p50 ---")
+    for section in ("imports", "startup"):
+        old_rows = baseline[section] if section == "imports" else baseline[section]["steps"]
+        new_rows = report[section] if section == "imports" else report[section]["steps"]
+        for name, stats in new_rows.items():
+            old = old_rows.get(name)
+            if old and old["p50"]:
+                print(f"    {name:<22} {_ms(old['p50']):>8}ms -> {_ms(stats['p50']):>8}ms  x{stats['p50'] / old['p50']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="측정 반복 횟수 (매번 새 프로세스)")
+    parser.add_argument("--backend", choices=["json", "sqlite"], default="json")
+    parser.add_argument("--skip-imports", action="store_true", help="모듈별 import 시간 측정을 건너뜁니다.")
+    parser.add_argument("--run-timeout", type=float, default=120, help="재실행 한 번의 제한 시간(초)")
+    parser.add_argument("--output", help=f"결과 JSON 경로 (기본: {os.path.relpath(RESULT_DIR)}/startup-<커밋>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 경로")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    commit, dirty = git_revision()
+    report = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "config": {"repeat": args.repeat, "backend": args.backend},
+            **environment_info(),
+        },
+        "imports": {} if args.skip_imports else profile_imports(args.repeat),
+        "startup": run_startup(args),
+    }
+    print_report(report)
+
+    output = args.output or os.path.join(RESULT_DIR, f"startup-{commit or 'unknown'}{'-dirty' if dirty else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+
+    if args.compare:
+        compare(args.compare, report)
+    if report["startup"]["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+벤치마크용 합성 데이터
+
+채팅 기록/일정이 있는 사용자와 N 페이지 PDF 를 만듭니다. 같은 seed 면 항상 같은 데이터가 만들어집니다.
+저장소 백엔드의 공개 메서드로 기록하므로 JSON 파일, SQLite 어느 쪽이든 사용할 수 있습니다.
+"""
+import hashlib
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from storage import create_backend # noqa: E402
+
+EVENTS = ["회의", "점심 약속", "운동", "병원 예약", "스터디", "저녁 식사", "프로젝트 마감", "산책", "독서", "가족 모임"]
+PDF_WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "report", "budget", "schedule", "review", "plan"] # Helvetica 로 표시 가능한 글자만
+WORDS = ["일정", "문서", "요약", "회의", "프로젝트", "보고서", "검토", "계획", "예산", "마감", "자료", "질문"]
+
+
+def make_chats(n, seed=0):
+    """n 개의 질문/답변 기록을 오래된 것부터 만듭니다. (답변은 100~400자)"""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    chats = []
+    for i in range(n):
+        question = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))) + f" 질문 {i}?"
+        answer = " ".join(rng.choice(WORDS) for _ in range(rng.randint(30, 120)))
+        day = start + timedelta(days=i * 730 // max(n, 1))
+        chats.append({"질문": question, "답변": answer, "timestamp": f"{day.isoformat()}T{rng.randrange(24):02d}:00:00"})
+    return chats
+
+
+def make_schedules(n, seed=0, today=None, span_days=365):
+    """오늘을 기준으로 앞뒤 span_days 일 사이에 흩어진 n 개의 일정을 만듭니다."""
+    rng = random.Random(seed)
+    today = today or date.today()
+    return [
+        {
+            "id": f"b{i:08d}",
+            "date": (today + timedelta(days=rng.randint(-span_days, span_days))).isoformat(),
+            "time": f"{rng.randrange(24):02d}:{rng.choice((0, 15, 30, 45)):02d}",
+            "event": f"{rng.choice(EVENTS)} {i}",
+        }
+        for i in range(n)
+    ]
+
+
+def make_pdf(pages, lines_per_page=40, seed=0):
+    """텍스트가 들어 있는 pages 페이지짜리 PDF 바이트를 만듭니다. (Helvetica, 페이지당 lines_per_page 줄)"""
+    rng = random.Random(seed)
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    oid = 4
+    for page in range(pages):
+        lines = [
+            f"Page {page + 1} line {i}: " + " ".join(rng.choice(PDF_WORDS) for _ in range(10))
+            for i in range(lines_per_page)
+        ]
+        stream = ("BT /F1 9 Tf 40 800 Td 11 TL " + " ".join(f"({line}) '" for line in lines) + " ET").encode("latin-1")
+        objects[oid] = b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream"
+        objects[oid + 1] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % oid
+        )
+        kids.append(oid + 1)
+        oid += 2
+    objects[2] = b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % k for k in kids) + b"] /Count %d >>" % pages
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(pdf)
+        pdf += b"%d 0 obj\n" % number + objects[number] + b"\nendobj\n"
+    xref = len(pdf)
+    size = max(objects) + 1
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % size
+    for number in range(1, size):
+        pdf += b"%010d 00000 n \n" % offsets[number]
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref)
+    return bytes(pdf)
+
+
+def create_user(base_dir, username, password, chats=0, schedules=0, backend_kind="json", seed=0):
+    """
+    base_dir 의 저장소(backend_kind)에 chats 개의 채팅 기록과 schedules 개의 일정을 가진 사용자를 만듭니다.
+    SQLite 는 base_dir/assistant.db 를 사용합니다.
+    """
+    backend = create_backend(backend_kind, sqlite_path=os.path.join(base_dir, "assistant.db"), base_dir=base_dir)
+    try:
+        backend.create_user(username, hashlib.sha256(password.encode()).hexdigest())
+        for entry in make_chats(chats, seed):
+            backend.append_chat(username, entry)
+        if schedules:
+            backend.save_schedules(username, make_schedules(schedules, seed))
+    finally:
+        if backend_kind == "sqlite":
+            backend.close()
+        else:
+            backend.chat_log(username).close()
@@ -0,0 +1,198 @@
+"""
+로컬 Groq(OpenAI 호환) 스텁 서버
+
+실제 API 를 호출하지 않고 앱, 모델 라우터, 벤치마크를 시험할 수 있도록
+POST /openai/v1/chat/completions 를 흉내 냅니다. (스트리밍 SSE, JSON 응답 형식 포함)
+모델별 응답 지연과 오류율을 지정할 수 있습니다.
+
+    python benchmarks/groq_stub.py --port 8765 --latency 0.2 --model-latency llama3-8b-8192=2.0 --error-rate 0.1
+    GROQ_BASE_URL=http://127.0.0.1:8765 streamlit run main.py
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMPLETIONS_PATH = "/openai/v1/chat/completions"
+
+
+class StubConfig:
+    """스텁 서버의 응답 지연, 오류율, 스트리밍 조각 크기 설정입니다."""
+
+    def __init__(self, latency=0.05, model_latency=None, error_rate=0.0, model_error_rate=None,
+                 chunk_chars=8, chunk_delay=0.005, seed=None):
+        self.latency = latency # 첫 응답(스트리밍은 첫 조각)까지의 기본 지연(초)
+        self.model_latency = model_latency or {}
+        self.error_rate = error_rate # 500 오류를 돌려줄 확률
+        self.model_error_rate = model_error_rate or {}
+        self.chunk_chars = chunk_chars
+        self.chunk_delay = chunk_delay
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.requests_by_model = {}
+        self._lock = threading.Lock()
+
+    def count(self, model):
+        with self._lock:
+            self.requests += 1
+            self.requests_by_model[model] = self.requests_by_model.get(model, 0) + 1
+
+    def should_fail(self, model):
+        rate = self.model_error_rate.get(model, self.error_rate)
+        with self._lock:
+            return self.random.random() < rate
+
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def make_answer(body):
+    """요청 내용으로 결정적인(같은 요청이면 같은) 응답 텍스트를 만듭니다."""
+    last = body["messages"][-1]["content"] if body.get("messages") else ""
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({
+            "analysis": "스텁 분석: 일정이 고르게 분포되어 있습니다.",
+            "recommendations": [{"date": time.strftime("%Y-%m-%d"), "time": "18:00", "event": "산책"}],
+        }, ensure_ascii=False)
+    return f"스텁 응답: {last[:60]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive 연결 재사용
+    config = StubConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != COMPLETIONS_PATH:
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}", "type": "not_found"}})
+            return
+
+        config = self.config
+        model = body.get("model", "")
+        config.count(model)
+        time.sleep(config.model_latency.get(model, config.latency))
+        if config.should_fail(model):
+            self._send_json(500, {"error": {"message": "stub failure", "type": "internal_server_error"}})
+            return
+
+        answer = make_answer(body)
+        prompt_tokens = sum(_estimate_tokens(m.get("content", "")) for m in body.get("messages", []))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": _estimate_tokens(answer),
+            "total_tokens": prompt_tokens + _estimate_tokens(answer),
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send_event(payload):
+            data = f"data: {payload}\n\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        def chunk(delta, finish_reason=None, extra=None):
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            payload.update(extra or {})
+            return json.dumps(payload, ensure_ascii=False)
+
+        try:
+            send_event(chunk({"role": "assistant", "content": ""}))
+            for start in range(0, len(answer), config.chunk_chars):
+                send_event(chunk({"content": answer[start:start + config.chunk_chars]}))
+                time.sleep(config.chunk_delay)
+            send_event(chunk({}, "stop", {"x_groq": {"usage": usage}}))
+            send_event("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass # 클라이언트가 스트림을 먼저 닫은 경우 (헤지 요청에서 진 쪽)
+
+
+def start_stub_server(port=0, config=None):
+    """
+    스텁 서버를 백그라운드 스레드에서 시작합니다.
+    반환값: (server, base_url) - 끝나면 server.shutdown() 을 호출합니다.
+    """
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config or StubConfig()})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="groq-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _parse_pairs(values, cast):
+    pairs = {}
+    for value in values or []:
+        name, _, number = value.partition("=")
+        pairs[name] = cast(number)
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="기본 응답 지연(초)")
+    parser.add_argument("--model-latency", action="append", help="모델별 응답 지연 (모델=초), 여러 번 지정 가능")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="500 오류를 돌려줄 확률")
+    parser.add_argument("--model-error-rate", action="append", help="모델별 오류율 (모델=확률)")
+    parser.add_argument("--chunk-chars", type=int, default=8, help="스트리밍 조각 하나의 글자 수")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="스트리밍 조각 사이의 지연(초)")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency=args.latency,
+        model_latency=_parse_pairs(args.model_latency, float),
+        error_rate=args.error_rate,
+        model_error_rate=_parse_pairs(args.model_error_rate, float),
+        chunk_chars=args.chunk_chars,
+        chunk_delay=args.chunk_delay,
+    )
+    server, base_url = start_stub_server(args.port, config)
+    print(f"Groq 스텁 서버 실행 중: {base_url} (GROQ_BASE_URL={base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
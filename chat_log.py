@@ -0,0 +1,319 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from atomic_file import write_atomic
+
+# --- 추가 전용(append-only) JSONL 채팅 로그 ---
+# 질문/답변 한 쌍을 한 줄로 덧붙여 쓰므로 메시지마다 전체 파일을 다시 쓰지 않습니다.
+# 기록 초기화는 {"_op": "clear"} 표시를 덧붙이고, 로그가 커지면 백그라운드에서 압축(compaction)합니다.
+FSYNC_EVERY = 8 # fsync 전에 모아 둘 최대 기록 수
+FSYNC_INTERVAL = 1.0 # 기록이 fsync 되지 않은 채로 남아 있을 수 있는 최대 시간(초)
+COMPACT_BYTES = 1024 * 1024 # 로그가 이 크기를 넘고 정리할 기록이 있으면 압축
+TAIL_BLOCK_SIZE = 64 * 1024
+
+CLEAR_OP = "clear"
+
+
+def file_signature(path):
+    """파일 변경 감지용 (mtime_ns, size) 를 반환합니다. 파일이 없으면 None 을 반환합니다."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _encode(record):
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _decode(line):
+    """한 줄을 기록으로 변환합니다. 쓰기 도중 중단되어 깨진 줄은 None 을 반환합니다."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+def _is_clear(record):
+    return record.get("_op") == CLEAR_OP
+
+
+class ChatLog:
+    """한 사용자의 채팅 기록을 담는 JSONL 로그 파일입니다. 여러 스레드에서 안전하게 사용할 수 있습니다."""
+
+    def __init__(self, path, legacy_json_path=None, fsync_every=FSYNC_EVERY,
+                 fsync_interval=FSYNC_INTERVAL, compact_bytes=COMPACT_BYTES):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+        self._lock = threading.RLock()
+        self._file = None
+        self._pending = 0 # fsync 되지 않은 기록 수
+        self._last_sync = time.monotonic()
+        self._sync_timer = None # fsync_interval 뒤에 남은 기록을 fsync 하는 타이머
+        self._dead_lines = 0 # 압축 시 제거될 줄 수 (초기화 이전 기록, 깨진 줄, clear 표시)
+        self._compacting = False
+        self._count = None # 마지막 초기화 이후 기록 수 (파일 시그니처와 함께 보관)
+        self._count_signature = None
+        if legacy_json_path:
+            self._migrate(legacy_json_path)
+
+    # --- 기존 JSON 파일 이전 ---
+    def _migrate(self, legacy_json_path):
+        """기존 chat_history_*.json 파일이 있으면 JSONL 로그로 옮기고 원본은 .migrated 로 보관합니다."""
+        if os.path.exists(self.path) or not os.path.exists(legacy_json_path):
+            return
+        with open(legacy_json_path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        self._rewrite(entries)
+        os.replace(legacy_json_path, f"{legacy_json_path}.migrated")
+
+    # --- 쓰기 ---
+    def _handle(self):
+        """추가용 파일 핸들을 엽니다. fsync 할 기록이 남아 있는 동안만 열어 두므로 사용자가 많아도 핸들이 쌓이지 않습니다."""
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            _open_logs.add(self)
+            # 이전에 쓰기 도중 중단되어 마지막 줄이 끊겼다면, 새 기록이 그 줄에 이어 붙지 않도록 줄바꿈을 넣습니다.
+            if self._file.tell() > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    if f.read(1) != b"\n":
+                        self._file.write(b"\n")
+        return self._file
+
+    def _write(self, record):
+        with self._lock:
+            f = self._handle()
+            f.write(_encode(record))
+            f.flush()
+            size = f.tell()
+            self._pending += 1
+            # fsync 는 비용이 크므로 여러 기록을 모아서 한 번에 수행합니다.
+            if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self.close()
+            elif self._sync_timer is None:
+                # 다음 기록이 오지 않아도 fsync_interval 안에 디스크에 확정되고 핸들이 닫히도록 타이머를 겁니다.
+                self._sync_timer = threading.Timer(self.fsync_interval, self._sync_pending)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+            if size > self.compact_bytes and self._dead_lines:
+                self.compact_async()
+
+    def _update_count(self, count):
+        """직접 기록한 뒤의 기록 수를 갱신하여 다시 세지 않도록 합니다."""
+        self._count = count
+        self._count_signature = file_signature(self.path)
+
+    def append(self, entry):
+        """질문/답변 기록 하나를 로그 끝에 추가합니다."""
+        with self._lock:
+            count = self.count()
+            self._write(entry)
+            self._update_count(count + 1)
+
+    def clear(self):
+        """기록 초기화 표시를 추가합니다. 이전 기록은 다음 압축 때 실제로 삭제됩니다."""
+        with self._lock:
+            self._dead_lines = self.count_lines() + 1 # 기존의 모든 줄과 clear 표시
+            self._write({"_op": CLEAR_OP, "ts": time.time()})
+            self._update_count(0)
+
+    def sync(self):
+        """버퍼에 남은 기록을 디스크에 확정(fsync)합니다."""
+        with self._lock:
+            if self._file is not None and self._pending:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._pending = 0
+            self._last_sync = time.monotonic()
+
+    def _sync_pending(self):
+        """(타이머 스레드) 아직 fsync 되지 않은 기록을 확정하고 파일 핸들을 닫습니다."""
+        with self._lock:
+            self._sync_timer = None
+            try:
+                self.close()
+            except OSError:
+                pass # 다음 기록이나 종료 시(_sync_all) 다시 시도합니다.
+
+    def close(self):
+        """남은 기록을 fsync 하고 파일 핸들을 닫습니다. 다음 기록을 추가할 때 다시 엽니다."""
+        with self._lock:
+            if self._sync_timer is not None:
+                self._sync_timer.cancel()
+                self._sync_timer = None
+            self.sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            _open_logs.discard(self)
+
+    # --- 읽기 ---
+    def _iter_lines(self):
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                yield line
+
+    def load(self):
+        """마지막 초기화 이후의 모든 기록을 순서대로 반환합니다."""
+        entries = []
+        dead = 0
+        for line in self._iter_lines():
+            record = _decode(line)
+            if record is None:
+                dead += 1
+            elif _is_clear(record):
+                dead += len(entries) + 1
+                entries = []
+            else:
+                entries.append(record)
+        with self._lock:
+            self._dead_lines = dead
+        return entries
+
+    def count(self):
+        """마지막 초기화 이후의 기록 수를 반환합니다. 파일이 바뀌지 않았다면 다시 세지 않습니다."""
+        signature = file_signature(self.path)
+        with self._lock:
+            if self._count is None or self._count_signature != signature:
+                self._count = len(self.load())
+                self._count_signature = signature
+            return self._count
+
+    def page(self, offset, limit):
+        """최신 기록부터 offset 개를 건너뛴 limit 개의 기록을 오래된 것부터 순서대로 반환합니다."""
+        entries = self.tail(offset + limit)
+        return entries[:max(0, len(entries) - offset)]
+
+    def records_from(self, start):
+        """
+        마지막 초기화 이후 start 번째(0부터)부터 마지막까지의 (파일 오프셋, 기록) 목록을 반환합니다.
+        파일 끝에서부터 필요한 만큼만 읽습니다. 오프셋은 read_at 으로 기록을 다시 읽을 때 사용합니다. (압축하면 바뀜)
+        """
+        with self._lock: # 세는 동안 기록이 추가되어 위치가 어긋나지 않도록 합니다.
+            return self._tail_records(self.count() - start)
+
+    def read_at(self, offsets):
+        """
+        각 파일 오프셋에서 시작하는 기록을 읽어 같은 순서의 목록으로 반환합니다.
+        오프셋이 줄의 시작이 아니거나 읽을 수 없으면 (압축 등으로 파일이 바뀐 경우) 그 자리는 None 입니다.
+        """
+        records = []
+        with self._lock:
+            try:
+                f = open(self.path, "rb")
+            except FileNotFoundError:
+                return [None] * len(offsets)
+            with f:
+                for offset in offsets:
+                    record = None
+                    if offset >= 0:
+                        f.seek(max(offset - 1, 0))
+                        if offset == 0 or f.read(1) == b"\n": # 바로 앞 글자가 줄바꿈이어야 줄의 시작입니다.
+                            record = _decode(f.readline())
+                    records.append(None if record is None or _is_clear(record) else record)
+        return records
+
+    def count_lines(self):
+        """로그 파일의 전체 줄 수를 반환합니다."""
+        return sum(1 for _ in self._iter_lines())
+
+    def tail(self, n):
+        """
+        가장 최근 기록 n 개를 오래된 것부터 순서대로 반환합니다.
+        파일 끝에서부터 블록 단위로 거꾸로 읽으므로 전체 로그를 파싱하지 않습니다.
+        """
+        return [record for _, record in self._tail_records(n)]
+
+    def _tail_records(self, n):
+        """tail 과 같지만 각 기록이 시작하는 파일 오프셋을 함께 (오프셋, 기록) 으로 반환합니다."""
+        if n <= 0:
+            return []
+        result = deque()
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            remainder = b""
+            while position > 0 and len(result) < n:
+                read_size = min(TAIL_BLOCK_SIZE, position)
+                position -= read_size
+                f.seek(position)
+                block = f.read(read_size) + remainder
+                lines = block.split(b"\n")
+                # 첫 줄은 이전 블록과 이어질 수 있으므로 다음 반복으로 넘깁니다.
+                remainder = lines.pop(0) if position > 0 else b""
+                line_start = position + len(remainder) + 1 if position > 0 else 0
+                starts = []
+                for line in lines:
+                    starts.append(line_start)
+                    line_start += len(line) + 1
+                for start, line in zip(reversed(starts), reversed(lines)):
+                    if not line.strip():
+                        continue
+                    record = _decode(line)
+                    if record is None:
+                        continue
+                    if _is_clear(record):
+                        return list(result)
+                    result.appendleft((start, record))
+                    if len(result) >= n:
+                        return list(result)
+        return list(result)
+
+    # --- 압축 ---
+    def _rewrite(self, entries):
+        """entries 만 담은 새 로그 파일을 만들어 원자적으로 교체합니다."""
+        write_atomic(self.path, b"".join(_encode(entry) for entry in entries), fsync=True)
+
+    def compact(self):
+        """초기화 이전 기록과 깨진 줄을 제거하여 로그 파일을 다시 씁니다."""
+        with self._lock:
+            self.close() # 교체 후에는 새 파일에 이어 쓰도록 핸들을 닫습니다.
+            entries = self.load()
+            self._rewrite(entries)
+            self._dead_lines = 0
+            self._update_count(len(entries))
+
+    def compact_async(self):
+        """백그라운드 스레드에서 압축을 수행합니다. 이미 진행 중이면 무시합니다."""
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def run():
+            try:
+                self.compact()
+            finally:
+                self._compacting = False
+
+        threading.Thread(target=run, name=f"compact-{os.path.basename(self.path)}", daemon=True).start()
+
+
+_open_logs = set() # 파일 핸들이 열려 있는 (fsync 되지 않은 기록이 있을 수 있는) 로그
+
+
+@atexit.register
+def _sync_all():
+    """프로세스 종료 시 fsync 되지 않은 기록을 모두 디스크에 확정합니다."""
+    for log in list(_open_logs):
+        try:
+            log.close()
+        except OSError:
+            pass
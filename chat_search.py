@@ -0,0 +1,322 @@
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+from metrics import span
+from registry import UserRegistry
+
+# --- 대화 기록 전문 검색 (문자 n-gram 역색인) ---
+# 한국어는 조사와 띄어쓰기 때문에 단어 단위로는 잘 찾아지지 않으므로, 질문/답변을 단어별 문자 2-gram 으로 나누어 색인합니다.
+# 새 대화는 그 기록만 색인에 더하고(증분 색인), 색인은 채팅 로그 옆에 스냅샷 + 기록별 변경분(delta)으로 저장합니다.
+# 검색 결과는 BM25 점수로 순위를 매기고, 상위 후보의 기록만 ref(파일 오프셋 / 행 id)로 읽어 검색어가 그대로 들어 있는 기록을 더 위로 올립니다.
+NGRAM = 2
+INDEX_VERSION = 2
+SNAPSHOT_EVERY = 500 # 변경분이 이만큼 쌓이면 전체 스냅샷을 다시 저장하고 변경분을 비웁니다.
+MAX_RESULTS = 10
+RERANK_CANDIDATES = 50 # 검색어 일치 여부로 다시 순위를 매길 상위 후보 수
+MIN_MATCH_RATIO = 0.5 # 검색어 n-gram 중 이 비율 이상이 들어 있는 기록만 결과에 포함
+PHRASE_BOOST = 2.0 # 검색어가 그대로 들어 있는 기록의 점수 배율
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 200
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text):
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def ngrams(text, n=NGRAM):
+    """단어별 문자 n-gram 목록을 반환합니다. n 글자 이하의 단어는 그대로 사용합니다."""
+    grams = []
+    for word in _WORD.findall(normalize(text)):
+        if len(word) <= n:
+            grams.append(word)
+        else:
+            grams.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return grams
+
+
+def _entry_text(entry):
+    return f"{entry.get('질문', '')}\n{entry.get('답변', '')}"
+
+
+def _entry_key(entry):
+    """색인한 마지막 기록을 알아보기 위한 값입니다. (다른 프로세스에서 기록이 초기화되었는지 확인)"""
+    return [entry.get("timestamp", ""), entry.get("질문", "")[:100]]
+
+
+def make_snippet(text, query, width=SNIPPET_CHARS):
+    """text 에서 검색어(또는 그 첫 단어)가 처음 나오는 곳 주변의 width 글자를 반환합니다."""
+    lowered = text.lower()
+    position = -1
+    for term in [query.strip().lower()] + query.lower().split():
+        position = lowered.find(term) if term else -1
+        if position >= 0:
+            break
+    start = max(0, position - width // 4) if position >= 0 else 0
+    snippet = text[start:start + width]
+    return ("…" if start > 0 else "") + snippet + ("…" if start + width < len(text) else "")
+
+
+class ChatSearchIndex:
+    """
+    한 사용자의 채팅 기록에 대한 역색인입니다. 문서 id 는 기록의 위치(오래된 것부터 0, 1, 2, ...)입니다.
+    postings: n-gram -> {문서 id: 출현 횟수}, docs: 문서 id -> [timestamp, n-gram 수, ref]
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._saving = False
+        self._loaded = False
+        self._clear()
+
+    def _clear(self):
+        self.postings = {}
+        self.docs = []
+        self.total_length = 0
+        self.last_key = None
+        self._unsaved = [] # 아직 저장하지 않은 변경분
+        self._saved_deltas = 0 # 마지막 스냅샷 이후 저장된 변경분 수
+        self._snapshot_due = True # 변경분이 아니라 전체 스냅샷을 저장해야 하는지 (재구성, ref 변경 등)
+
+    # --- 색인 ---
+    def _add_doc(self, timestamp, counts, ref, key):
+        doc = len(self.docs)
+        for gram, tf in counts.items():
+            self.postings.setdefault(gram, {})[doc] = tf
+        length = sum(counts.values())
+        self.docs.append([timestamp, length, ref])
+        self.total_length += length
+        self.last_key = key
+        return doc
+
+    def _add(self, ref, entry):
+        """기록 하나를 색인하고, 저장할 변경분을 반환합니다."""
+        counts = dict(Counter(ngrams(_entry_text(entry))))
+        timestamp = str(entry.get("timestamp", ""))
+        key = _entry_key(entry)
+        doc = self._add_doc(timestamp, counts, ref, key)
+        return {"doc": doc, "timestamp": timestamp, "ref": ref, "grams": counts, "last_key": key}
+
+    def _index(self, records):
+        if not records:
+            return
+        with span("chat_search.index"):
+            for ref, entry in records:
+                self._unsaved.append(self._add(ref, entry))
+
+    def reset(self):
+        """채팅 기록이 초기화되었을 때 색인을 비웁니다. (다음 저장 때 파일에도 반영)"""
+        with self._lock:
+            self._clear()
+            self._loaded = True
+
+    def _load(self, store):
+        """저장된 스냅샷과 변경분을 읽고, 그 뒤에 추가된 기록만 이어서 색인합니다."""
+        data, deltas = store.backend.load_search_index(store.username)
+        self._clear()
+        if data and data.get("version") == INDEX_VERSION and data.get("ngram") == NGRAM:
+            self.from_dict(data)
+            self._snapshot_due = False
+        for delta in deltas:
+            if delta["doc"] < len(self.docs):
+                continue # 스냅샷에 이미 포함된 변경분
+            if delta["doc"] > len(self.docs):
+                break # 중간이 빠진 변경분은 채팅 로그에서 다시 색인합니다.
+            self._add_doc(delta["timestamp"], delta["grams"], delta["ref"], delta["last_key"])
+            self._saved_deltas += 1
+        self._loaded = True
+        self._catch_up(store)
+
+    def _catch_up(self, store):
+        """
+        마지막으로 색인한 기록이 그대로 있는지 확인하고 그 뒤의 새 기록만 색인합니다. (같은 기록부터 읽어 새 기록과 함께 가져옴)
+        기록이 초기화되었으면 처음부터 다시 만들고, 기록은 같지만 ref 가 바뀌었으면(로그 압축) ref 만 다시 맞춥니다.
+        """
+        covered = len(self.docs)
+        records = store.chat_records_from(max(covered - 1, 0))
+        if covered:
+            if records and _entry_key(records[0][1]) == self.last_key:
+                if records[0][0] != self.docs[-1][2]:
+                    self._relocate(store)
+                records = records[1:]
+            else:
+                self._clear()
+                records = store.chat_records_from(0)
+        self._index(records)
+
+    def _relocate(self, store):
+        """색인한 기록들의 ref 를 채팅 로그에서 다시 읽어 맞춥니다. (로그 압축 후, 전체 스냅샷 저장)"""
+        for doc, (ref, _) in zip(range(len(self.docs)), store.chat_records_from(0)):
+            self.docs[doc][2] = ref
+        self._snapshot_due = True
+
+    def sync(self, store):
+        """아직 색인하지 않은 새 기록을 색인하고, 바뀐 내용이 있으면 백그라운드에서 저장합니다."""
+        with self._lock:
+            if not self._loaded:
+                self._load(store)
+            elif store.chat_count() != len(self.docs):
+                self._catch_up(store)
+            save = self._snapshot_due or self._unsaved
+        if save:
+            self.save_async(store)
+
+    def notify_append(self, store):
+        """새 기록이 추가된 뒤 호출합니다. 색인을 이미 불러온 경우에만 그 기록을 바로 색인합니다."""
+        if self._loaded:
+            self.sync(store)
+
+    # --- 저장 ---
+    def to_dict(self):
+        with self._lock:
+            return {
+                "version": INDEX_VERSION,
+                "ngram": NGRAM,
+                "last_key": self.last_key,
+                "docs": [list(doc) for doc in self.docs],
+                # {문서 id: 횟수} 대신 [id, 횟수, id, 횟수, ...] 로 저장하여 파일 크기를 줄입니다.
+                "postings": {
+                    gram: [value for item in posting.items() for value in item] for gram, posting in self.postings.items()
+                },
+            }
+
+    def from_dict(self, data):
+        self.docs = data["docs"]
+        self.total_length = sum(length for _, length, _ in self.docs)
+        self.last_key = data.get("last_key")
+        self.postings = {gram: dict(zip(flat[0::2], flat[1::2])) for gram, flat in data["postings"].items()}
+
+    def save(self, store):
+        """
+        새로 색인한 기록의 변경분만 덧붙여 저장합니다. (색인 크기와 무관)
+        재구성했거나 변경분이 SNAPSHOT_EVERY 개 이상 쌓였으면 전체 스냅샷을 저장하고 변경분을 비웁니다.
+        """
+        with self._lock:
+            deltas = self._unsaved
+            snapshot = None
+            if self._snapshot_due or self._saved_deltas + len(deltas) >= SNAPSHOT_EVERY:
+                snapshot = self.to_dict()
+                self._saved_deltas = 0
+                self._snapshot_due = False
+            else:
+                self._saved_deltas += len(deltas)
+            self._unsaved = []
+        try:
+            if snapshot is not None:
+                store.backend.save_search_index(store.username, snapshot)
+            elif deltas:
+                store.backend.append_search_index(store.username, deltas)
+        except Exception:
+            with self._lock:
+                self._snapshot_due = True # 다음 저장은 전체 스냅샷으로 다시 시도합니다.
+            raise
+
+    def save_async(self, store):
+        """백그라운드 스레드에서 저장할 것이 없어질 때까지 저장합니다. 이미 저장 중이면 그 스레드가 이어서 저장합니다."""
+        with self._lock:
+            if self._saving:
+                return
+            self._saving = True
+
+        def run():
+            try:
+                while True:
+                    with self._lock:
+                        if not (self._snapshot_due or self._unsaved):
+                            self._saving = False
+                            return
+                    self.save(store)
+            except Exception:
+                # 저장하지 못한 기록은 다음 실행에서 채팅 로그로부터 다시 색인합니다.
+                with self._lock:
+                    self._saving = False
+
+        threading.Thread(target=run, name=f"chat-search-save-{store.username}", daemon=True).start()
+
+    # --- 검색 ---
+    def _fetch(self, store, candidates):
+        """후보 문서의 기록만 ref 로 읽습니다. ref 가 바뀌었으면(로그 압축) 한 번 다시 맞춘 뒤 읽습니다."""
+        def read():
+            with self._lock:
+                docs = [self.docs[doc] for doc in candidates]
+            entries = store.chats_by_ref([ref for _, _, ref in docs])
+            return [
+                entry if entry is not None and str(entry.get("timestamp", "")) == timestamp else None
+                for entry, (timestamp, _, _) in zip(entries, docs)
+            ]
+
+        entries = read()
+        if any(entry is None for entry in entries):
+            with self._lock:
+                self._relocate(store)
+            entries = read()
+        return entries
+
+    def search(self, store, query, date_from=None, date_to=None, limit=MAX_RESULTS):
+        """
+        검색어와 관련된 기록을 점수 순으로 최대 limit 개 반환합니다. [{"position", "score", "entry"}]
+        date_from, date_to (datetime.date) 로 기록 날짜를 제한할 수 있습니다. (양 끝 포함)
+        """
+        self.sync(store)
+        query_grams = set(ngrams(query))
+        if not query_grams:
+            return []
+        start = date_from.isoformat() if date_from else ""
+        end = date_to.isoformat() if date_to else "9999-12-31"
+
+        with span("chat_search.query"), self._lock:
+            doc_count = len(self.docs)
+            if not doc_count:
+                return []
+            average_length = self.total_length / doc_count or 1
+            scores = {}
+            matched = Counter()
+            for gram in query_grams:
+                posting = self.postings.get(gram)
+                if not posting:
+                    continue
+                idf = math.log(1 + (doc_count - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc, tf in posting.items():
+                    timestamp, length, _ = self.docs[doc]
+                    day = timestamp[:10]
+                    if (date_from or date_to) and not (start <= day <= end and day):
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+                    matched[doc] += 1
+
+            min_matched = max(1, math.ceil(len(query_grams) * MIN_MATCH_RATIO))
+            candidates = sorted(
+                (doc for doc in scores if matched[doc] >= min_matched), key=lambda doc: (scores[doc], doc), reverse=True
+            )[:RERANK_CANDIDATES]
+        if not candidates:
+            return []
+
+        # 상위 후보의 기록만 읽어, 검색어(공백 정리)가 그대로 들어 있으면 점수를 올립니다.
+        phrase = " ".join(normalize(query).split())
+        results = []
+        for doc, entry in zip(candidates, self._fetch(store, candidates)):
+            if entry is None:
+                continue # 색인한 뒤 기록이 바뀐 경우
+            score = scores[doc]
+            if phrase and phrase in " ".join(normalize(_entry_text(entry)).split()):
+                score *= PHRASE_BOOST
+            results.append({"position": doc, "score": score, "entry": entry})
+        results.sort(key=lambda result: (result["score"], result["position"]), reverse=True)
+        return results[:limit]
+
+
+_indexes = UserRegistry()
+
+
+def get_chat_search(store):
+    """
+    프로세스 전체에서 사용자별로 하나씩 공유되는 ChatSearchIndex 를 반환합니다.
+    오래 사용하지 않아 제거된 경우 다음 검색 때 저장된 색인을 다시 불러옵니다.
+    """
+    return _indexes.get((id(store.backend), store.username), ChatSearchIndex)
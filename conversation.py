@@ -0,0 +1,191 @@
+import threading
+
+from registry import UserRegistry
+from summarizer import estimate_tokens, split_into_chunks
+
+# --- 대화 맥락 (최근 대화 + 누적 요약) ---
+# 최근 몇 턴은 토큰 예산 안에서 그대로 보내고, 그보다 오래된 턴은 사용자별 누적 요약(rolling summary)에 합칩니다.
+# 요약은 새로 밀려난 턴만 이전 요약에 더해 갱신하므로, 대화가 길어져도 요청 크기와 요약 비용이 늘어나지 않습니다.
+HISTORY_TOKENS = 1200 # 그대로 보낼 최근 대화의 최대 토큰 수
+MAX_HISTORY_TURNS = 6 # 요약되지 않은 턴이 이만큼 쌓이면 오래된 턴을 요약에 합칩니다.
+KEEP_TURNS = 3 # 요약 후에도 그대로 남겨 둘 최근 턴 수
+SUMMARY_TOKENS = 300 # 누적 요약의 최대 출력 토큰 수
+FOLD_CHUNK_TOKENS = 2000 # 한 번의 요약 요청에 넣을 새 대화의 최대 토큰 수
+MAX_FOLD_TURNS = 50 # 처음 요약할 때 포함할 최대 턴 수 (그 이전 기록은 요약하지 않음)
+
+FOLD_SYSTEM_MESSAGE = "당신은 대화 내용을 요약하는 도우미입니다. 모든 답변은 한국어로 해주세요."
+FOLD_INSTRUCTION = (
+    "아래의 기존 대화 요약과 새 대화를 합쳐, 사용자에 대해 알게 된 사실과 주요 질문/답변의 핵심을 "
+    "5문장 이내로 다시 요약해 주세요."
+)
+
+
+def turn_tokens(turn):
+    return estimate_tokens(turn.get("질문", "")) + estimate_tokens(turn.get("답변", ""))
+
+
+def format_turns(turns):
+    return "\n".join(f"사용자: {turn.get('질문', '')}\nAI: {turn.get('답변', '')}" for turn in turns)
+
+
+def _turn_key(turn):
+    """요약에 포함된 마지막 턴을 알아보기 위한 값입니다. (저장한 뒤 기록이 초기화되었는지 확인)"""
+    return [turn.get("timestamp", ""), turn.get("질문", "")[:100]]
+
+
+def build_fold_messages(summary, turns_text):
+    """기존 요약과 새 대화로 누적 요약 요청 메시지를 만듭니다."""
+    return [
+        {"role": "system", "content": FOLD_SYSTEM_MESSAGE},
+        {"role": "user", "content": f"{FOLD_INSTRUCTION}\n\n[기존 요약]\n{summary or '(없음)'}\n\n[새 대화]\n{turns_text}"},
+    ]
+
+
+class ConversationMemory:
+    """
+    한 사용자의 누적 대화 요약과, 그 요약에 포함된 턴 수(covered)를 보관합니다.
+    채팅 기록 자체는 저장소(UserDataStore)에서 필요한 부분만 읽습니다.
+    요약은 저장소 백엔드에도 저장하므로 서버가 다시 시작되거나 레지스트리에서 제거되어도 이어서 사용합니다.
+    """
+
+    def __init__(self):
+        self.summary = ""
+        self.covered = 0 # 가장 오래된 기록부터 요약에 포함된 턴 수
+        self._generation = 0 # reset() 마다 증가 (진행 중이던 요약 결과를 버리기 위해)
+        self._loaded = False # 저장된 요약을 불러왔는지
+        self._fold_scheduled = False # 요약 작업을 제출했고 아직 끝나지 않았는지
+        self._lock = threading.Lock()
+        self._fold_lock = threading.Lock()
+
+    def _restore(self, store):
+        """
+        처음 사용할 때 저장된 요약을 불러옵니다.
+        요약한 마지막 턴이 지금 기록의 같은 위치에 없으면 (그 사이 기록이 초기화된 경우) 버립니다.
+        """
+        if self._loaded:
+            return
+        data = store.backend.load_conversation_summary(store.username) or {}
+        covered = data.get("covered") or 0
+        if covered:
+            total = store.chat_count()
+            last = store.chat_page(total - covered, 1) if covered <= total else []
+            if not last or _turn_key(last[0]) != data.get("last_key"):
+                covered = 0
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if covered:
+                self.summary, self.covered = data.get("summary", ""), covered
+
+    def reset(self, store=None):
+        """채팅 기록이 초기화되었을 때 요약을 버립니다. store 를 넘기면 저장된 요약도 지웁니다."""
+        with self._lock:
+            self.summary = ""
+            self.covered = 0
+            self._loaded = True
+            self._generation += 1
+        if store is not None:
+            store.backend.save_conversation_summary(store.username, {"summary": "", "covered": 0, "last_key": None})
+
+    def _sync(self, total):
+        """다른 세션에서 기록이 초기화되어 기록 수가 요약한 턴 수보다 적어졌으면 요약을 버립니다."""
+        if total < self.covered:
+            self.reset()
+
+    def context(self, store, token_budget=HISTORY_TOKENS):
+        """
+        (누적 요약, 그대로 보낼 최근 턴 목록) 을 반환합니다.
+        최근 턴은 요약되지 않은 것 중 최신부터 token_budget 안에 들어가는 만큼, 오래된 것부터 순서대로 담습니다.
+        """
+        self._restore(store)
+        total = store.chat_count()
+        with self._lock:
+            self._sync(total)
+            summary, covered = self.summary, self.covered
+        unsummarized = total - covered
+        if unsummarized <= 0:
+            return summary, []
+
+        recent = store.chat_page(0, min(unsummarized, MAX_HISTORY_TURNS))
+        turns = []
+        used = 0
+        for turn in reversed(recent):
+            tokens = turn_tokens(turn)
+            if used + tokens > token_budget:
+                break
+            turns.append(turn)
+            used += tokens
+        turns.reverse()
+        return summary, turns
+
+    def needs_fold(self, store):
+        """요약되지 않은 턴이 MAX_HISTORY_TURNS 이상 쌓였는지 확인합니다."""
+        self._restore(store)
+        total = store.chat_count()
+        with self._lock:
+            self._sync(total)
+            return total - self.covered >= MAX_HISTORY_TURNS
+
+    def schedule_fold(self, store):
+        """
+        요약이 필요하고 아직 제출된 요약 작업이 없으면 True 를 반환하고 제출된 것으로 표시합니다.
+        요약이 끝나 covered 가 갱신되기 전까지 답변마다 같은 작업이 쌓이지 않도록 합니다. (fold() 가 끝나면 해제)
+        """
+        if not self.needs_fold(store):
+            return False
+        with self._lock:
+            if self._fold_scheduled:
+                return False
+            self._fold_scheduled = True
+            return True
+
+    def fold(self, store, complete):
+        """
+        최근 KEEP_TURNS 턴을 제외한 요약되지 않은 턴을 누적 요약에 합칩니다.
+        complete(messages, max_tokens) 는 LLM 을 호출해 문자열을 반환하는 함수입니다.
+        같은 사용자의 요약은 한 번에 하나만 진행합니다.
+        """
+        try:
+            return self._fold(store, complete)
+        finally:
+            with self._lock:
+                self._fold_scheduled = False
+
+    def _fold(self, store, complete):
+        self._restore(store)
+        with self._fold_lock:
+            total = store.chat_count()
+            with self._lock:
+                self._sync(total)
+                summary, covered, generation = self.summary, self.covered, self._generation
+            end = total - KEEP_TURNS
+            if end <= covered:
+                return summary
+            start = max(covered, end - MAX_FOLD_TURNS)
+            turns = store.chat_page(total - end, end - start)
+
+            for chunk in split_into_chunks(format_turns(turns), FOLD_CHUNK_TOKENS):
+                summary = complete(build_fold_messages(summary, chunk), SUMMARY_TOKENS)
+
+            with self._lock:
+                committed = generation == self._generation # 요약하는 동안 기록이 초기화되지 않았을 때만 반영
+                if committed:
+                    self.summary = summary
+                    self.covered = end
+            if committed:
+                store.backend.save_conversation_summary(
+                    store.username, {"summary": summary, "covered": end, "last_key": _turn_key(turns[-1])}
+                )
+            return summary
+
+
+_memories = UserRegistry()
+
+
+def get_conversation_memory(store):
+    """
+    프로세스 전체에서 사용자별로 하나씩 공유되는 ConversationMemory 를 반환합니다.
+    오래 사용하지 않아 제거된 경우 다음 사용 때 저장된 누적 요약을 다시 불러옵니다.
+    """
+    return _memories.get((id(store.backend), store.username), ConversationMemory)
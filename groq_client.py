@@ -0,0 +1,146 @@
+import os
+import threading
+
+# --- 공유 Groq 클라이언트 (연결 풀 + 동일 요청 합치기) ---
+# 프로세스 전체에서 하나의 HTTP 연결 풀(keep-alive)을 재사용하여 요청마다 새 연결을 맺지 않습니다.
+# 여러 세션이 동시에 같은 요청을 보내면 실제 API 호출은 한 번만 하고 결과를 함께 사용합니다. (single-flight)
+MAX_CONNECTIONS = int(os.environ.get("GROQ_MAX_CONNECTIONS", 20)) # 동시에 열 수 있는 최대 연결 수
+MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("GROQ_MAX_KEEPALIVE", 10)) # 재사용을 위해 열어 둘 연결 수
+KEEPALIVE_EXPIRY = float(os.environ.get("GROQ_KEEPALIVE_EXPIRY", 30.0)) # 쉬고 있는 연결을 닫기까지의 시간(초)
+CONNECT_TIMEOUT = float(os.environ.get("GROQ_CONNECT_TIMEOUT", 5.0))
+READ_TIMEOUT = float(os.environ.get("GROQ_TIMEOUT", 60.0)) # 응답(스트림 조각) 사이의 최대 대기 시간(초)
+MAX_RETRIES = int(os.environ.get("GROQ_MAX_RETRIES", 2))
+
+
+def create_client(api_key, base_url=None):
+    """
+    연결 수 제한과 타임아웃이 설정된 공유 httpx 연결 풀을 사용하는 Groq 클라이언트를 만듭니다.
+    groq/httpx 는 import 비용이 크므로 클라이언트를 처음 만들 때 불러옵니다. (SingleFlight 만 쓰는 경우에는 불필요)
+    """
+    import httpx
+    from groq import Groq
+
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+    return Groq(
+        api_key=api_key,
+        base_url=base_url or os.environ.get("GROQ_BASE_URL") or None,
+        max_retries=MAX_RETRIES,
+        http_client=http_client,
+    )
+
+
+class _Call:
+    """진행 중인 요청 하나의 결과를 기다리는 세션들이 공유하는 상태입니다."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.parts = [] # 스트리밍 요청에서 지금까지 받은 텍스트 조각
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 key 의 요청이 이미 진행 중이면 새로 호출하지 않고 그 결과를 함께 받습니다.
+    key 는 요청 내용 전체로 계산한 응답 캐시 키를 사용합니다.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0 # 실제로 보낸 요청 수
+        self.coalesced = 0 # 진행 중인 요청에 합쳐진 요청 수
+
+    def _join(self, key):
+        """(call, 새로 시작해야 하는지) 를 반환합니다."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            self.leaders += 1
+            return call, True
+
+    def _finish(self, key, call, result=None, error=None):
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        with call.condition:
+            call.result = result
+            call.error = error
+            call.done = True
+            call.condition.notify_all()
+
+    def do(self, key, fn):
+        """fn() 의 결과를 반환합니다. 같은 key 의 호출이 진행 중이면 그 결과(또는 예외)를 기다려 반환합니다."""
+        call, leader = self._join(key)
+        if leader:
+            try:
+                result = fn()
+            except BaseException as e:
+                self._finish(key, call, error=e)
+                raise
+            self._finish(key, call, result=result)
+            return result
+        with call.condition:
+            while not call.done:
+                call.condition.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stream(self, key, open_stream, on_complete=None):
+        """
+        open_stream() 이 반환하는 텍스트 조각들을 yield 합니다.
+        같은 key 의 스트림이 진행 중이면 처음부터 받은 조각을 함께 읽습니다.
+        업스트림은 별도 스레드가 끝까지 읽으므로, 먼저 시작한 세션이 중간에 떠나도 다른 세션의 스트림은 이어집니다.
+        끝까지 받은 경우 on_complete(전체 텍스트) 를 한 번 호출합니다.
+        """
+        call, leader = self._join(key)
+        if leader:
+            threading.Thread(
+                target=self._pump, args=(key, call, open_stream, on_complete), name="groq-stream", daemon=True
+            ).start()
+
+        position = 0
+        while True:
+            with call.condition:
+                while position >= len(call.parts) and not call.done:
+                    call.condition.wait()
+                new_parts = call.parts[position:]
+                position = len(call.parts)
+                finished = call.done
+                error = call.error
+            yield from new_parts
+            if finished and position >= len(call.parts):
+                if error is not None:
+                    raise error
+                return
+
+    def _pump(self, key, call, open_stream, on_complete):
+        """업스트림 스트림을 끝까지 읽어 기다리는 세션들에게 나누어 줍니다."""
+        try:
+            for part in open_stream():
+                with call.condition:
+                    call.parts.append(part)
+                    call.condition.notify_all()
+            text = "".join(call.parts)
+            if on_complete is not None:
+                on_complete(text)
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            return
+        self._finish(key, call, result=text)
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "leaders": self.leaders, "coalesced": self.coalesced}
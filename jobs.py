@@ -0,0 +1,269 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from atomic_file import write_atomic
+from metrics import incr, observe
+
+# --- 백그라운드 작업 실행기 ---
+# 오래 걸리는 AI 작업(문서 요약, 일정 분석)을 서버 전체가 공유하는 스레드 풀에서 실행합니다.
+# 세션에는 작업 id 만 보관하므로 재실행되거나 다른 탭으로 이동해도 작업이 계속 진행됩니다.
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_RESULT_DIR = ".jobs"
+RESULT_TTL_SECONDS = 60 * 60 # 끝난 작업을 보관하는 시간 (1시간)
+FILE_PRUNE_INTERVAL = 10 * 60 # 보관 시간이 지난 결과 파일을 정리하는 최소 간격(초)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """작업이 취소되었을 때 작업 함수 안에서 발생시켜 실행을 중단합니다."""
+
+
+class Job:
+    """
+    백그라운드 작업 하나의 상태입니다.
+    작업 함수는 첫 번째 인자로 Job 을 받아 report()/append_partial() 로 진행 상황을 알리고,
+    check_cancelled() 로 취소 요청을 확인합니다.
+    """
+
+    def __init__(self, job_id, kind, owner=None, persist=False):
+        self.id = job_id
+        self.kind = kind
+        self.owner = owner
+        self.persist = persist # 결과를 디스크에도 저장할지 (JSON 으로 변환 가능한 결과만)
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.partial = "" # 스트리밍 중인 응답 텍스트
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    # --- 작업 함수에서 사용 ---
+    def report(self, progress=None, message=None):
+        """진행률(0~1)과 현재 단계 메시지를 갱신합니다."""
+        with self._lock:
+            if progress is not None:
+                self.progress = min(1.0, max(0.0, float(progress)))
+            if message is not None:
+                self.message = message
+
+    def append_partial(self, text):
+        """스트리밍으로 받은 응답 조각을 덧붙입니다."""
+        with self._lock:
+            self.partial += text
+
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """취소가 요청되었으면 JobCancelled 를 발생시킵니다."""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    # --- 조회 ---
+    @property
+    def finished_state(self):
+        return self.status in FINISHED_STATES
+
+    def snapshot(self):
+        """현재 상태를 dict 로 반환합니다. (result 제외)"""
+        with self._lock:
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "owner": self.owner,
+                "status": self.status,
+                "progress": self.progress,
+                "message": self.message,
+                "partial": self.partial,
+                "error": self.error,
+                "created": self.created,
+                "finished": self.finished,
+            }
+
+
+class JobManager:
+    """
+    서버 전체가 공유하는 작업 실행기입니다. 작업 제출, 상태 조회, 취소, 결과 보관을 담당합니다.
+    persist=True 로 제출한 작업의 결과는 result_dir 에 JSON 으로 저장되어 서버가 다시 시작되어도 조회할 수 있습니다.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, result_dir=DEFAULT_RESULT_DIR, result_ttl=RESULT_TTL_SECONDS):
+        self.result_dir = result_dir
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._last_file_prune = time.monotonic()
+        self._prune_files() # 이전 실행에서 남은 만료된 결과 파일 정리
+
+    # --- 제출 / 취소 ---
+    def submit(self, kind, fn, *args, owner=None, persist=False, **kwargs):
+        """fn(job, *args, **kwargs) 를 백그라운드에서 실행하고 작업 id 를 반환합니다."""
+        job = Job(uuid.uuid4().hex, kind, owner=owner, persist=persist)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            prune_files = time.monotonic() - self._last_file_prune >= FILE_PRUNE_INTERVAL
+            if prune_files:
+                self._last_file_prune = time.monotonic()
+        if prune_files:
+            self._prune_files()
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def cancel(self, job_id):
+        """작업 취소를 요청합니다. 아직 시작하지 않은 작업은 실행되지 않고, 실행 중인 작업은 다음 확인 지점에서 멈춥니다."""
+        job = self.get(job_id)
+        if job is None or job.finished_state:
+            return False
+        job._cancel_event.set()
+        return True
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancelled():
+            self._finish(job, CANCELLED)
+            return
+        job.started = time.time()
+        job.status = RUNNING
+        try:
+            result = fn(job, *args, **kwargs)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            self._finish(job, FAILED, error=f"{type(e).__name__}: {e}")
+        else:
+            if job.cancelled():
+                self._finish(job, CANCELLED)
+            else:
+                self._finish(job, DONE, result=result)
+
+    def _finish(self, job, status, result=None, error=None):
+        with job._lock:
+            job.result = result
+            job.error = error
+            job.finished = time.time()
+            if status == DONE:
+                job.progress = 1.0
+            job.status = status
+        # 대기 시간과 실행 시간을 작업 종류별로 기록합니다. (취소는 오류로 세지 않음)
+        if job.started is not None:
+            observe("job.queue", job.started - job.created, kind=job.kind)
+            observe("job.run", job.finished - job.started, status != FAILED, kind=job.kind)
+        incr("jobs", kind=job.kind, status=status)
+        if job.persist and status == DONE:
+            self._save(job)
+
+    # --- 조회 ---
+    def get(self, job_id):
+        """작업을 반환합니다. 메모리에 없으면 디스크에 저장된 결과를 찾고, 그래도 없으면 None 을 반환합니다."""
+        if not job_id:
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            job = self._load(job_id)
+        return job
+
+    def list_jobs(self, owner=None):
+        """owner 의 작업 목록을 최근 것부터 반환합니다. (owner 가 없으면 전체)"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if owner is None or job.owner == owner]
+        return sorted(jobs, key=lambda job: job.created, reverse=True)
+
+    def _prune(self):
+        """보관 시간이 지난 끝난 작업을 메모리에서 제거합니다. (_lock 을 잡은 상태에서 호출)"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished is not None and now - job.finished > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    # --- 결과 저장 ---
+    def _path(self, job_id):
+        return os.path.join(self.result_dir, f"{job_id}.json")
+
+    def _prune_files(self):
+        """
+        보관 시간이 지난 결과 파일(과 중단되어 남은 임시 파일)을 삭제합니다.
+        결과 파일은 작업이 끝날 때 쓰므로 수정 시각을 종료 시각으로 봅니다.
+        """
+        cutoff = time.time() - self.result_ttl
+        try:
+            entries = list(os.scandir(self.result_dir))
+        except OSError:
+            return
+        for entry in entries:
+            if not entry.name.endswith((".json", ".tmp")):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _save(self, job):
+        """끝난 작업의 결과를 원자적으로 디스크에 저장합니다. 저장에 실패해도 작업 결과는 메모리에 남아 있습니다."""
+        entry = {
+            "id": job.id,
+            "kind": job.kind,
+            "owner": job.owner,
+            "created": job.created,
+            "finished": job.finished,
+            "result": job.result,
+        }
+        try:
+            os.makedirs(self.result_dir, exist_ok=True)
+            write_atomic(self._path(job.id), json.dumps(entry, ensure_ascii=False))
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def _load(self, job_id):
+        """디스크에 저장된 결과로 끝난 작업을 복원합니다. 보관 시간이 지났으면 삭제하고 None 을 반환합니다."""
+        if not all(c in "0123456789abcdef" for c in job_id):
+            return None # 작업 id 가 아닌 값으로 임의의 경로에 접근하지 않도록 합니다.
+        path = self._path(job_id)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("finished", 0) > self.result_ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        job = Job(entry["id"], entry["kind"], owner=entry.get("owner"), persist=True)
+        job.status = DONE
+        job.progress = 1.0
+        job.result = entry.get("result")
+        job.created = entry.get("created", job.created)
+        job.finished = entry.get("finished")
+        with self._lock:
+            self._jobs.setdefault(job.id, job)
+        return job
+
+    def shutdown(self, wait=False):
+        """실행 중인 작업에 취소를 요청하고 스레드 풀을 종료합니다."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job._cancel_event.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
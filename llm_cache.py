@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from atomic_file import write_atomic
+
+# --- LLM 응답 캐시 (메모리 LRU + 디스크 TTL) ---
+DEFAULT_CACHE_DIR = ".llm_cache"
+DEFAULT_MEMORY_ITEMS = 256
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60 # 7일
+DEFAULT_MAX_DISK_BYTES = 50 * 1024 * 1024 # 50MB
+
+
+def make_cache_key(model, system_msg, user_msg, temperature, max_tokens):
+    """(모델, 최종 시스템 메시지, 사용자 메시지, temperature, max_tokens)로 캐시 키(SHA256)를 만듭니다."""
+    payload = json.dumps(
+        [model, system_msg, user_msg, float(temperature), int(max_tokens)],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    LLM 응답을 저장하는 2단계 캐시입니다.
+    1단계는 프로세스 메모리의 LRU, 2단계는 TTL과 용량 제한이 있는 디스크 캐시입니다.
+    여러 Streamlit 세션(스레드)에서 동시에 사용할 수 있습니다.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_memory_items=DEFAULT_MEMORY_ITEMS,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, max_disk_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict() # key -> (created, value)
+        self._lock = threading.Lock() # 메모리 LRU, 카운터, _disk_bytes 만 보호합니다. (디스크 I/O 는 잠금 밖에서 수행)
+        self._disk_lock = threading.Lock() # 디스크 스캔/정리는 한 스레드만 수행
+        self._disk_bytes = None # 처음 필요할 때 디렉터리를 스캔하여 계산
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+    # --- 내부 함수들 ---
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _expired(self, created):
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def _remember(self, key, created, value):
+        """메모리 LRU에 항목을 넣고, 용량을 넘으면 가장 오래 사용되지 않은 항목을 제거합니다."""
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry.get("created", 0)):
+            self._remove_disk(path)
+            return None
+        return entry
+
+    def _remove_disk(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+
+    def _scan_disk(self):
+        """디스크 캐시 파일 목록을 (mtime, size, path)로 반환합니다."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for bucket in os.scandir(self.cache_dir):
+            if not bucket.is_dir():
+                continue
+            for entry in os.scandir(bucket.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _over_disk_limit(self, target):
+        with self._lock:
+            return self._disk_bytes is None or self._disk_bytes > target
+
+    def _enforce_disk_limit(self):
+        """
+        디스크 캐시가 용량 제한을 넘으면 오래된 항목부터 지웁니다.
+        디렉터리 스캔은 잠금 밖에서 하고, 다른 스레드가 이미 정리 중이면 기다리지 않고 돌아갑니다.
+        """
+        if not self._over_disk_limit(self.max_disk_bytes):
+            return
+        if not self._disk_lock.acquire(blocking=False):
+            return
+        try:
+            entries = self._scan_disk()
+            with self._lock:
+                if self._disk_bytes is None: # 처음 필요할 때 디렉터리를 스캔하여 계산
+                    self._disk_bytes = sum(size for _, size, _ in entries)
+            # 제한의 90%까지 줄여서 매번 스캔하지 않도록 합니다.
+            target = int(self.max_disk_bytes * 0.9)
+            if not self._over_disk_limit(self.max_disk_bytes):
+                return
+            for mtime, size, path in sorted(entries):
+                if not self._over_disk_limit(target):
+                    break
+                self._remove_disk(path)
+        finally:
+            self._disk_lock.release()
+
+    # --- 공개 API ---
+    def get(self, key):
+        """
+        캐시된 응답을 반환합니다. 없거나 만료되었으면 None 을 반환합니다.
+        디스크는 잠금 밖에서 읽으므로, 한 세션의 디스크 조회가 다른 세션의 메모리 조회를 막지 않습니다.
+        """
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None and not self._expired(item[0]):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return item[1]
+            if item is not None:
+                del self._memory[key]
+
+        entry = self._read_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            item = self._memory.get(key)
+            if item is None or item[0] < entry["created"]: # 읽는 사이 set() 으로 더 새 값이 들어왔으면 그 값을 유지
+                item = (entry["created"], entry["response"])
+                self._remember(key, *item)
+            self.hits += 1
+            self.disk_hits += 1
+            return item[1]
+
+    def set(self, key, value):
+        """응답을 메모리와 디스크에 저장합니다."""
+        created = time.time()
+        data = json.dumps({"created": created, "response": value}, ensure_ascii=False)
+        path = self._path(key)
+        with self._lock:
+            self._remember(key, created, value)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            write_atomic(path, data) # 쓰기 도중 중단되어도 캐시 파일이 깨지지 않도록 원자적으로 교체
+        except OSError:
+            return # 디스크 캐시는 최선의 노력(best effort)으로만 사용
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += len(data.encode("utf-8")) - old_size
+        self._enforce_disk_limit()
+
+    def clear(self):
+        """메모리와 디스크의 모든 캐시 항목을 삭제합니다."""
+        with self._lock:
+            self._memory.clear()
+        with self._disk_lock:
+            for _, _, path in self._scan_disk():
+                self._remove_disk(path)
+            with self._lock:
+                self._disk_bytes = 0
+
+    def stats(self):
+        """히트/미스 카운터와 현재 캐시 크기를 딕셔너리로 반환합니다."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / total if total else 0.0,
+                "memory_items": len(self._memory),
+                "disk_bytes": self._disk_bytes,
+            }
@@ -1,108 +1,114 @@
 import streamlit as st
-from PyPDF2 import PdfReader
-from groq import Groq
-import json
 import os
+import io
 import hashlib
-from datetime import datetime, date, time
-import pandas as pd
-
-# 🔽 Groq API 키 로드
-GROQ_API_KEY = st.secrets["GROQ_API_KEY"] # Streamlit Secrets에서 API 키 로드
-
-client = Groq(api_key=GROQ_API_KEY)
-
-USER_DATA_PATH = "users.json" # 사용자 계정 정보 저장 경로
+import json
+import time
+from datetime import datetime, date, timedelta
+from llm_cache import ResponseCache, make_cache_key
+from summarizer import DEFAULT_CONCURRENCY, DEFAULT_REQUESTS_PER_MINUTE, RateLimiter, condense_pages
+from user_store import get_user_store
+from storage import create_backend
+from schedule_index import CONTEXT_TOKENS, ScheduleIndex
+from jobs import CANCELLED, DONE, FAILED, JobManager
+from groq_client import SingleFlight, create_client
+from model_router import TASK_CHAT, TASK_SCHEDULE, TASK_SUMMARY, ModelRouter
+from conversation import HISTORY_TOKENS, get_conversation_memory
+from chat_search import get_chat_search, make_snippet
+from metrics import get_metrics, incr, observe, span
+from schedule_analysis import (
+    RESPONSE_FORMAT, build_analysis_prompt, new_recommendations, parse_analysis, schedule_fingerprint
+)
+# 무거운 모듈(PyPDF2: pdf_extract, numpy/scipy: retrieval, pandas: schedule_table)과 Groq 클라이언트는
+# 처음 필요한 함수 안에서 불러옵니다. 로그인 화면만 그리는 재실행과 새 프로세스의 첫 화면이 빨라집니다.
 
 # --- 비밀번호 해시 함수 ---
 def hash_password(password):
     """비밀번호를 SHA256으로 해시합니다."""
     return hashlib.sha256(password.encode()).hexdigest()
 
-# --- 사용자 DB 함수 ---
-def load_users():
-    """사용자 계정 정보를 로드합니다."""
-    if os.path.exists(USER_DATA_PATH):
-        with open(USER_DATA_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
-def save_users(users):
-    """사용자 계정 정보를 저장합니다."""
-    with open(USER_DATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(users, f, ensure_ascii=False)
+# --- 저장소 백엔드 ---
+@st.cache_resource
+def get_backend():
+    """
+    모든 세션이 공유하는 저장소 백엔드를 반환합니다.
+    STORAGE_BACKEND 환경 변수로 선택합니다. (json: 기존 JSON 파일, sqlite: SQLITE_PATH 의 데이터베이스)
+    """
+    return create_backend()
 
 # --- 회원가입 ---
 def signup(username, password):
     """새로운 사용자를 등록합니다."""
-    users = load_users()
-    if username in users:
+    if not get_backend().create_user(username, hash_password(password)):
         return False, "이미 존재하는 사용자입니다."
-    users[username] = hash_password(password)
-    save_users(users)
     return True, "회원가입 성공! 로그인 해주세요."
 
 # --- 로그인 ---
 def login(username, password):
     """사용자 로그인을 처리합니다."""
-    users = load_users()
-    if username not in users:
+    password_hash = get_backend().get_password_hash(username)
+    if password_hash is None:
         return False, "존재하지 않는 사용자입니다."
-    if users[username] != hash_password(password):
+    if password_hash != hash_password(password):
         return False, "비밀번호가 틀렸습니다."
     return True, "로그인 성공!"
 
 # --- 유틸 함수들 ---
-def extract_text_from_pdf(file):
-    """PDF 파일에서 텍스트를 추출합니다."""
-    reader = PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
-
-# --- 사용자별 파일 경로 생성 함수 ---
-def get_chat_save_path(username):
-    """사용자별 채팅 기록 파일 경로를 반환합니다."""
-    return f"chat_history_{username}.json"
-
-def get_schedule_save_path(username):
-    """사용자별 일정 파일 경로를 반환합니다."""
-    return f"schedules_{username}.json"
-
-def get_persona_save_path(username):
-    """사용자별 AI 페르소나 설정 파일 경로를 반환합니다."""
-    return f"ai_persona_{username}.json"
-
-# --- JSON 저장/로드 함수 (리스트, 딕셔너리 모두 사용 가능) ---
-def save_json(path, data):
-    """JSON 데이터를 지정된 경로에 저장합니다."""
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False)
-
-def load_json(path):
-    """JSON 리스트 데이터를 지정된 경로에서 로드합니다. 파일이 없으면 빈 리스트를 반환합니다."""
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-def load_json_dict(path):
-    """JSON 딕셔너리 데이터를 지정된 경로에서 로드합니다. 파일이 없으면 빈 딕셔너리를 반환합니다."""
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
-# --- Groq API 호출 함수 (AI 페르소나 설정 반영) ---
-def call_groq_api(user_msg, doc_summary="", max_tokens=512):
+def iter_pdf_text(file, max_pages=None, should_stop=None):
     """
-    Groq API를 호출하여 AI 응답을 받습니다.
-    사용자별 AI 페르소나 설정을 system_msg에 반영합니다.
+    PDF 파일의 페이지 텍스트를 추출되는 대로 페이지 순서대로 yield 합니다.
+    페이지가 많은 문서는 pdf_extract 엔진이 프로세스 풀에서 병렬로 추출합니다.
+    max_pages 를 지정하면 앞쪽 페이지까지만 추출하고, should_stop() 이 True 가 되면 중단합니다.
+    """
+    from pdf_extract import iter_pdf_pages # PyPDF2 는 PDF 를 처음 추출할 때 불러옵니다.
+
+    return iter_pdf_pages(file, max_pages=max_pages, should_stop=should_stop)
+
+# --- 업로드 문서 메모이제이션 (내용 해시 기반) ---
+MAX_CACHED_DOCUMENTS = 5 # 세션당 보관할 문서 수
+
+def get_document_hash(file_bytes):
+    """업로드된 파일 내용의 SHA256 해시를 반환합니다."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+def get_cached_document(doc_hash):
+    """현재 사용자의 세션에 저장된 문서 정보(텍스트, 요약)를 반환합니다. 없으면 None 을 반환합니다."""
+    return st.session_state.doc_cache.get(doc_hash)
+
+def cache_document(doc_hash, text, summary, index):
+    """문서의 추출 텍스트, 요약, 검색 인덱스를 현재 사용자의 세션에 저장합니다. 오래된 문서부터 제거합니다."""
+    doc_cache = st.session_state.doc_cache
+    doc_cache.pop(doc_hash, None)
+    doc_cache[doc_hash] = {"text": text, "summary": summary, "index": index}
+    while len(doc_cache) > MAX_CACHED_DOCUMENTS:
+        doc_cache.pop(next(iter(doc_cache)))
+
+def retrieve_passages(question, top_k=4):
+    """현재 문서에서 질문과 관련된 구간(passage)을 최대 top_k 개 반환합니다. 문서가 없으면 빈 리스트를 반환합니다."""
+    cached_doc = get_cached_document(st.session_state.get("doc_hash", ""))
+    if cached_doc is None:
+        return []
+    return [passage for _, passage in cached_doc["index"].search(question, top_k=top_k)]
+
+# --- 사용자 데이터 저장소 ---
+def get_store(username):
+    """사용자의 데이터 저장소(채팅 기록, 일정, 페르소나)를 반환합니다. 세션과 재실행 사이에 공유됩니다."""
+    return get_user_store(username, get_backend())
+
+def load_user_data_into_session(username):
     """
-    current_username = st.session_state.username
-    persona_settings = load_json_dict(get_persona_save_path(current_username)) # 사용자별 페르소나 로드
+    저장소의 사용자 데이터를 세션 상태에 연결합니다. 파일이 바뀌지 않았다면 다시 파싱하지 않습니다.
+    채팅 기록은 화면에 표시할 페이지만 필요할 때 저장소에서 읽습니다. (render_chat_history 참고)
+    """
+    store = get_store(username)
+    st.session_state.schedules = store.schedules
+    st.session_state.ai_persona_settings = store.persona
+
+# --- Groq API 호출 함수 (AI 페르소나 설정 반영) ---
+# 사용할 모델은 작업 종류(대화, 요약, 일정 분석)에 따라 model_router 가 고릅니다.
 
+def build_system_message(persona_settings, doc_summary="", context_passages=None, conversation_summary=""):
+    """AI 페르소나 설정, 문서 요약, 검색된 문서 구간, 이전 대화 요약을 반영한 시스템 메시지를 생성합니다."""
     # 기본 시스템 메시지
     system_msg_parts = ["당신은 사용자의 개인 비서입니다. 모든 답변은 한국어로 해주세요."]
 
@@ -119,46 +125,401 @@ def call_groq_api(user_msg, doc_summary="", max_tokens=512):
     if doc_summary:
         system_msg_parts.append(f"제공된 문서 요약을 참고하여 답변해주세요. 문서 요약: {doc_summary}")
 
-    final_system_msg = " ".join(system_msg_parts)
+    # 질문과 관련된 문서 구간이 있다면 근거로 사용하도록 추가
+    if context_passages:
+        passages_text = "\n".join(f"[{i}] {p}" for i, p in enumerate(context_passages, start=1))
+        system_msg_parts.append(f"다음은 질문과 관련된 문서 발췌입니다. 이 내용을 근거로 답변해주세요.\n{passages_text}")
+
+    # 최근 대화 이전의 대화는 요약으로만 전달
+    if conversation_summary:
+        system_msg_parts.append(f"지금까지의 이전 대화 요약: {conversation_summary}")
+
+    return " ".join(system_msg_parts)
+
+def build_chat_request(user_msg, doc_summary="", persona_settings=None, context_passages=None,
+                       history=None, conversation_summary=""):
+    """
+    현재 사용자의 페르소나 설정을 반영하여 (messages, temperature)를 만듭니다.
+    call_groq_api / call_groq_api_stream 이 공통으로 사용합니다.
+    persona_settings 를 직접 넘기면 세션 상태에 접근하지 않으므로 작업 스레드에서도 사용할 수 있습니다.
+    history 로 최근 대화 턴({"질문", "답변"})을 넘기면 현재 질문 앞에 user/assistant 메시지로 넣습니다.
+    """
+    if persona_settings is None:
+        current_username = st.session_state.username
+        persona_settings = get_store(current_username).persona # 사용자별 페르소나 (메모리 저장소)
+
+    final_system_msg = build_system_message(persona_settings, doc_summary, context_passages, conversation_summary)
     
-    messages = [
-        {"role": "system", "content": final_system_msg},
-        {"role": "user", "content": user_msg},
-    ]
+    messages = [{"role": "system", "content": final_system_msg}]
+    for turn in history or []:
+        messages.append({"role": "user", "content": turn["질문"]})
+        messages.append({"role": "assistant", "content": turn["답변"]})
+    messages.append({"role": "user", "content": user_msg})
     
     # temperature 값은 persona_settings에서 가져오거나 기본값 사용
     temp = persona_settings.get("temperature", 0.5)
+    return messages, temp
+
+@st.cache_resource
+def get_groq_client():
+    """
+    모든 세션이 공유하는 Groq 클라이언트를 반환합니다.
+    재실행마다 새 클라이언트를 만들지 않으므로 연결 풀(keep-alive)이 유지됩니다.
+    """
+    # 🔽 Groq API 키 로드
+    return create_client(st.secrets["GROQ_API_KEY"]) # Streamlit Secrets에서 API 키 로드
+
+def record_token_usage(usage, model, task):
+    """응답의 토큰 사용량(usage)을 모델/작업별 카운터에 더합니다."""
+    if usage is None:
+        return
+    incr("groq.prompt_tokens", usage.prompt_tokens or 0, model=model, task=task)
+    incr("groq.completion_tokens", usage.completion_tokens or 0, model=model, task=task)
+
+@st.cache_resource
+def get_model_router():
+    """모든 세션이 공유하는 모델 라우터를 반환합니다. (모델별 응답 시간/오류율 기록 유지)"""
+    return ModelRouter()
+
+@st.cache_resource
+def get_single_flight():
+    """세션 사이에서 동일한 진행 중 요청을 합치는 SingleFlight 를 반환합니다."""
+    return SingleFlight()
+
+@st.cache_resource
+def get_response_cache():
+    """모든 세션이 공유하는 LLM 응답 캐시를 반환합니다. (재실행 사이에도 유지)"""
+    return ResponseCache()
+
+def get_request_cache_key(messages, temp, max_tokens, task=TASK_CHAT):
+    """
+    요청 메시지로부터 응답 캐시 키를 계산합니다. 이전 대화가 포함된 요청은 대화 전체를 키에 반영합니다.
+    실제 응답한 모델(대체 모델 포함)과 관계없이 작업의 기본 모델로 키를 만듭니다.
+    """
+    if len(messages) > 2:
+        user_part = json.dumps(messages[1:], ensure_ascii=False, separators=(",", ":"))
+    else:
+        user_part = messages[-1]["content"]
+    return make_cache_key(get_model_router().primary_model(task), messages[0]["content"], user_part, temp, max_tokens)
+
+def call_groq_api(user_msg, doc_summary="", max_tokens=512, use_cache=True, context_passages=None,
+                  history=None, conversation_summary="", task=TASK_CHAT):
+    """
+    Groq API를 호출하여 AI 응답을 받습니다.
+    사용자별 AI 페르소나 설정을 system_msg에 반영합니다.
+    같은 요청은 응답 캐시에서 바로 반환하며, use_cache=False 로 캐시를 우회할 수 있습니다.
+    context_passages 로 검색된 문서 구간을 넘기면 시스템 메시지에 근거로 추가합니다.
+    history, conversation_summary 로 최근 대화와 이전 대화 요약을 함께 보낼 수 있습니다.
+    """
+    messages, temp = build_chat_request(
+        user_msg, doc_summary, context_passages=context_passages,
+        history=history, conversation_summary=conversation_summary
+    )
+    return request_completion(messages, temp, max_tokens, get_response_cache(), use_cache=use_cache, task=task)
+
+def request_completion(messages, temp, max_tokens, cache, use_cache=True, client=None, response_format=None,
+                       task=TASK_CHAT):
+    """
+    완성된 messages 로 Groq API 를 호출합니다. (세션 상태에 접근하지 않음)
+    task 에 맞는 모델로 요청하며, 느리면 헤지 요청을, 실패하면 대체 모델로 재요청합니다. (model_router)
+    작업 스레드에서는 client 를 직접 넘깁니다. (없으면 공유 클라이언트 사용)
+    response_format={"type": "json_object"} 를 넘기면 JSON 형식의 응답을 요청합니다.
+    cache 가 주어지면 응답을 캐시에서 찾고, 새 응답을 캐시에 저장합니다.
+    다른 세션이 같은 요청을 보내는 중이면 새로 호출하지 않고 그 응답을 함께 받습니다.
+    """
+    cache_key = get_request_cache_key(messages, temp, max_tokens, task)
+    if cache is not None and use_cache:
+        cached = cache.get(cache_key)
+        incr("llm_cache", result="miss" if cached is None else "hit", task=task)
+        if cached is not None:
+            return cached
+
+    client = client or get_groq_client()
+    router = get_model_router()
+    extra = {"response_format": response_format} if response_format else {}
+
+    def create(model):
+        with span("groq.completion", model=model, task=task):
+            completion = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temp,
+                max_completion_tokens=max_tokens,
+                top_p=1,
+                stream=False,
+                **extra
+            )
+        record_token_usage(completion.usage, model, task)
+        return completion.choices[0].message.content
+
+    def fetch():
+        _, answer = router.complete(task, max_tokens, create)
+        if cache is not None:
+            cache.set(cache_key, answer)
+        return answer
+
+    if not use_cache:
+        return fetch() # 캐시를 우회하는 요청은 새 응답을 원하는 것이므로 합치지 않습니다.
+    return get_single_flight().do(cache_key, fetch)
+
+def call_groq_api_stream(user_msg, doc_summary="", max_tokens=512, use_cache=True, context_passages=None,
+                         history=None, conversation_summary="", task=TASK_CHAT):
+    """
+    call_groq_api 의 스트리밍 버전입니다.
+    응답 토큰이 도착하는 대로 텍스트 조각을 yield 하므로 st.write_stream 으로 바로 렌더링할 수 있습니다.
+    """
+    messages, temp = build_chat_request(
+        user_msg, doc_summary, context_passages=context_passages,
+        history=history, conversation_summary=conversation_summary
+    )
+    yield from stream_completion(messages, temp, max_tokens, get_response_cache(), use_cache=use_cache, task=task)
+
+def stream_completion(messages, temp, max_tokens, cache, use_cache=True, client=None, task=TASK_CHAT):
+    """
+    완성된 messages 로 Groq API 를 스트리밍 호출합니다. (세션 상태에 접근하지 않음)
+    헤지 요청과 대체 모델 재요청은 첫 응답 조각을 받기 전까지만 적용됩니다.
+    캐시에 있는 응답은 한 번에 yield 하고, 새 응답은 스트림이 끝까지 완료된 경우에만 캐시에 저장합니다.
+    다른 세션이 같은 요청을 스트리밍하는 중이면 그 스트림을 처음부터 함께 받습니다.
+    """
+    cache_key = get_request_cache_key(messages, temp, max_tokens, task)
+    if cache is not None and use_cache:
+        cached = cache.get(cache_key)
+        incr("llm_cache", result="miss" if cached is None else "hit", task=task)
+        if cached is not None:
+            yield cached
+            return
+
+    client = client or get_groq_client()
+    router = get_model_router()
+
+    def open_model_stream(model):
+        # 스트림 전체 시간과 첫 조각까지의 시간을 따로 기록합니다. 토큰 사용량은 마지막 조각(x_groq.usage)에 있습니다.
+        with span("groq.stream", model=model, task=task):
+            start = time.perf_counter()
+            # with 블록으로 응답을 열어 두므로, 헤지에서 진 스트림이나 중간에 버려진 스트림(generator.close())도
+            # HTTP 응답을 닫아 연결을 연결 풀에 돌려줍니다.
+            with client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temp,
+                max_completion_tokens=max_tokens,
+                top_p=1,
+                stream=True
+            ) as stream:
+                first = True
+                for chunk in stream:
+                    record_token_usage(chunk.usage or getattr(chunk.x_groq, "usage", None), model, task)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if first:
+                            observe("groq.first_token", time.perf_counter() - start, model=model, task=task)
+                            first = False
+                        yield delta
+
+    def open_stream():
+        return router.stream(task, max_tokens, open_model_stream)
+
+    def save(text):
+        if cache is not None:
+            cache.set(cache_key, text)
+
+    # 캐시를 우회하는 요청은 합치지 않도록 별도의 키를 사용합니다.
+    flight_key = cache_key if use_cache else f"{cache_key}:{os.urandom(8).hex()}"
+    yield from get_single_flight().stream(flight_key, open_stream, on_complete=save)
+
+# --- 문서 전체 요약 (맵-리듀스) ---
+SUMMARY_CONCURRENCY = int(os.environ.get("SUMMARY_CONCURRENCY", DEFAULT_CONCURRENCY)) # 동시 구간 요약 요청 수
+SUMMARY_REQUESTS_PER_MINUTE = int(os.environ.get("SUMMARY_REQUESTS_PER_MINUTE", DEFAULT_REQUESTS_PER_MINUTE))
+
+@st.cache_resource
+def get_summary_rate_limiter():
+    """
+    모든 문서 요약 작업이 공유하는 요청 간격 제한기를 반환합니다.
+    분당 요청 수는 API 키 기준이므로, 동시에 여러 문서를 요약해도 합계가 SUMMARY_REQUESTS_PER_MINUTE 를 넘지 않습니다.
+    """
+    return RateLimiter(SUMMARY_REQUESTS_PER_MINUTE)
+
+def condense_document_text(pages, persona_settings, cache, client=None, job=None):
+    """
+    문서의 페이지 텍스트를 받는 대로 구간별로 동시에 요약하여 최종 요약 요청에 넣을 컨텍스트로 압축합니다.
+    PDF 추출 스트림을 넘기면 추출이 끝나기 전에 구간 요약이 시작됩니다. 짧은 문서는 API 호출 없이 원문을 그대로 반환합니다.
+    job 을 넘기면 구간 요약 진행률을 알리고, 취소 요청 시 남은 요청을 보내지 않습니다.
+    """
+    def complete(instruction, doc_text, max_tokens):
+        if job is not None:
+            job.check_cancelled()
+        messages, temp = build_chat_request(instruction, doc_text, persona_settings=persona_settings)
+        return request_completion(messages, temp, max_tokens, cache, client=client, task=TASK_SUMMARY)
+
+    def on_progress(done, total):
+        job.report(0.7 * done / max(total, 1), f"문서 전체를 구간별로 요약 중... ({done}/{total})")
+
+    return condense_pages(
+        pages,
+        complete,
+        concurrency=SUMMARY_CONCURRENCY,
+        limiter=get_summary_rate_limiter(),
+        on_progress=on_progress if job is not None else None,
+    )
 
-    completion = client.chat.completions.create(
-        model="llama3-8b-8192",
-        messages=messages,
-        temperature=temp,
-        max_completion_tokens=max_tokens,
-        top_p=1,
-        stream=False
+# --- 백그라운드 작업 (문서 요약, 일정 분석) ---
+# 작업 함수는 작업 스레드에서 실행되므로 세션 상태, secrets 대신 필요한 값(페르소나, 캐시, 클라이언트)을 인자로 받습니다.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4)) # 동시에 실행할 백그라운드 작업 수
+JOB_POLL_SECONDS = 1.0 # 진행 중인 작업의 상태를 다시 확인하는 간격(초)
+
+@st.cache_resource
+def get_job_manager():
+    """모든 세션이 공유하는 백그라운드 작업 실행기를 반환합니다."""
+    return JobManager(max_workers=JOB_WORKERS)
+
+def summarize_document_job(job, file_bytes, persona_settings, cache, client):
+    """PDF 텍스트 추출과 구간별 요약(페이지가 추출되는 대로) -> 최종 요약(스트리밍) -> 검색 인덱스 생성을 수행합니다."""
+    job.report(0.0, "문서 텍스트 추출 중...")
+    pages = []
+
+    def page_stream():
+        # 추출된 페이지를 바로 구간 요약으로 넘기고, 검색 인덱스용 전체 텍스트를 위해 모아 둡니다.
+        for page in iter_pdf_text(io.BytesIO(file_bytes), should_stop=job.cancelled):
+            pages.append(page)
+            yield page
+
+    condensed_text = condense_document_text(page_stream(), persona_settings, cache, client=client, job=job)
+    job.check_cancelled()
+    incr("pdf.pages", len(pages))
+    text = "".join(f"{page}\n" for page in pages)
+
+    job.report(0.7, "최종 요약 생성 중...")
+    messages, temp = build_chat_request(
+        "아래 문서를 간결하게 3~4문장으로 요약해 주세요.", condensed_text, persona_settings=persona_settings
     )
-    return completion.choices[0].message.content
+    for part in stream_completion(messages, temp, 512, cache, client=client, task=TASK_SUMMARY):
+        job.check_cancelled()
+        job.append_partial(part)
+
+    job.report(0.9, "문서 검색 인덱스 생성 중...")
+    from retrieval import build_document_index # numpy/scipy 는 문서 인덱스를 처음 만들 때 불러옵니다.
+
+    return {"text": text, "summary": job.partial, "index": build_document_index(text)}
+
+def schedule_analysis_job(job, user_msg, fingerprint, persona_settings, cache, client):
+    """
+    일정 분석과 추천 일정을 JSON 응답 하나로 요청하고, 결과를 fingerprint 로 캐시에 저장합니다.
+    요청 메시지 자체는 응답 캐시에 넣지 않습니다. (fingerprint 캐시로 충분)
+    """
+    job.report(0.1, "AI가 일정을 분석하고 추천 일정을 만드는 중...")
+    messages, temp = build_chat_request(user_msg, persona_settings=persona_settings)
+    answer = request_completion(
+        messages, temp, SCHEDULE_ANALYSIS_MAX_TOKENS, None, client=client, response_format=RESPONSE_FORMAT,
+        task=TASK_SCHEDULE
+    )
+    job.check_cancelled()
+    result = parse_analysis(answer)
+    cache.set(fingerprint, result)
+    return result
+
+# --- 대화 맥락 (최근 대화 + 누적 요약) ---
+CHAT_HISTORY_TOKENS = int(os.environ.get("CHAT_HISTORY_TOKENS", HISTORY_TOKENS)) # 그대로 보낼 최근 대화의 토큰 예산
+CONVERSATION_SUMMARY_TEMPERATURE = 0.2
+
+def fold_conversation_job(job, store, cache, client):
+    """오래된 대화 턴을 사용자의 누적 대화 요약에 합칩니다."""
+    def complete(messages, max_tokens):
+        job.check_cancelled()
+        return request_completion(
+            messages, CONVERSATION_SUMMARY_TEMPERATURE, max_tokens, cache, client=client, task=TASK_SUMMARY
+        )
+
+    return get_conversation_memory(store).fold(store, complete)
+
+def update_conversation_memory(store):
+    """요약되지 않은 대화가 충분히 쌓였으면 백그라운드에서 누적 요약을 갱신합니다. (답변 지연 없음)"""
+    # 제출한 요약 작업이 끝나기 전에는 다시 제출하지 않습니다. (작업 실행기의 스레드를 차지하지 않도록)
+    if get_conversation_memory(store).schedule_fold(store):
+        get_job_manager().submit(
+            "conversation_summary", fold_conversation_job, store, get_response_cache(), get_groq_client(),
+            owner=store.username
+        )
+
+def start_job(slot, kind, fn, *args, persist=False, **kwargs):
+    """작업을 제출하고 세션의 slot 에 작업 id 를 기록합니다. slot 에서 진행 중이던 작업은 취소합니다."""
+    manager = get_job_manager()
+    previous = st.session_state.jobs.get(slot)
+    if previous:
+        manager.cancel(previous)
+    st.session_state.jobs[slot] = manager.submit(
+        kind, fn, *args, owner=st.session_state.username, persist=persist, **kwargs
+    )
+
+def get_session_job(slot):
+    """세션의 slot 에 기록된 작업을 반환합니다. 작업을 찾을 수 없으면 slot 을 비우고 None 을 반환합니다."""
+    job = get_job_manager().get(st.session_state.jobs.get(slot))
+    if job is None:
+        st.session_state.jobs.pop(slot, None)
+    return job
+
+def cancel_session_jobs():
+    """현재 세션이 시작한 작업을 모두 취소합니다. (로그아웃 시)"""
+    manager = get_job_manager()
+    for job_id in st.session_state.get("jobs", {}).values():
+        manager.cancel(job_id)
+    st.session_state.jobs = {}
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_job_progress(job_id):
+    """
+    진행 중인 작업의 진행률과 중간 결과를 주기적으로 갱신하여 표시합니다.
+    이 부분만 다시 실행되므로 다른 화면 요소는 그대로 사용할 수 있고, 작업이 끝나면 앱 전체를 다시 실행합니다.
+    """
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None or job.finished_state:
+        st.rerun()
+    state = job.snapshot()
+    st.progress(state["progress"], text=state["message"] or "작업 대기 중...")
+    if state["partial"]:
+        st.markdown(state["partial"])
+    if st.button("작업 취소", key=f"cancel_{job_id}"):
+        manager.cancel(job_id)
+        st.rerun()
+
+def render_job_outcome(job):
+    """끝나지 않은 작업은 진행 상황을, 실패하거나 취소된 작업은 안내 메시지를 표시합니다. 완료 여부를 반환합니다."""
+    if job.status == DONE:
+        return True
+    if job.status == FAILED:
+        st.error(f"작업 중 오류가 발생했습니다: {job.error}")
+    elif job.status == CANCELLED:
+        st.info("작업이 취소되었습니다.")
+    else:
+        render_job_progress(job.id)
+    return False
 
 # --- 세션 상태 초기화 (로그인 상태에 따라 데이터 로드) ---
 if "login_status" not in st.session_state:
     st.session_state.login_status = False
     st.session_state.username = ""
-    st.session_state.chat_history = []
     st.session_state.doc_summary = ""
     st.session_state.schedules = []
     st.session_state.ai_persona_settings = {} # AI 페르소나 설정 초기화
+    st.session_state.doc_cache = {} # 문서 해시 -> {"text", "summary"}
+    st.session_state.jobs = {} # 화면 위치(slot) -> 백그라운드 작업 id
 
 else:
     # 로그인 상태가 있다면 해당 사용자의 데이터를 로드
     if st.session_state.login_status and st.session_state.username:
-        st.session_state.chat_history = load_json(get_chat_save_path(st.session_state.username))
-        st.session_state.schedules = load_json(get_schedule_save_path(st.session_state.username))
-        st.session_state.ai_persona_settings = load_json_dict(get_persona_save_path(st.session_state.username))
+        load_user_data_into_session(st.session_state.username)
+        if "doc_cache" not in st.session_state:
+            st.session_state.doc_cache = {}
+        if "jobs" not in st.session_state:
+            st.session_state.jobs = {}
     else: # 로그인되지 않은 상태 (혹시 모를 경우를 대비하여 세션 상태 초기화)
-        st.session_state.chat_history = []
         st.session_state.doc_summary = ""
         st.session_state.schedules = []
         st.session_state.ai_persona_settings = {}
+        st.session_state.doc_cache = {}
+        st.session_state.jobs = {}
 
 # --- 로그인 UI 및 처리 ---
 def login_ui():
@@ -182,9 +543,10 @@ def login_ui():
                 st.session_state.login_status = True
                 st.session_state.username = username
                 # 로그인 성공 시, 해당 사용자의 데이터를 로드
-                st.session_state.chat_history = load_json(get_chat_save_path(username))
-                st.session_state.schedules = load_json(get_schedule_save_path(username))
-                st.session_state.ai_persona_settings = load_json_dict(get_persona_save_path(username))
+                load_user_data_into_session(username)
+                st.session_state.doc_cache = {} # 문서 캐시는 사용자별로 분리
+                st.session_state.jobs = {}
+                st.session_state.pop("schedule_analysis", None)
                 st.session_state.login_message = ""
                 st.success(f"{st.session_state.username}님 로그인 성공!")
                 st.rerun() # 로그인 성공 후 앱 재실행
@@ -211,29 +573,158 @@ def login_ui():
                     else:
                         st.error(msg)
 
-# --- Helper function for parsing time strings (MODIFIED) ---
-def parse_schedule_time(time_str):
+# --- 대화 기록 페이지 렌더링 ---
+CHAT_PAGE_SIZE = 10 # 한 페이지에 표시할 질문/답변 수
+
+def render_chat_history(store):
     """
-    시간 문자열을 datetime.time 객체로 파싱합니다.
-    이미 datetime.time 객체인 경우 그대로 반환합니다.
+    대화 기록을 최신순으로 한 페이지씩 렌더링합니다.
+    현재 페이지의 기록만 저장소에서 읽어 오므로 기록이 많아져도 렌더링 비용이 일정합니다.
     """
-    if isinstance(time_str, time):
-        return time_str
-    if not isinstance(time_str, str):
-        # 예상치 못한 타입이면 None 반환 (또는 에러 처리)
-        return None
-    
-    # Try parsing common time formats, prioritizing more specific ones
-    formats = ["%H:%M:%S.%f", "%H:%M:%S", "%H:%M"]
-    for fmt in formats:
-        try:
-            return datetime.strptime(time_str, fmt).time()
-        except ValueError:
-            continue
-    
-    # If all parsing fails, return None (or original string with warning)
-    st.warning(f"Warning: Could not parse time string '{time_str}'. This might lead to display issues.")
-    return None # None을 반환하여 데이터 에디터가 빈 값으로 처리하도록 유도
+    total = store.chat_count()
+    if not total:
+        return
+
+    st.subheader("🗨 대화 기록")
+    page_count = (total + CHAT_PAGE_SIZE - 1) // CHAT_PAGE_SIZE
+    if st.session_state.get("chat_page", 1) > page_count:
+        st.session_state.chat_page = page_count # 기록이 줄어든 경우 (초기화 등)
+    page = 1
+    if page_count > 1:
+        page = st.number_input("페이지", min_value=1, max_value=page_count, step=1, key="chat_page")
+
+    offset = (page - 1) * CHAT_PAGE_SIZE
+    for chat in reversed(store.chat_page(offset, CHAT_PAGE_SIZE)):
+        st.markdown(f"**Q:** {chat['질문']}")
+        st.markdown(f"**A:** {chat['답변']}")
+        st.markdown("---")
+    st.caption(f"전체 {total}개 중 {offset + 1}-{min(offset + CHAT_PAGE_SIZE, total)}번째 기록 (최신순)")
+
+# --- 대화 기록 검색 ---
+def render_chat_search(store):
+    """
+    대화 기록에서 질문/답변을 검색합니다. 사용자별 n-gram 색인을 사용하므로 기록 전체를 다시 읽지 않습니다.
+    결과는 관련도 순으로 표시하고, 기간을 지정하면 그 기간의 기록만 찾습니다.
+    """
+    if not store.chat_count():
+        return
+
+    with st.expander("🔎 대화 기록 검색"):
+        query = st.text_input("검색어", key="chat_search_query", placeholder="예: 예산 보고서")
+        date_from = date_to = None
+        if st.checkbox("기간 지정", key="chat_search_use_dates"):
+            col1, col2 = st.columns(2)
+            date_from = col1.date_input("시작일", value=date.today() - timedelta(days=30), key="chat_search_from")
+            date_to = col2.date_input("종료일", value=date.today(), key="chat_search_to")
+        if not query.strip():
+            return
+
+        results = get_chat_search(store).search(store, query, date_from, date_to)
+        if not results:
+            st.info("검색 결과가 없습니다.")
+            return
+        for result in results:
+            chat = result["entry"]
+            st.markdown(f"**Q:** {make_snippet(chat['질문'], query)}")
+            st.markdown(f"**A:** {make_snippet(chat['답변'], query)}")
+            st.caption(f"{chat.get('timestamp', '')} · 관련도 {result['score']:.2f}")
+            st.markdown("---")
+
+# --- 일정 표 DataFrame ---
+def get_schedule_frame():
+    """
+    현재 일정 목록의 data editor 용 DataFrame 을 반환합니다.
+    일정 목록이 바뀌지 않았다면 재실행마다 다시 만들지 않고 세션에 보관한 것을 사용합니다.
+    """
+    cached = st.session_state.get("schedule_frame")
+    if cached is not None and cached[0] is st.session_state.schedules:
+        return cached[1], cached[2]
+    from schedule_table import schedules_to_frame # pandas 는 일정 관리 탭을 처음 열 때 불러옵니다.
+
+    with span("schedule.frame"):
+        df, bad_times = schedules_to_frame(st.session_state.schedules)
+    st.session_state.schedule_frame = (st.session_state.schedules, df, bad_times)
+    return df, bad_times
+
+# --- 일정 날짜 색인 ---
+SCHEDULE_CONTEXT_TOKENS = int(os.environ.get("SCHEDULE_CONTEXT_TOKENS", CONTEXT_TOKENS)) # AI 일정 도우미에 보낼 일정의 토큰 예산
+ANALYSIS_PAST_DAYS = 30 # 일정 분석에 포함할 지난 기간(일)
+ANALYSIS_FUTURE_DAYS = 30 # 일정 분석에 포함할 앞으로의 기간(일)
+RECOMMEND_DAYS = 7 # 추천 일정을 만들 기간(일)
+SCHEDULE_ANALYSIS_MAX_TOKENS = 1024
+
+def get_schedule_index():
+    """현재 일정 목록의 날짜 색인을 반환합니다. 일정 목록이 바뀌었을 때만 다시 만듭니다."""
+    cached = st.session_state.get("schedule_index")
+    if cached is not None and cached[0] is st.session_state.schedules:
+        return cached[1]
+    with span("schedule.index"):
+        index = ScheduleIndex(st.session_state.schedules)
+    st.session_state.schedule_index = (st.session_state.schedules, index)
+    return index
+
+# --- 성능 지표 (관리자 전용) ---
+ADMIN_USERS = {name.strip() for name in os.environ.get("ADMIN_USERS", "").split(",") if name.strip()} # 쉼표로 구분
+METRICS_EXPORT_PATH = os.environ.get("METRICS_EXPORT_PATH", "") # .json 이면 JSON, 아니면 Prometheus 텍스트 형식
+METRICS_EXPORT_INTERVAL = float(os.environ.get("METRICS_EXPORT_INTERVAL", 15)) # 내보내기 주기(초)
+METRICS_PAGE = "성능 지표"
+
+def is_admin(username):
+    """ADMIN_USERS 환경 변수에 등록된 사용자인지 확인합니다."""
+    return username in ADMIN_USERS
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+def render_metrics_page():
+    """구간별 소요 시간(p50/p95/p99), 카운터, 모델 라우터와 요청 합치기 통계를 표시합니다. (관리자 전용)"""
+    st.header("📊 성능 지표")
+    metrics = get_metrics()
+    snapshot = metrics.snapshot()
+    st.caption(f"집계 시작 후 {snapshot['uptime']:.0f}초 · 백분위수는 구간별 최근 {metrics.window}개 측정 기준")
+
+    st.subheader("구간별 소요 시간 (ms)")
+    if snapshot["stages"]:
+        st.dataframe([
+            {
+                "구간": row["name"],
+                "구분": ", ".join(f"{k}={v}" for k, v in row["labels"].items()),
+                "횟수": row["count"],
+                "오류": row["errors"],
+                "p50": _ms(row["p50"]),
+                "p95": _ms(row["p95"]),
+                "p99": _ms(row["p99"]),
+                "최대": _ms(row["max"]),
+                "평균": _ms(row["sum"] / row["count"]),
+            }
+            for row in snapshot["stages"]
+        ], hide_index=True)
+    else:
+        st.info("아직 기록된 구간이 없습니다.")
+
+    st.subheader("카운터 (요청, 토큰 사용량, 캐시)")
+    if snapshot["counters"]:
+        st.dataframe([
+            {"이름": row["name"], "구분": ", ".join(f"{k}={v}" for k, v in row["labels"].items()), "값": row["value"]}
+            for row in snapshot["counters"]
+        ], hide_index=True)
+    else:
+        st.info("아직 기록된 카운터가 없습니다.")
+
+    st.subheader("모델 라우터 / 요청 합치기")
+    st.json({"router": get_model_router().stats(), "single_flight": get_single_flight().stats()}, expanded=False)
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Prometheus 형식 다운로드", metrics.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+    with col2:
+        st.download_button("JSON 다운로드", metrics.to_json(), file_name="metrics.json", mime="application/json")
+    with col3:
+        if st.button("지표 초기화"):
+            metrics.reset()
+            st.rerun()
+    if METRICS_EXPORT_PATH:
+        st.caption(f"{METRICS_EXPORT_INTERVAL:.0f}초마다 {METRICS_EXPORT_PATH} 에 저장합니다.")
 
 # --- Existing app UI (part shown after login) ---
 def app_main():
@@ -242,33 +733,57 @@ def app_main():
     
     st.title(f"🙋‍♂️ 안녕하세요, {current_username}님!")
     if st.button("로그아웃"):
+        cancel_session_jobs()
+        st.session_state.pop("schedule_analysis", None)
         st.session_state.login_status = False
         st.session_state.username = ""
         # 로그아웃 시 모든 세션 데이터 초기화
-        st.session_state.chat_history = []
         st.session_state.doc_summary = ""
         st.session_state.schedules = []
         st.session_state.ai_persona_settings = {}
+        st.session_state.doc_cache = {}
         st.rerun()
 
     # 'AI 비서 설정' 탭을 포함한 메뉴 선택
-    tab = st.sidebar.selectbox("메뉴 선택", ["문서 요약 & 상담", "일정 관리", "AI 비서 설정"])
+    menu = ["문서 요약 & 상담", "일정 관리", "AI 비서 설정"]
+    if is_admin(current_username):
+        menu.append(METRICS_PAGE) # 관리자에게만 표시
+    tab = st.sidebar.selectbox("메뉴 선택", menu)
 
     if tab == "문서 요약 & 상담":
         st.header("📄 문서 요약 & AI 상담")
 
         uploaded_file = st.file_uploader("📂 PDF 문서 업로드", type=["pdf"])
         if uploaded_file:
-            with st.spinner("문서 텍스트 추출 중..."):
-                text = extract_text_from_pdf(uploaded_file)
-            with st.spinner("문서 요약 중..."):
-                st.session_state.doc_summary = call_groq_api(
-                    user_msg=f"아래 문서를 간결하게 3~4문장으로 요약해 주세요.",
-                    doc_summary=text[:3000],
-                    max_tokens=512
-                )
+            # 파일 내용이 바뀐 경우에만 텍스트 추출과 요약을 다시 수행합니다.
+            file_bytes = uploaded_file.getvalue()
+            doc_hash = get_document_hash(file_bytes)
+            cached_doc = get_cached_document(doc_hash)
+
             st.subheader("📝 문서 요약")
-            st.write(st.session_state.doc_summary)
+            if cached_doc is None:
+                # 추출과 요약은 백그라운드 작업으로 실행하므로 재실행되거나 다른 탭으로 이동해도 계속 진행됩니다.
+                slot = f"document:{doc_hash}"
+                job = get_session_job(slot)
+                if job is None:
+                    start_job(
+                        slot, "document_summary", summarize_document_job,
+                        file_bytes, get_store(current_username).persona, get_response_cache(), get_groq_client()
+                    )
+                    job = get_session_job(slot)
+                if render_job_outcome(job):
+                    cache_document(doc_hash, job.result["text"], job.result["summary"], job.result["index"])
+                    st.session_state.jobs.pop(slot, None)
+                    cached_doc = get_cached_document(doc_hash)
+                elif job.finished_state and st.button("다시 요약"):
+                    st.session_state.jobs.pop(slot, None)
+                    st.rerun()
+            if cached_doc is not None:
+                st.write(cached_doc["summary"])
+                st.session_state.doc_summary = cached_doc["summary"]
+            else:
+                st.session_state.doc_summary = "" # 요약이 끝나기 전에는 요약 없이 상담합니다.
+            st.session_state.doc_hash = doc_hash
 
         st.subheader("🤖 AI 상담")
         user_input = st.text_input("질문을 입력하세요", key="chat_input")
@@ -276,33 +791,45 @@ def app_main():
         col1, col2 = st.columns([1,1])
         with col1:
             if st.button("질문 제출") and user_input:
-                with st.spinner("답변 생성 중..."):
-                    answer = call_groq_api(user_msg=user_input, doc_summary=st.session_state.doc_summary)
-
-                st.session_state.chat_history.append({"질문": user_input, "답변": answer})
-                save_json(get_chat_save_path(current_username), st.session_state.chat_history)
+                # 답변을 스트리밍으로 표시하고, 완성된 전체 텍스트를 기록에 저장합니다.
+                # 문서 전체 대신 질문과 관련된 구간만 골라 근거로 넣습니다.
+                # 이전 대화는 최근 몇 턴만 그대로 넣고 그보다 오래된 대화는 누적 요약으로 대신합니다.
+                store = get_store(current_username)
+                conversation_summary, history = get_conversation_memory(store).context(store, CHAT_HISTORY_TOKENS)
+                answer = st.write_stream(call_groq_api_stream(
+                    user_msg=user_input,
+                    doc_summary=st.session_state.doc_summary,
+                    context_passages=retrieve_passages(user_input),
+                    history=history,
+                    conversation_summary=conversation_summary
+                ))
+
+                store.append_chat({
+                    "질문": user_input,
+                    "답변": answer,
+                    "timestamp": datetime.now().isoformat(timespec="seconds")
+                })
+                get_chat_search(store).notify_append(store)
+                update_conversation_memory(store)
+                st.session_state.chat_page = 1 # 새 답변이 보이도록 첫 페이지로 이동
                 st.rerun()
 
         with col2:
             clear_button_clicked = st.button("대화 기록 초기화")
             
         if clear_button_clicked:
-            st.session_state.chat_history = []
-            chat_file_path = get_chat_save_path(current_username)
-            if os.path.exists(chat_file_path):
-                os.remove(chat_file_path)
+            store = get_store(current_username)
+            store.clear_chat_history()
+            get_conversation_memory(store).reset(store) # 저장된 누적 요약도 지웁니다.
+            get_chat_search(store).reset()
             
             full_width_message_placeholder = st.empty()
             full_width_message_placeholder.success("대화 기록이 초기화되었습니다. 페이지를 새로고침 해주세요.")
             full_width_message_placeholder.empty() # 메시지 제거
             st.rerun() # 변경사항 즉시 반영 
 
-        if st.session_state.chat_history:
-            st.subheader("🗨 대화 기록")
-            for chat in reversed(st.session_state.chat_history):
-                st.markdown(f"**Q:** {chat['질문']}")
-                st.markdown(f"**A:** {chat['답변']}")
-                st.markdown("---")
+        render_chat_search(get_store(current_username))
+        render_chat_history(get_store(current_username))
 
     elif tab == "일정 관리":
         st.header("📅 일정 관리")
@@ -326,12 +853,11 @@ def app_main():
 
             if add_button:
                 if st.session_state.schedule_event.strip():
-                    st.session_state.schedules.append({
+                    get_store(current_username).add_schedule({
                         "date": str(st.session_state.schedule_date),
                         "time": st.session_state.schedule_time.strftime("%H:%M"),
                         "event": st.session_state.schedule_event
                     })
-                    save_json(get_schedule_save_path(current_username), st.session_state.schedules)
                     st.success("일정이 추가되었습니다!")
                     st.session_state.schedule_event = ""
                     st.rerun()
@@ -341,36 +867,9 @@ def app_main():
         st.subheader("등록된 일정 목록 (편집 가능)")
 
         if st.session_state.schedules:
-            schedule_data_for_df = []
-            for i, s in enumerate(st.session_state.schedules):
-                try:
-                    parsed_date = datetime.strptime(s['date'], "%Y-%m-%d").date()
-                    parsed_time = parse_schedule_time(s['time'])
-                    schedule_data_for_df.append({
-                        "날짜": parsed_date,
-                        "시간": parsed_time,
-                        "일정 내용": s['event'],
-                        "_original_id": f"{s['date']}_{s['time']}_{s['event']}_{i}"
-                    })
-                except (ValueError, TypeError) as e:
-                    st.warning(f"Warning: Error parsing schedule data for Data Editor - {e}. Skipping entry: {s}")
-                    schedule_data_for_df.append({
-                        "날짜": s['date'],
-                        "시간": s['time'],
-                        "일정 내용": s['event'],
-                        "_original_id": f"{s['date']}_{s['time']}_{s['event']}_{i}"
-                    })
-
-            df = pd.DataFrame(schedule_data_for_df)
-            
-            if not df.empty:
-                df['날짜'] = pd.to_datetime(df['날짜'], errors='coerce').dt.date
-                df['시간'] = df['시간'].apply(lambda x: parse_schedule_time(x))
-                df['sort_key'] = df.apply(
-                    lambda row: datetime.combine(row['날짜'], row['시간'] if row['시간'] else time(0,0)) if pd.notna(row['날짜']) else pd.NaT,
-                    axis=1
-                )
-                df = df.sort_values(by='sort_key', na_position='first').drop(columns='sort_key').reset_index(drop=True)
+            df, bad_times = get_schedule_frame()
+            if bad_times:
+                st.warning(f"Warning: {bad_times}개 일정의 시간 값을 해석할 수 없어 빈 칸으로 표시합니다.")
 
             edited_df = st.data_editor(
                 df,
@@ -378,7 +877,9 @@ def app_main():
                     "날짜": st.column_config.DateColumn("날짜", format="YYYY-MM-DD"),
                     "시간": st.column_config.TimeColumn("시간", format="HH:mm"),
                     "일정 내용": st.column_config.TextColumn("일정 내용", width="large"),
-                    "_original_id": None
+                    "_original_id": None,
+                    "_original_date": None,
+                    "_original_time": None,
                 },
                 hide_index=True,
                 num_rows="dynamic",
@@ -386,43 +887,14 @@ def app_main():
                 key="schedule_data_editor"
             )
 
-            new_schedules_from_editor = []
-            for _, row in edited_df.iterrows():
-                date_val = row["날짜"]
-                time_val = row["시간"]
-                event_val = row["일정 내용"]
-
-                if not event_val or str(event_val).strip() == "":
-                    continue
-
-                date_str = ""
-                if isinstance(date_val, date):
-                    date_str = date_val.strftime("%Y-%m-%d")
-                elif isinstance(date_val, str):
-                    date_str = date_val
-                
-                time_str = ""
-                if isinstance(time_val, time):
-                    time_str = time_val.strftime("%H:%M")
-                elif isinstance(time_val, str):
-                    time_str = time_val
-
-                new_schedules_from_editor.append({
-                    "date": date_str,
-                    "time": time_str,
-                    "event": event_val
-                })
-
-            comparable_new_schedules = sorted([
-                (s['date'], s['time'], s['event']) for s in new_schedules_from_editor
-            ])
-            comparable_existing_schedules = sorted([
-                (s['date'], s['time'], s['event']) for s in st.session_state.schedules
-            ])
+            # 편집 전후를 일정 id 기준으로 비교하여 바뀐 행만 저장합니다.
+            from schedule_table import diff_schedules
 
-            if comparable_new_schedules != comparable_existing_schedules:
-                st.session_state.schedules = new_schedules_from_editor
-                save_json(get_schedule_save_path(current_username), st.session_state.schedules)
+            with span("schedule.diff"):
+                inserts, updates, deletes = diff_schedules(df, edited_df)
+            if inserts or updates or deletes:
+                get_store(current_username).apply_schedule_changes(inserts=inserts, updates=updates, deletes=deletes)
+                del st.session_state["schedule_data_editor"] # 저장된 편집 내용이 새 표에 다시 적용되지 않도록 초기화
                 st.success("일정이 업데이트되었습니다!")
                 st.rerun()
 
@@ -432,33 +904,66 @@ def app_main():
         st.subheader("🤖 AI 일정 도우미")
 
         if st.session_state.schedules:
-            schedule_text = ""
-            sorted_schedules = sorted(st.session_state.schedules, key=lambda x: (x['date'], x['time']))
-            
-            for sched_item in sorted_schedules:
-                row_date = sched_item['date']
-                row_time = sched_item['time']
-                row_event = sched_item['event']
-                if row_event.strip():
-                    schedule_text += f"- {row_date} {row_time}: {row_event}\n"
-
-            if st.button("현재 일정 요약 및 분석 요청"):
-                with st.spinner("AI가 일정을 분석 중입니다..."):
-                    ai_response = call_groq_api(
-                        user_msg=f"내 일정 목록:\n{schedule_text}\n\n이 일정을 바탕으로 주요 내용을 3-4문장으로 요약하고, 특이사항이나 중요한 패턴이 있다면 분석하여 알려줘.",
-                        max_tokens=1024
+            # 전체 일정 대신 필요한 기간의 일정만 보내고, 그 이전 일정은 월별 집계로 대신합니다.
+            schedule_index = get_schedule_index()
+            today = date.today()
+            st.caption(
+                f"오늘 일정 {len(schedule_index.on(today))}개 · 이번 주 {len(schedule_index.week_of(today))}개 · "
+                f"다음 {RECOMMEND_DAYS}일 {len(schedule_index.next_days(today, RECOMMEND_DAYS))}개"
+            )
+
+            if st.button("일정 분석 및 다음 주 추천 일정 요청"):
+                # 분석과 추천을 한 번의 JSON 요청으로 받습니다. 일정과 페르소나가 그대로면 캐시된 결과를 사용합니다.
+                persona_settings = get_store(current_username).persona
+                fingerprint = schedule_fingerprint(
+                    st.session_state.schedules, persona_settings, today, get_model_router().primary_model(TASK_SCHEDULE)
+                )
+                cached_result = get_response_cache().get(fingerprint)
+                if cached_result is not None:
+                    st.session_state.jobs.pop("schedule_analysis", None)
+                    st.session_state.schedule_analysis = cached_result
+                else:
+                    schedule_context = schedule_index.build_context(
+                        today - timedelta(days=ANALYSIS_PAST_DAYS),
+                        today + timedelta(days=ANALYSIS_FUTURE_DAYS),
+                        token_budget=SCHEDULE_CONTEXT_TOKENS,
                     )
-                    st.markdown("#### ✨ AI 분석 결과:")
-                    st.write(ai_response)
-            
-            if st.button("다음 주 추천 일정 요청"):
-                with st.spinner("AI가 다음 주 일정을 추천 중입니다..."):
-                    ai_recommendation = call_groq_api(
-                        user_msg=f"내 기존 일정 목록:\n{schedule_text}\n\n이것을 바탕으로 다음 주(오늘 기준 7일 이내) 추천 일정을 2~3개 제안해줘. 추천하는 일정은 간단한 활동(예: 산책, 독서, 휴식 등)이 좋고, 날짜와 시간도 구체적으로 포함해서 작성해줘.",
-                        max_tokens=512
+                    start_job(
+                        "schedule_analysis", "schedule_analysis", schedule_analysis_job,
+                        build_analysis_prompt(schedule_context, today, RECOMMEND_DAYS), fingerprint,
+                        persona_settings, get_response_cache(), get_groq_client(), persist=True
                     )
-                    st.markdown("#### ✨ AI 추천 일정:")
-                    st.write(ai_recommendation)
+
+            # 결과는 다른 탭에 다녀오거나 재실행해도 작업 결과에서 다시 표시됩니다.
+            job = get_session_job("schedule_analysis")
+            if job is not None:
+                if render_job_outcome(job):
+                    st.session_state.schedule_analysis = job.result
+                    st.session_state.jobs.pop("schedule_analysis", None)
+
+            analysis_result = st.session_state.get("schedule_analysis")
+            if analysis_result and (job is None or job.status == DONE):
+                st.markdown("#### ✨ AI 분석 결과:")
+                st.markdown(analysis_result["analysis"] or "분석 내용이 없습니다.")
+                st.markdown("#### ✨ AI 추천 일정:")
+                recommendations = new_recommendations(analysis_result["recommendations"], st.session_state.schedules)
+                if recommendations:
+                    selected = st.data_editor(
+                        [{"추가": True, "날짜": r["date"], "시간": r["time"], "일정 내용": r["event"]} for r in recommendations],
+                        column_config={"추가": st.column_config.CheckboxColumn("추가")},
+                        disabled=["날짜", "시간", "일정 내용"],
+                        hide_index=True,
+                        key="schedule_recommendation_editor"
+                    )
+                    if st.button("선택한 추천 일정 추가"):
+                        inserts = [r for r, row in zip(recommendations, selected) if row["추가"]]
+                        if inserts:
+                            # 선택한 추천 일정을 한 번에 저장합니다.
+                            get_store(current_username).apply_schedule_changes(inserts=inserts)
+                            st.success(f"추천 일정 {len(inserts)}개가 추가되었습니다!")
+                            st.rerun()
+                else:
+                    st.info("추가할 수 있는 추천 일정이 없습니다.")
         else:
             st.info("아직 등록된 일정이 없습니다. 일정을 추가하면 AI가 도와드릴 수 있어요!")
 
@@ -508,8 +1013,8 @@ def app_main():
                     "focus_areas": focus_areas_input,
                     "temperature": temperature_value
                 }
+                get_store(current_username).save_persona(new_persona_settings)
                 st.session_state.ai_persona_settings = new_persona_settings
-                save_json(get_persona_save_path(current_username), new_persona_settings)
                 st.success("AI 비서 설정이 저장되었습니다! 다음 대화부터 적용됩니다.")
                 st.rerun()
 
@@ -519,15 +1024,22 @@ def app_main():
         else:
             st.info("아직 AI 비서 설정이 없습니다. 위에서 설정해주세요.")
 
+    elif tab == METRICS_PAGE and is_admin(current_username):
+        render_metrics_page()
+
 
 # --- 실행 ---
 def main():
     """앱의 메인 진입점입니다."""
     st.set_page_config(page_title="멀티기능 AI 비서", layout="wide")
-    if st.session_state.login_status:
-        app_main()
-    else:
-        login_ui()
+    if METRICS_EXPORT_PATH:
+        get_metrics().start_export(METRICS_EXPORT_PATH, METRICS_EXPORT_INTERVAL)
+    # 재실행 한 번에 걸린 전체 시간 (화면별)
+    with span("app.rerun", page="app" if st.session_state.login_status else "login"):
+        if st.session_state.login_status:
+            app_main()
+        else:
+            login_ui()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,213 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from atomic_file import write_atomic
+
+# --- 성능 지표 (구간 타이머 + 카운터) ---
+# PDF 추출, Groq 요청, JSON 읽기/쓰기, 일정 DataFrame 생성 같은 주요 구간의 소요 시간과 토큰 사용량을
+# 프로세스 전체가 공유하는 레지스트리에 모읍니다. 구간별 p50/p95 는 최근 WINDOW 개 측정값으로 계산합니다.
+# 관리자 화면에서 확인하거나 Prometheus 텍스트 / JSON 파일로 내보낼 수 있습니다.
+WINDOW = 1000 # 구간별로 백분위수 계산에 사용할 최근 측정 수
+PROMETHEUS_PREFIX = "assistant"
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(sorted_values, q):
+    """정렬된 값 목록의 q(0~1) 백분위수를 반환합니다. (선형 보간)"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+class _Stage:
+    """구간 하나의 누적 횟수/합계/오류 수와 최근 측정값입니다."""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.max = 0.0
+
+    def add(self, seconds, ok):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.errors += not ok
+        self.max = max(self.max, seconds)
+
+
+class MetricsRegistry:
+    """구간 소요 시간과 카운터를 모으는 레지스트리입니다. 여러 스레드(세션, 백그라운드 작업)에서 공유합니다."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.started = time.time()
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._exporter = None
+
+    # --- 기록 ---
+    def observe(self, name, seconds, ok=True, **labels):
+        """구간 name 의 소요 시간(초)을 기록합니다. labels 로 모델, 작업 종류 등을 구분합니다."""
+        key = _key(name, labels)
+        with self._lock:
+            stage = self._stages.get(key)
+            if stage is None:
+                stage = self._stages[key] = _Stage(self.window)
+            stage.add(seconds, ok)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        with 블록의 소요 시간을 구간 name 으로 기록합니다. 블록에서 예외가 발생하면 오류로 셉니다.
+        (제너레이터가 중간에 닫히거나 Streamlit 이 재실행하는 경우는 오류가 아닙니다.)
+        """
+        start = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except Exception:
+            ok = False
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, ok, **labels)
+
+    def incr(self, name, value=1, **labels):
+        """카운터 name 을 value 만큼 늘립니다. (요청 수, 토큰 수 등)"""
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counters = {}
+            self.started = time.time()
+
+    # --- 조회 ---
+    def snapshot(self):
+        """
+        {"uptime", "stages": [...], "counters": [...]} 를 반환합니다.
+        stages 의 항목은 name, labels, count, sum, errors, max, p50, p95, p99 를 가집니다. (시간은 초 단위)
+        """
+        with self._lock:
+            stages = [(key, list(stage.samples), stage.count, stage.total, stage.errors, stage.max)
+                      for key, stage in self._stages.items()]
+            counters = list(self._counters.items())
+
+        stage_rows = []
+        for (name, labels), samples, count, total, errors, maximum in sorted(stages):
+            samples.sort()
+            row = {"name": name, "labels": dict(labels), "count": count, "sum": total, "errors": errors, "max": maximum}
+            for q in QUANTILES:
+                row[f"p{round(q * 100)}"] = percentile(samples, q)
+            stage_rows.append(row)
+        counter_rows = [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in sorted(counters)]
+        return {"uptime": time.time() - self.started, "stages": stage_rows, "counters": counter_rows}
+
+    # --- 내보내기 ---
+    def to_json(self):
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 형식으로 변환합니다. 구간은 summary(분위수는 최근 WINDOW 개 기준), 카운터는 counter 입니다."""
+        snapshot = self.snapshot()
+        stage_metric = f"{PROMETHEUS_PREFIX}_stage_seconds"
+        error_metric = f"{PROMETHEUS_PREFIX}_stage_errors_total"
+        lines = [
+            f"# HELP {stage_metric} 구간별 소요 시간(초)",
+            f"# TYPE {stage_metric} summary",
+        ]
+        errors = []
+        for row in snapshot["stages"]:
+            labels = {"stage": row["name"], **row["labels"]}
+            for q in QUANTILES:
+                value = row[f"p{round(q * 100)}"]
+                value = "NaN" if value is None else value
+                lines.append(f"{stage_metric}{_format_labels({**labels, 'quantile': q})} {value}")
+            lines.append(f"{stage_metric}_sum{_format_labels(labels)} {row['sum']}")
+            lines.append(f"{stage_metric}_count{_format_labels(labels)} {row['count']}")
+            errors.append(f"{error_metric}{_format_labels(labels)} {row['errors']}")
+        if errors:
+            lines += [f"# TYPE {error_metric} counter"] + errors
+
+        typed = set()
+        for row in snapshot["counters"]:
+            metric = f"{PROMETHEUS_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', row['name'])}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(row['labels'])} {row['value']}")
+        lines.append(f"{PROMETHEUS_PREFIX}_uptime_seconds {snapshot['uptime']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """path 에 지표를 원자적으로 저장합니다. 확장자가 .json 이면 JSON, 아니면 Prometheus 텍스트 형식입니다."""
+        text = self.to_json() if path.endswith(".json") else self.to_prometheus()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_atomic(path, text)
+
+    def start_export(self, path, interval):
+        """interval 초마다 path 에 지표를 저장하는 백그라운드 스레드를 시작합니다. (한 번만 시작)"""
+        with self._lock:
+            if self._exporter is not None:
+                return
+            self._exporter = threading.Thread(
+                target=self._export_loop, args=(path, interval), name="metrics-export", daemon=True
+            )
+        self._exporter.start()
+
+    def _export_loop(self, path, interval):
+        while True:
+            try:
+                self.export(path)
+            except OSError:
+                pass # 다음 주기에 다시 시도합니다.
+            time.sleep(interval)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    """프로세스 전체에서 공유하는 지표 레지스트리를 반환합니다."""
+    return _registry
+
+
+def span(name, **labels):
+    """공유 레지스트리에 구간 소요 시간을 기록하는 with 블록을 반환합니다."""
+    return _registry.span(name, **labels)
+
+
+def observe(name, seconds, ok=True, **labels):
+    _registry.observe(name, seconds, ok, **labels)
+
+
+def incr(name, value=1, **labels):
+    _registry.incr(name, value, **labels)
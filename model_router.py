@@ -0,0 +1,252 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from metrics import percentile
+
+# --- 지연 시간 기반 모델 라우터 (헤지 요청 + 대체 모델) ---
+# 모델별 최근 응답 시간의 백분위수와 오류율을 기록하고, 작업 종류와 max_tokens 에 맞는 모델을 고릅니다.
+# 첫 요청이 그 모델의 p95 를 넘기면 두 번째 요청(헤지)을 보내 먼저 도착한 응답을 사용하고,
+# 오류가 나면 다음 후보 모델로 다시 요청합니다.
+TASK_CHAT = "chat"
+TASK_SUMMARY = "summary"
+TASK_SCHEDULE = "schedule"
+
+# 모델별 최대 출력 토큰 수 (컨텍스트 길이 기준)
+MODELS = {
+    "llama3-8b-8192": {"max_tokens": 8192},
+    "llama-3.1-8b-instant": {"max_tokens": 8192},
+    "llama-3.3-70b-versatile": {"max_tokens": 32768},
+}
+# 작업별 후보 모델 (앞에 있을수록 우선). GROQ_MODEL_ROUTES 환경 변수(JSON)로 바꿀 수 있습니다.
+ROUTES = {
+    TASK_CHAT: ["llama3-8b-8192", "llama-3.1-8b-instant"],
+    TASK_SUMMARY: ["llama3-8b-8192", "llama-3.1-8b-instant"],
+    TASK_SCHEDULE: ["llama-3.3-70b-versatile", "llama3-8b-8192"],
+}
+
+WINDOW = 100 # 모델별로 보관할 최근 요청 수
+MIN_SAMPLES = 20 # 백분위수를 헤지 기준으로 쓰기 위한 최소 표본 수
+MAX_ERROR_RATE = 0.5 # 최근 오류율이 이보다 높은 모델은 후보 순서에서 뒤로 보냅니다.
+DEFAULT_HEDGE_DELAY = None # 표본이 부족할 때의 헤지 대기 시간(초). None 이면 헤지하지 않음
+
+LATENCY_COMPLETE = "complete" # 응답 전체를 받기까지의 시간
+LATENCY_FIRST_TOKEN = "first_token" # 스트리밍에서 첫 조각을 받기까지의 시간
+
+
+class LatencyTracker:
+    """한 모델의 최근 WINDOW 개 요청의 (응답 시간, 성공 여부) 를 보관합니다."""
+
+    def __init__(self, window=WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self._samples.append((latency, ok))
+
+    def snapshot(self):
+        """{"count", "p50", "p95", "p99", "error_rate"} 를 반환합니다. (응답 시간은 성공한 요청 기준)"""
+        with self._lock:
+            samples = list(self._samples)
+        latencies = sorted(latency for latency, ok in samples if ok)
+        errors = sum(1 for _, ok in samples if not ok)
+        return {
+            "count": len(samples),
+            "p50": percentile(latencies, 0.50),
+            "p95": percentile(latencies, 0.95),
+            "p99": percentile(latencies, 0.99),
+            "error_rate": errors / len(samples) if samples else 0.0,
+        }
+
+
+class AllModelsFailed(Exception):
+    """
+    모든 후보 모델의 요청이 실패했을 때 발생합니다. 마지막 오류를 __cause__ 로 가집니다.
+    마지막 오류의 status_code 와 response 를 그대로 가지므로 429 재시도(summarizer.call_with_retry)가 동작합니다.
+    """
+
+    def __init__(self, message, last_error=None):
+        super().__init__(message)
+        self.status_code = getattr(last_error, "status_code", None)
+        self.response = getattr(last_error, "response", None)
+
+
+class ModelRouter:
+    """작업별 모델 선택, 지연 시간 기록, 헤지 요청과 대체 모델 재시도를 담당합니다. 여러 스레드에서 공유합니다."""
+
+    def __init__(self, routes=None, models=None, window=WINDOW, min_samples=MIN_SAMPLES,
+                 max_error_rate=MAX_ERROR_RATE, default_hedge_delay=DEFAULT_HEDGE_DELAY):
+        self.routes = routes or load_routes()
+        self.models = models or MODELS
+        self.window = window
+        self.min_samples = min_samples
+        self.max_error_rate = max_error_rate
+        self.default_hedge_delay = default_hedge_delay
+        self._trackers = {}
+        self._lock = threading.Lock()
+        self.hedged = 0 # 헤지 요청을 보낸 횟수
+        self.hedge_wins = 0 # 헤지 요청이 먼저 도착한 횟수
+        self.fallbacks = 0 # 오류로 다음 후보 모델을 사용한 횟수
+
+    # --- 통계 ---
+    def _tracker(self, model, kind):
+        with self._lock:
+            tracker = self._trackers.get((model, kind))
+            if tracker is None:
+                tracker = self._trackers[(model, kind)] = LatencyTracker(self.window)
+            return tracker
+
+    def record(self, model, kind, latency, ok):
+        self._tracker(model, kind).record(latency, ok)
+
+    def stats(self):
+        """{모델: {종류: 통계}} 와 헤지/대체 횟수를 반환합니다."""
+        with self._lock:
+            keys = list(self._trackers)
+        models = {}
+        for model, kind in keys:
+            models.setdefault(model, {})[kind] = self._tracker(model, kind).snapshot()
+        return {"models": models, "hedged": self.hedged, "hedge_wins": self.hedge_wins, "fallbacks": self.fallbacks}
+
+    def hedge_delay(self, model, kind):
+        """헤지 요청을 보내기 전까지 기다릴 시간(해당 모델의 p95)을 반환합니다. 표본이 부족하면 기본값을 사용합니다."""
+        snapshot = self._tracker(model, kind).snapshot()
+        if snapshot["count"] >= self.min_samples and snapshot["p95"] is not None:
+            return snapshot["p95"]
+        return self.default_hedge_delay
+
+    # --- 모델 선택 ---
+    def primary_model(self, task):
+        """작업의 기본(첫 번째) 모델을 반환합니다. 응답 캐시 키에 사용합니다."""
+        return self.routes.get(task, self.routes[TASK_CHAT])[0]
+
+    def candidates(self, task, max_tokens, kind=LATENCY_COMPLETE):
+        """
+        작업에 사용할 모델을 우선순위 순서로 반환합니다.
+        max_tokens 를 감당할 수 없는 모델은 제외하고, 최근 오류율이 높은 모델은 뒤로 보냅니다.
+        """
+        route = self.routes.get(task, self.routes[TASK_CHAT])
+        fitting = [m for m in route if self.models.get(m, {}).get("max_tokens", max_tokens) >= max_tokens] or list(route)
+
+        def unhealthy(model):
+            snapshot = self._tracker(model, kind).snapshot()
+            return snapshot["count"] >= self.min_samples and snapshot["error_rate"] > self.max_error_rate
+
+        return sorted(fitting, key=unhealthy) # 안정 정렬이므로 같은 그룹 안에서는 원래 순서를 유지합니다.
+
+    # --- 요청 ---
+    def _start(self, results, attempt, model, fn, kind):
+        """별도 스레드에서 fn(model) 을 실행하고 (attempt, model, 결과, 오류) 를 results 에 넣습니다."""
+        def run():
+            start = time.monotonic()
+            try:
+                value = fn(model)
+            except Exception as e:
+                self.record(model, kind, time.monotonic() - start, False)
+                results.put((attempt, model, None, e))
+            else:
+                self.record(model, kind, time.monotonic() - start, True)
+                results.put((attempt, model, value, None))
+
+        threading.Thread(target=run, name=f"route-{model}", daemon=True).start()
+
+    def _race(self, candidates, fn, kind, discard=None):
+        """
+        첫 후보에 요청하고, p95 안에 응답이 없으면 다음 후보(없으면 같은 모델)에 헤지 요청을 한 번 보냅니다.
+        먼저 성공한 응답을 (model, 결과) 로 반환하고, 늦게 도착한 응답은 discard(결과) 로 정리합니다.
+        모두 실패하면 남은 후보로 차례대로 재시도합니다.
+        """
+        results = queue.Queue()
+        pending = list(candidates)
+        self._start(results, 0, pending.pop(0), fn, kind)
+        attempts = 1
+        in_flight = 1
+        hedge_attempt = None
+        wait = self.hedge_delay(candidates[0], kind)
+        last_error = None
+
+        while in_flight:
+            try:
+                attempt, model, value, error = results.get(timeout=wait)
+            except queue.Empty:
+                # 첫 요청이 p95 를 넘겼으므로 헤지 요청을 보냅니다.
+                hedge_attempt = attempts
+                self._start(results, attempts, pending.pop(0) if pending else candidates[0], fn, kind)
+                attempts += 1
+                in_flight += 1
+                wait = None
+                with self._lock:
+                    self.hedged += 1
+                continue
+            in_flight -= 1
+            if error is None:
+                with self._lock:
+                    self.hedge_wins += attempt == hedge_attempt
+                if in_flight and discard is not None:
+                    self._discard_late(results, in_flight, discard)
+                return model, value
+            last_error = error
+            wait = None
+            if not in_flight and pending:
+                # 대체 모델로 재시도 (헤지 없이 차례대로)
+                self._start(results, attempts, pending.pop(0), fn, kind)
+                attempts += 1
+                in_flight += 1
+                with self._lock:
+                    self.fallbacks += 1
+        raise AllModelsFailed(f"모든 모델 요청 실패: {', '.join(candidates)}", last_error) from last_error
+
+    @staticmethod
+    def _discard_late(results, count, discard):
+        """경쟁에서 진 요청의 응답이 도착하면 백그라운드에서 정리합니다. (스트림 연결 닫기 등)"""
+        def run():
+            for _ in range(count):
+                _, _, value, error = results.get()
+                if error is None:
+                    discard(value)
+
+        threading.Thread(target=run, name="route-discard", daemon=True).start()
+
+    def complete(self, task, max_tokens, fn):
+        """fn(model) 로 응답 전체를 받는 요청을 보냅니다. (model, 결과) 를 반환합니다."""
+        return self._race(self.candidates(task, max_tokens), fn, LATENCY_COMPLETE)
+
+    def stream(self, task, max_tokens, open_stream):
+        """
+        open_stream(model) 이 반환하는 텍스트 조각들을 yield 합니다.
+        헤지와 대체 모델 재시도는 첫 조각을 받기 전까지만 적용하고, 먼저 첫 조각을 보낸 스트림을 끝까지 사용합니다.
+        """
+        def first_chunk(model):
+            iterator = iter(open_stream(model))
+            return next(iterator, None), iterator
+
+        def close(value):
+            close_iterator = getattr(value[1], "close", None)
+            if close_iterator is not None:
+                close_iterator()
+
+        _, value = self._race(
+            self.candidates(task, max_tokens, LATENCY_FIRST_TOKEN), first_chunk, LATENCY_FIRST_TOKEN, discard=close
+        )
+        first, iterator = value
+        try:
+            if first is not None:
+                yield first
+                yield from iterator
+        finally:
+            close(value) # 중간에 버려진 스트림도 연결을 닫습니다.
+
+
+def load_routes():
+    """GROQ_MODEL_ROUTES 환경 변수(JSON, 예: {"chat": ["모델1", "모델2"]})로 기본 경로를 덮어씁니다."""
+    routes = dict(ROUTES)
+    override = os.environ.get("GROQ_MODEL_ROUTES")
+    if override:
+        for task, models in json.loads(override).items():
+            if models:
+                routes[task] = list(models)
+    return routes
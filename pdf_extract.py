@@ -0,0 +1,159 @@
+import atexit
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PyPDF2 import PdfReader
+
+from metrics import incr, span
+
+# --- PDF 텍스트 추출 엔진 ---
+# 큰 문서는 페이지 구간 단위로 프로세스 풀에서 병렬 추출하고,
+# 페이지 텍스트를 순서대로 스트리밍(yield)하여 다음 단계가 바로 시작할 수 있게 합니다.
+PAGES_PER_TASK = 8 # 작업 하나가 처리할 페이지 수
+PARALLEL_MIN_PAGES = 24 # 이보다 작은 문서는 프로세스 풀 없이 바로 추출
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 1)))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# 워커 프로세스에서 같은 파일을 여러 번 파싱하지 않도록 마지막 reader 를 보관합니다.
+_worker_reader = None # (path, PdfReader)
+
+
+def _page_text(page):
+    """페이지 텍스트를 추출합니다. 텍스트가 없는 페이지(이미지 등)는 빈 문자열을 반환합니다."""
+    try:
+        return page.extract_text() or ""
+    except Exception: # 손상된 페이지 하나 때문에 전체 추출이 실패하지 않도록 합니다.
+        return ""
+
+
+def _extract_page_range(path, start, end):
+    """(워커) path 의 PDF 에서 [start, end) 페이지의 텍스트 목록을 반환합니다."""
+    global _worker_reader
+    if _worker_reader is None or _worker_reader[0] != path:
+        _worker_reader = (path, PdfReader(path))
+    reader = _worker_reader[1]
+    return [_page_text(reader.pages[i]) for i in range(start, end)]
+
+
+def _get_pool():
+    """서버 프로세스 전체에서 공유하는 프로세스 풀을 반환합니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Streamlit 서버는 멀티스레드이므로 fork 대신 spawn 으로 워커를 만듭니다.
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool():
+    """워커가 비정상 종료된 경우 풀을 버리고 다음 호출에서 새로 만듭니다."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+@atexit.register
+def shutdown_pool():
+    """프로세스 종료 시 워커 풀을 정리합니다."""
+    _reset_pool()
+
+
+def _read_bytes(source):
+    """bytes, 파일 경로, 파일 객체(Streamlit UploadedFile 포함)에서 PDF 바이트를 읽습니다."""
+    if isinstance(source, (bytes, bytearray)):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    if hasattr(source, "getvalue"):
+        return source.getvalue()
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source.read()
+
+
+def _iter_serial(reader, page_count, should_stop):
+    for i in range(page_count):
+        if should_stop is not None and should_stop():
+            return
+        yield _page_text(reader.pages[i])
+
+
+def _iter_parallel(pdf_bytes, page_count, should_stop, pages_per_task):
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    futures = []
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+        pool = _get_pool()
+        futures = [
+            pool.submit(_extract_page_range, path, start, min(start + pages_per_task, page_count))
+            for start in range(0, page_count, pages_per_task)
+        ]
+        # 완료 순서와 관계없이 페이지 순서대로 내보냅니다.
+        for future in futures:
+            for text in future.result():
+                if should_stop is not None and should_stop():
+                    return
+                yield text
+    finally:
+        # 조기 종료(should_stop, page 제한, 제너레이터 close) 시 남은 작업을 취소합니다.
+        for future in futures:
+            future.cancel()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def iter_pdf_pages(source, max_pages=None, should_stop=None, parallel=True, pages_per_task=PAGES_PER_TASK):
+    """
+    PDF 의 페이지 텍스트를 페이지 순서대로 하나씩 yield 합니다.
+    max_pages 로 앞쪽 일부 페이지만 추출할 수 있고, should_stop() 이 True 를 반환하면 즉시 중단합니다.
+    페이지 수가 많으면 공유 프로세스 풀에서 구간별로 병렬 추출합니다.
+    """
+    pdf_bytes = _read_bytes(source)
+    reader = PdfReader(io.BytesIO(pdf_bytes))
+    page_count = len(reader.pages)
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+
+    # 단일 CPU 환경에서는 프로세스 간 통신 비용만 늘어나므로 병렬 추출을 하지 않습니다.
+    if not parallel or page_count < PARALLEL_MIN_PAGES or MAX_WORKERS < 2:
+        yield from _iter_serial(reader, page_count, should_stop)
+        return
+
+    emitted = 0
+    try:
+        for text in _iter_parallel(pdf_bytes, page_count, should_stop, pages_per_task):
+            emitted += 1
+            yield text
+    except (BrokenProcessPool, OSError):
+        # 프로세스 풀을 사용할 수 없는 환경이면 남은 페이지를 현재 프로세스에서 추출합니다.
+        _reset_pool()
+        for i in range(emitted, page_count):
+            if should_stop is not None and should_stop():
+                return
+            yield _page_text(reader.pages[i])
+
+
+def extract_text(source, max_pages=None, should_stop=None, parallel=True):
+    """PDF 전체(또는 max_pages 까지)의 텍스트를 페이지별 줄바꿈으로 이어 붙여 반환합니다."""
+    with span("pdf.extract"):
+        pages = list(iter_pdf_pages(source, max_pages=max_pages, should_stop=should_stop, parallel=parallel))
+    incr("pdf.pages", len(pages))
+    # 반복적인 문자열 += 대신 join 으로 한 번에 합쳐 선형 시간에 만듭니다.
+    return "".join(f"{text}\n" for text in pages)
+
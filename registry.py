@@ -0,0 +1,52 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# --- 사용자별 객체 레지스트리 (LRU + 유휴 시간 제거) ---
+# UserDataStore, ConversationMemory, ChatSearchIndex 처럼 사용자마다 하나씩 프로세스 전체에서 공유하는 객체를 보관합니다.
+# 최대 개수를 넘거나 오랫동안 사용하지 않은 항목은 제거하므로, 사용자가 늘어나도 메모리가 계속 늘어나지 않습니다.
+# 제거된 객체는 다음 조회 때 새로 만들어지고, 필요한 데이터는 저장소에서 다시 읽습니다.
+MAX_USERS = int(os.environ.get("USER_CACHE_SIZE", 256)) # 레지스트리마다 보관할 최대 사용자 수
+IDLE_SECONDS = float(os.environ.get("USER_CACHE_IDLE_SECONDS", 30 * 60)) # 이 시간(초) 동안 사용하지 않은 항목은 제거
+
+
+class UserRegistry:
+    """key 마다 하나씩 만든 객체를 보관합니다. 여러 스레드에서 안전하게 사용할 수 있습니다."""
+
+    def __init__(self, max_items=MAX_USERS, idle_seconds=IDLE_SECONDS, on_evict=None):
+        self.max_items = max_items
+        self.idle_seconds = idle_seconds
+        self.on_evict = on_evict # 제거된 객체를 정리하는 함수 (파일 닫기 등). 레지스트리 잠금 밖에서 호출합니다.
+        self._items = OrderedDict() # key -> (마지막 사용 시각, 객체), 오래 사용하지 않은 것부터
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def get(self, key, factory):
+        """key 의 객체를 반환합니다. 없으면 factory() 로 만들어 보관합니다."""
+        now = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            value = factory() if item is None else item[1]
+            self._items[key] = (now, value)
+            self._items.move_to_end(key)
+            evicted = self._evict(now)
+        if self.on_evict is not None:
+            for old in evicted:
+                self.on_evict(old)
+        return value
+
+    def _evict(self, now):
+        """최대 개수를 넘는 항목과 유휴 시간이 지난 항목을 가장 오래된 것부터 제거하고, 제거한 객체 목록을 반환합니다."""
+        evicted = []
+        while self._items:
+            last_used, _ = next(iter(self._items.values()))
+            if len(self._items) <= self.max_items and (self.idle_seconds is None or now - last_used <= self.idle_seconds):
+                break
+            evicted.append(self._items.popitem(last=False)[1][1])
+            self.evicted += 1
+        return evicted
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
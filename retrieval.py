@@ -0,0 +1,87 @@
+import re
+
+import numpy as np
+from scipy import sparse
+
+from summarizer import split_into_chunks
+
+# --- 업로드 문서 검색 인덱스 (BM25) ---
+# 문서를 짧은 구간(passage)으로 나누고 희소 행렬 기반 BM25 점수로
+# 질문과 관련 있는 구간만 골라 프롬프트에 넣습니다. 외부 서비스는 사용하지 않습니다.
+PASSAGE_TOKENS = 300 # 검색 단위 구간의 최대 토큰 수
+DEFAULT_TOP_K = 4
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[가-힣]+|[a-z0-9]+")
+
+
+def tokenize(text):
+    """
+    검색용 토큰 목록을 반환합니다.
+    영문/숫자는 단어 단위, 한글은 조사가 붙어도 매칭되도록 글자 2-gram 단위로 나눕니다.
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(text.lower()):
+        if "가" <= word[0] <= "힣":
+            if len(word) == 1:
+                tokens.append(word)
+            else:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class DocumentIndex:
+    """구간 목록에 대한 BM25 검색 인덱스입니다. 한 번 만들면 읽기 전용으로 재사용합니다."""
+
+    def __init__(self, passages):
+        self.passages = passages
+        self.vocab = {}
+        rows, cols = [], []
+        for row, passage in enumerate(passages):
+            for token in tokenize(passage):
+                rows.append(row)
+                cols.append(self.vocab.setdefault(token, len(self.vocab)))
+
+        shape = (len(passages), len(self.vocab))
+        # 중복된 (row, col) 은 합쳐져서 단어 빈도(tf)가 됩니다.
+        tf = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)), shape=shape
+        )
+        tf.sum_duplicates()
+
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        avg_len = doc_len.mean() if len(doc_len) else 0.0
+        doc_freq = np.bincount(tf.indices, minlength=shape[1])
+        idf = np.log1p((shape[0] - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+        # BM25 가중치를 미리 계산해 두면 질문 처리는 열 선택과 합계만 남습니다.
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len) if avg_len else np.ones_like(doc_len)
+        row_norm = np.repeat(norm, np.diff(tf.indptr)).astype(np.float32)
+        weights = tf.copy()
+        weights.data = tf.data * (BM25_K1 + 1) / (tf.data + row_norm) * idf[tf.indices]
+        self._weights = weights.tocsc()
+
+    def __len__(self):
+        return len(self.passages)
+
+    def search(self, query, top_k=DEFAULT_TOP_K):
+        """질문과 관련된 구간을 점수가 높은 순서로 [(점수, 구간), ...] 형태로 반환합니다."""
+        term_ids = [self.vocab[t] for t in tokenize(query) if t in self.vocab]
+        if not term_ids or not self.passages:
+            return []
+        term_ids, counts = np.unique(term_ids, return_counts=True)
+        scores = self._weights[:, term_ids] @ counts.astype(np.float32)
+        scores = np.asarray(scores).ravel()
+
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[i]), self.passages[i]) for i in best if scores[i] > 0]
+
+
+def build_document_index(text, passage_tokens=PASSAGE_TOKENS):
+    """문서 텍스트를 구간으로 나누어 검색 인덱스를 만듭니다."""
+    return DocumentIndex(split_into_chunks(text, passage_tokens))
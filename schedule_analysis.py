@@ -0,0 +1,87 @@
+import hashlib
+import json
+from datetime import date
+
+# --- 구조화된 일정 분석 (분석 + 추천 일정을 한 번의 요청으로) ---
+# 일정 분석과 다음 주 추천 일정을 JSON 응답 하나로 받아, 추천 일정을 바로 일정 목록에 추가할 수 있게 합니다.
+# 결과는 일정 목록과 페르소나의 지문(fingerprint)으로 캐시하므로, 둘 다 그대로면 API 를 호출하지 않습니다.
+MAX_RECOMMENDATIONS = 5
+RESPONSE_FORMAT = {"type": "json_object"}
+
+ANALYSIS_INSTRUCTION = (
+    "오늘은 {today}입니다. 위 일정을 바탕으로 주요 내용을 3-4문장으로 요약하고 특이사항이나 중요한 패턴을 분석해 주세요. "
+    "그리고 오늘부터 {days}일 이내에 기존 일정과 겹치지 않는 추천 일정을 2~3개 제안해 주세요. "
+    "추천 일정은 간단한 활동(예: 산책, 독서, 휴식 등)이 좋습니다.\n"
+    "반드시 다음 형식의 JSON 객체로만 답해 주세요.\n"
+    '{{"analysis": "요약 및 분석 내용", '
+    '"recommendations": [{{"date": "YYYY-MM-DD", "time": "HH:MM", "event": "일정 내용"}}]}}'
+)
+
+
+def schedule_fingerprint(schedules, persona_settings, today, model):
+    """
+    일정 목록(순서 무관), 페르소나 설정, 기준 날짜, 모델로 분석 결과 캐시 키(SHA256)를 만듭니다.
+    추천 일정은 오늘을 기준으로 하므로 날짜가 바뀌면 새로 분석합니다.
+    """
+    # 편집기에서 비운 칸은 None 으로 저장될 수 있으므로 빈 문자열로 맞춰 정렬합니다. (ScheduleIndex 와 같음)
+    entries = sorted((s.get("date") or "", s.get("time") or "", s.get("event") or "") for s in schedules)
+    payload = json.dumps(
+        ["schedule-analysis", model, today.isoformat(), persona_settings or {}, entries],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_analysis_prompt(schedule_context, today, days):
+    """일정 컨텍스트로 분석 + 추천 요청 메시지를 만듭니다."""
+    return f"내 일정 목록:\n{schedule_context}\n\n" + ANALYSIS_INSTRUCTION.format(today=today.isoformat(), days=days)
+
+
+def _normalize_time(value):
+    """"H:MM", "HH:MM", "HH:MM:SS" 를 "HH:MM" 으로 바꿉니다. 해석할 수 없으면 빈 문자열을 반환합니다."""
+    parts = str(value or "").strip().split(":")
+    if len(parts) < 2 or not all(p.isdigit() for p in parts[:2]):
+        return ""
+    hour, minute = int(parts[0]), int(parts[1])
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        return ""
+    return f"{hour:02d}:{minute:02d}"
+
+
+def parse_analysis(text):
+    """
+    모델의 JSON 응답을 {"analysis": str, "recommendations": [{"date", "time", "event"}]} 로 변환합니다.
+    날짜가 올바르지 않거나 내용이 비어 있는 추천 일정은 버립니다.
+    JSON 이 아니면 응답 전체를 분석 내용으로 사용합니다.
+    """
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return {"analysis": str(text or "").strip(), "recommendations": []}
+    if not isinstance(data, dict):
+        data = {}
+
+    recommendations = []
+    items = data.get("recommendations")
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        event = str(item.get("event") or "").strip()
+        try:
+            day = date.fromisoformat(str(item.get("date") or "").strip())
+        except ValueError:
+            continue
+        if not event:
+            continue
+        recommendations.append({"date": day.isoformat(), "time": _normalize_time(item.get("time")), "event": event})
+        if len(recommendations) >= MAX_RECOMMENDATIONS:
+            break
+    return {"analysis": str(data.get("analysis") or "").strip(), "recommendations": recommendations}
+
+
+def new_recommendations(recommendations, schedules):
+    """이미 같은 날짜/시간/내용으로 등록된 추천 일정을 제외합니다."""
+    existing = {(s.get("date"), s.get("time"), s.get("event")) for s in schedules}
+    return [r for r in recommendations if (r["date"], r["time"], r["event"]) not in existing]
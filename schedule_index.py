@@ -0,0 +1,158 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date, timedelta
+
+from summarizer import estimate_tokens
+
+# --- 날짜 색인 일정 저장소 ---
+# 일정을 날짜/시간 순으로 정렬한 배열로 보관하고, bisect 로 기간("오늘", "이번 주", "다음 7일")을 바로 찾습니다.
+# AI 도우미에는 필요한 기간의 일정만 토큰 예산 안에서 보내고, 그 이전 일정은 월별 집계로 요약합니다.
+CONTEXT_TOKENS = 1500 # AI 요청에 넣을 일정 컨텍스트의 최대 토큰 수
+TOP_EVENTS_PER_MONTH = 3 # 월별 집계에 표시할 자주 있는 일정 수
+
+
+def _to_iso(value):
+    """date 또는 "YYYY-MM-DD" 문자열을 비교용 "YYYY-MM-DD" 문자열로 변환합니다."""
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def _is_valid_date(text):
+    """text 가 "YYYY-MM-DD" 형식의 올바른 날짜인지 확인합니다."""
+    if not isinstance(text, str) or len(text) != 10 or text[4] != "-" or text[7] != "-":
+        return False
+    try:
+        date.fromisoformat(text)
+    except ValueError:
+        return False
+    return True
+
+
+class ScheduleIndex:
+    """
+    일정 목록을 날짜 기준으로 정렬해 두고 기간 조회와 월별 집계를 제공하는 읽기 전용 색인입니다.
+    일정 목록이 바뀌면 새로 만들어 사용합니다.
+    """
+
+    def __init__(self, schedules):
+        entries = []
+        self.undated = [] # 날짜를 해석할 수 없는 일정
+        for item in schedules:
+            if not str(item.get("event", "")).strip():
+                continue
+            if _is_valid_date(item.get("date")):
+                entries.append(item)
+            else:
+                self.undated.append(item)
+        # "YYYY-MM-DD", "HH:MM" 문자열은 사전순 정렬이 곧 시간순 정렬입니다.
+        entries.sort(key=lambda item: (item["date"], item.get("time") or ""))
+        self.entries = entries
+        self._dates = [item["date"] for item in entries]
+        self._months = self._months_from(entries)
+
+    @staticmethod
+    def _months_from(entries):
+        """월("YYYY-MM")별 일정 수와 자주 있는 일정 내용을 미리 집계합니다."""
+        months = {}
+        for item in entries:
+            month = item["date"][:7]
+            aggregate = months.get(month)
+            if aggregate is None:
+                aggregate = months[month] = {"count": 0, "events": Counter()}
+            aggregate["count"] += 1
+            aggregate["events"][item["event"].strip()] += 1
+        return months
+
+    def __len__(self):
+        return len(self.entries)
+
+    # --- 기간 조회 ---
+    def between(self, start, end):
+        """start 부터 end 까지(양 끝 포함)의 일정을 시간순으로 반환합니다."""
+        lo = bisect_left(self._dates, _to_iso(start))
+        hi = bisect_right(self._dates, _to_iso(end))
+        return self.entries[lo:hi]
+
+    def count_between(self, start, end):
+        """start 부터 end 까지(양 끝 포함)의 일정 수를 반환합니다."""
+        return bisect_right(self._dates, _to_iso(end)) - bisect_left(self._dates, _to_iso(start))
+
+    def on(self, day):
+        return self.between(day, day)
+
+    def week_of(self, day):
+        """day 가 속한 주(월요일~일요일)의 일정을 반환합니다."""
+        monday = day - timedelta(days=day.weekday())
+        return self.between(monday, monday + timedelta(days=6))
+
+    def next_days(self, day, days=7):
+        """day 부터 days 일 동안의 일정을 반환합니다."""
+        return self.between(day, day + timedelta(days=days - 1))
+
+    # --- 월별 집계 ---
+    def month_summaries(self, before=None):
+        """
+        before 날짜 이전의 모든 일정을 월별로 집계하여 최근 달부터 반환합니다. (before 가 없으면 전체)
+        before 가 속한 달은 그달 1일부터 before 전날까지만 집계하고 "until"(마지막 날짜)을 함께 반환합니다.
+        """
+        limit = _to_iso(before) if before is not None else None
+        summaries = []
+        if limit is not None:
+            # before 가 속한 달의 앞부분은 미리 집계한 월 단위 값을 쓸 수 없으므로 따로 집계합니다.
+            month = limit[:7]
+            head = self.entries[bisect_left(self._dates, f"{month}-01"):bisect_left(self._dates, limit)]
+            if head:
+                until = (date.fromisoformat(limit) - timedelta(days=1)).isoformat()
+                summaries.append(self._summary(month, self._months_from(head)[month], until=until))
+        for month in sorted(self._months, reverse=True):
+            if limit is not None and month >= limit[:7]:
+                continue
+            summaries.append(self._summary(month, self._months[month]))
+        return summaries
+
+    @staticmethod
+    def _summary(month, aggregate, until=None):
+        summary = {
+            "month": month,
+            "count": aggregate["count"],
+            "top_events": aggregate["events"].most_common(TOP_EVENTS_PER_MONTH),
+        }
+        if until is not None:
+            summary["until"] = until
+        return summary
+
+    # --- AI 요청용 컨텍스트 ---
+    def build_context(self, start, end, token_budget=CONTEXT_TOKENS):
+        """
+        start~end 기간의 일정 목록과 start 이전 일정의 월별 집계를 token_budget 안에서 텍스트로 만듭니다.
+        기간 안의 일정이 우선이며, 예산을 넘는 일정은 개수만 표시합니다.
+        """
+        lines = []
+        used = 0
+
+        def add(line):
+            nonlocal used
+            tokens = estimate_tokens(line) + 1
+            if used + tokens > token_budget:
+                return False
+            lines.append(line)
+            used += tokens
+            return True
+
+        window = self.between(start, end)
+        add(f"[{_to_iso(start)} ~ {_to_iso(end)} 일정]")
+        if not window:
+            add("- (해당 기간의 일정 없음)")
+        for shown, item in enumerate(window):
+            when = f"{item['date']} {item['time']}" if item.get("time") else item["date"]
+            if not add(f"- {when}: {item['event']}"):
+                lines.append(f"- ... 외 {len(window) - shown}개 일정")
+                return "\n".join(lines)
+
+        summaries = self.month_summaries(before=start)
+        if summaries and add("[이전 월별 일정 요약]"):
+            for summary in summaries:
+                top = ", ".join(f"{event} {count}회" for event, count in summary["top_events"])
+                period = f"{summary['month']}-01 ~ {summary['until']}" if "until" in summary else summary["month"]
+                if not add(f"- {period}: 일정 {summary['count']}개 (주요: {top})"):
+                    break
+        return "\n".join(lines)
@@ -0,0 +1,151 @@
+from datetime import time
+
+import numpy as np
+import pandas as pd
+
+# --- 일정 표(data editor) 변환 파이프라인 ---
+# 일정 목록 <-> DataFrame 변환과 편집 내용 비교를 행 단위 파이썬 루프 없이 열 단위(벡터)로 처리합니다.
+# 각 일정은 "id" 로 식별하며, 편집 결과와 원본을 id 기준으로 비교하여 바뀐 행만 골라냅니다.
+DATE_COLUMN = "날짜"
+TIME_COLUMN = "시간"
+EVENT_COLUMN = "일정 내용"
+ID_COLUMN = "_original_id"
+# 저장된 날짜/시간 문자열 원본 (표에는 숨김). 해석할 수 없어 빈 칸으로 보인 값을 다른 열만 고쳤을 때 그대로 유지합니다.
+RAW_DATE_COLUMN = "_original_date"
+RAW_TIME_COLUMN = "_original_time"
+
+TIME_FORMATS = ["%H:%M", "%H:%M:%S", "%H:%M:%S.%f"]
+
+
+def parse_time_column(values):
+    """
+    시간 문자열/객체 열을 datetime64 열로 변환합니다. (날짜 부분은 1900-01-01)
+    여러 형식을 차례로 시도하고, 어떤 형식으로도 해석되지 않으면 NaT 가 됩니다.
+    """
+    # datetime.time 객체는 str() 로 "HH:MM:SS" 형식이 되고, None/NaN 은 어떤 형식과도 맞지 않아 NaT 가 됩니다.
+    text = pd.Series(values, dtype="object").astype(str)
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    for fmt in TIME_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors="coerce")
+    return parsed
+
+
+def time_to_minutes(values):
+    """
+    시간 열을 자정 이후 분(int64, 해석할 수 없으면 -1)으로 변환합니다.
+    data editor 가 돌려주는 datetime.time 객체는 문자열 변환 없이 바로 계산하고, 나머지만 parse_time_column 으로 해석합니다.
+    """
+    values = pd.Series(values, dtype="object")
+    is_time = np.fromiter((isinstance(v, time) for v in values), dtype=bool, count=len(values))
+    minutes = np.full(len(values), -1, dtype="int64")
+    minutes[is_time] = [v.hour * 60 + v.minute for v in values[is_time]]
+    rest = ~is_time & values.notna().to_numpy()
+    if rest.any():
+        parsed = parse_time_column(values[rest])
+        minutes[rest] = (parsed.dt.hour * 60 + parsed.dt.minute).fillna(-1).astype("int64").to_numpy()
+    return minutes
+
+
+def schedules_to_frame(schedules):
+    """
+    일정 목록을 data editor 용 DataFrame 으로 변환합니다. (날짜/시간 순 정렬, 해석할 수 없는 값은 빈 칸)
+    반환값: (DataFrame, 해석하지 못한 시간 값의 수)
+    """
+    raw = pd.DataFrame.from_records(schedules, columns=["id", "date", "time", "event"])
+    dates = pd.to_datetime(raw["date"], format="%Y-%m-%d", errors="coerce")
+    times = parse_time_column(raw["time"])
+    bad_times = int((times.isna() & raw["time"].notna() & (raw["time"] != "")).sum())
+
+    # 정렬 키: 날짜 + 하루 중 시각 (시간이 없으면 00:00). 날짜가 없으면 NaT 로 맨 앞에 둡니다.
+    time_of_day = (times - times.dt.normalize()).fillna(pd.Timedelta(0))
+    sort_key = (dates + time_of_day).to_numpy(dtype="datetime64[ns]").view("i8") # NaT 는 가장 작은 값
+    order = np.argsort(sort_key, kind="stable")
+
+    frame = pd.DataFrame({
+        DATE_COLUMN: dates.dt.date.where(dates.notna(), None),
+        TIME_COLUMN: times.dt.time.where(times.notna(), None),
+        EVENT_COLUMN: raw["event"],
+        ID_COLUMN: raw["id"].astype("object"),
+        RAW_DATE_COLUMN: raw["date"].astype("object"),
+        RAW_TIME_COLUMN: raw["time"].astype("object"),
+    })
+    return frame.iloc[order].reset_index(drop=True), bad_times
+
+
+def _normalize_frame(frame):
+    """
+    data editor 의 DataFrame 을 비교용 열(id, day, minute, event, raw_date, raw_time)로 변환합니다.
+    날짜는 datetime64, 시각은 자정 이후 분(minute, 없으면 -1)으로 바꾸어 문자열 변환 없이 비교합니다.
+    일정 내용이 비어 있는 행은 제외합니다. (새로 추가된 행의 id 와 원본 문자열은 None)
+    """
+    events = frame[EVENT_COLUMN].astype("object").where(frame[EVENT_COLUMN].notna(), "").astype(str)
+    keep = (events.str.strip() != "").to_numpy()
+    frame = frame[keep]
+
+    minutes = time_to_minutes(frame[TIME_COLUMN])
+    ids = frame[ID_COLUMN].astype("object")
+    return pd.DataFrame({
+        "id": ids.where(ids.notna(), None),
+        "day": pd.to_datetime(frame[DATE_COLUMN], errors="coerce").dt.normalize(),
+        "minute": minutes,
+        "event": events[keep],
+        "raw_date": frame[RAW_DATE_COLUMN] if RAW_DATE_COLUMN in frame else None,
+        "raw_time": frame[RAW_TIME_COLUMN] if RAW_TIME_COLUMN in frame else None,
+    }, index=frame.index).reset_index(drop=True)
+
+
+def _to_records(normalized, keep_date=None, keep_time=None):
+    """
+    비교용 열을 저장 형식("YYYY-MM-DD", "HH:MM")의 일정 레코드 목록으로 변환합니다. (바뀐 행에만 사용)
+    keep_date/keep_time 에 값이 있는 행은 그 원본 문자열을 그대로 저장합니다. (바뀌지 않은 열)
+    """
+    days = normalized["day"].dt.strftime("%Y-%m-%d").fillna("")
+    times = pd.Series(
+        [f"{m // 60:02d}:{m % 60:02d}" if m >= 0 else "" for m in normalized["minute"].tolist()],
+        index=normalized.index, dtype="object",
+    )
+    if keep_date is not None:
+        days = keep_date.where(keep_date.notna(), days)
+    if keep_time is not None:
+        times = keep_time.where(keep_time.notna(), times)
+    records = pd.DataFrame({"date": days, "time": times, "event": normalized["event"]}, index=normalized.index)
+    if "id" in normalized:
+        records.insert(0, "id", normalized["id"])
+    return records.to_dict("records")
+
+
+def diff_schedules(original_frame, edited_frame):
+    """
+    원본과 편집된 data editor DataFrame 을 id 기준으로 비교합니다.
+    반환값: (inserts, updates, deletes) - 새 일정 목록, 바뀐 일정 목록(id 포함), 삭제된 id 목록
+    """
+    before = _normalize_frame(original_frame)
+    after = _normalize_frame(edited_frame)
+
+    is_new = after["id"].isna().to_numpy()
+    inserts = _to_records(after.loc[is_new, ["day", "minute", "event"]])
+
+    existing = after[~is_new]
+    merged = existing.merge(before, on="id", how="left", suffixes=("", "_before"), indicator=True)
+    same_day = (merged["day"] == merged["day_before"]) | (merged["day"].isna() & merged["day_before"].isna())
+    same_minute = merged["minute"] == merged["minute_before"]
+    changed = (
+        (merged["_merge"] == "left_only")
+        | ~same_day
+        | ~same_minute
+        | (merged["event"] != merged["event_before"])
+    ).to_numpy()
+    # 바뀌지 않은 날짜/시간은 원본 문자열을 유지합니다. (해석할 수 없어 빈 칸으로 보인 값이 지워지지 않도록)
+    updates = _to_records(
+        merged.loc[changed, ["id", "day", "minute", "event"]],
+        keep_date=merged["raw_date_before"].where(same_day)[changed],
+        keep_time=merged["raw_time_before"].where(same_minute)[changed],
+    )
+
+    # 원본에는 있었지만 편집 결과에서 사라진 행(삭제되었거나 일정 내용을 지운 행)
+    deletes = original_frame.loc[~original_frame[ID_COLUMN].isin(existing["id"]), ID_COLUMN]
+    deletes = [d for d in deletes.tolist() if d is not None and not pd.isna(d)]
+    return inserts, updates, deletes
@@ -0,0 +1,656 @@
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+
+from atomic_file import write_atomic
+from chat_log import ChatLog, file_signature
+from metrics import span
+from registry import UserRegistry
+
+# --- 저장소 백엔드 ---
+# 사용자 계정, 채팅 기록, 일정, AI 페르소나를 저장하는 방식을 교체할 수 있도록 분리한 계층입니다.
+# 기본값은 기존과 같은 JSON 파일 백엔드이고, STORAGE_BACKEND=sqlite 로 SQLite 백엔드를 사용할 수 있습니다.
+DEFAULT_SQLITE_PATH = "assistant.db"
+SQLITE_POOL_SIZE = 8
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
+CHATS = "chats"
+SCHEDULES = "schedules"
+PERSONA = "persona"
+
+
+def _write_json_atomic(path, data):
+    """임시 파일에 쓴 뒤 교체하여, 쓰기 도중 중단되어도 기존 파일이 깨지지 않도록 저장합니다."""
+    with span("storage.json_save"):
+        write_atomic(path, json.dumps(data, ensure_ascii=False))
+
+
+def new_schedule_id():
+    """새 일정의 고유 id 를 만듭니다."""
+    return uuid.uuid4().hex[:12]
+
+
+def _read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with span("storage.json_load"), open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class StorageBackend:
+    """
+    저장소 백엔드 인터페이스입니다.
+    data_version(username, kind) 은 데이터가 바뀌면 달라지는 값을 반환하며, 메모리 캐시 무효화에 사용합니다.
+    """
+
+    # --- 사용자 계정 ---
+    def get_password_hash(self, username):
+        raise NotImplementedError
+
+    def create_user(self, username, password_hash):
+        """새 사용자를 만듭니다. 이미 존재하면 False 를 반환합니다."""
+        raise NotImplementedError
+
+    # --- 채팅 기록 ---
+    def load_chats(self, username):
+        raise NotImplementedError
+
+    def count_chats(self, username):
+        raise NotImplementedError
+
+    def load_chat_page(self, username, offset, limit):
+        """최신 기록부터 offset 개를 건너뛴 limit 개의 기록을 오래된 것부터 순서대로 반환합니다."""
+        raise NotImplementedError
+
+    def load_chat_records_from(self, username, start):
+        """
+        (load_chats 순서로) start 번째부터 마지막까지의 (ref, 기록) 목록을 반환합니다.
+        ref 는 load_chats_by_ref 로 그 기록만 다시 읽을 때 사용하는 값입니다. (JSON: 파일 오프셋, SQLite: 행 id)
+        """
+        raise NotImplementedError
+
+    def load_chats_by_ref(self, username, refs):
+        """refs 의 기록을 같은 순서로 반환합니다. 더 이상 유효하지 않은 ref 의 자리는 None 입니다."""
+        raise NotImplementedError
+
+    def append_chat(self, username, entry):
+        raise NotImplementedError
+
+    def clear_chats(self, username):
+        raise NotImplementedError
+
+    # --- 대화 검색 색인 ---
+    # 색인은 전체 스냅샷 하나와 그 뒤에 추가된 기록별 변경분(delta) 목록으로 저장합니다.
+    def load_search_index(self, username):
+        """(스냅샷 dict 또는 None, 변경분 목록) 을 반환합니다."""
+        raise NotImplementedError
+
+    def save_search_index(self, username, data):
+        """스냅샷을 data 로 바꾸고 쌓인 변경분을 지웁니다."""
+        raise NotImplementedError
+
+    def append_search_index(self, username, deltas):
+        """변경분(dict) 목록을 덧붙입니다."""
+        raise NotImplementedError
+
+    # --- 누적 대화 요약 ---
+    def load_conversation_summary(self, username):
+        """저장된 누적 대화 요약({"summary", "covered", "last_key"}) 을 반환합니다. 없으면 None 을 반환합니다."""
+        raise NotImplementedError
+
+    def save_conversation_summary(self, username, data):
+        raise NotImplementedError
+
+    # --- 일정 ---
+    def load_schedules(self, username):
+        """일정 목록을 반환합니다. 각 일정에는 고유한 "id" 가 있습니다."""
+        raise NotImplementedError
+
+    def save_schedules(self, username, schedules):
+        raise NotImplementedError
+
+    def apply_schedule_changes(self, username, inserts=(), updates=(), deletes=()):
+        """바뀐 일정만 반영합니다. updates 는 id 를 포함한 일정, deletes 는 삭제할 id 목록입니다."""
+        raise NotImplementedError
+
+    # --- AI 페르소나 ---
+    def load_persona(self, username):
+        raise NotImplementedError
+
+    def save_persona(self, username, persona):
+        raise NotImplementedError
+
+    # --- 변경 감지 ---
+    def data_version(self, username, kind):
+        raise NotImplementedError
+
+    def list_usernames(self):
+        raise NotImplementedError
+
+
+class JsonFileBackend(StorageBackend):
+    """작업 디렉터리의 users.json, chat_history_*.jsonl, schedules_*.json, ai_persona_*.json 을 사용하는 백엔드입니다."""
+
+    def __init__(self, base_dir="."):
+        self.base_dir = base_dir
+        self.users_path = os.path.join(base_dir, "users.json")
+        self._users_lock = threading.Lock()
+        self._schedules_lock = threading.Lock()
+        self._chat_logs = UserRegistry(on_evict=ChatLog.close) # 오래 사용하지 않은 로그는 닫고 목록에서 제거
+
+    # --- 사용자별 파일 경로 ---
+    def legacy_chat_path(self, username):
+        """(이전 형식) 채팅 기록 JSON 파일 경로를 반환합니다."""
+        return os.path.join(self.base_dir, f"chat_history_{username}.json")
+
+    def chat_log_path(self, username):
+        return os.path.join(self.base_dir, f"chat_history_{username}.jsonl")
+
+    def schedule_path(self, username):
+        return os.path.join(self.base_dir, f"schedules_{username}.json")
+
+    def persona_path(self, username):
+        return os.path.join(self.base_dir, f"ai_persona_{username}.json")
+
+    def search_index_path(self, username):
+        """대화 검색 색인은 채팅 로그 옆에 저장합니다."""
+        return os.path.join(self.base_dir, f"chat_history_{username}.search.json")
+
+    def search_delta_path(self, username):
+        return os.path.join(self.base_dir, f"chat_history_{username}.search.delta.jsonl")
+
+    def conversation_summary_path(self, username):
+        """누적 대화 요약도 채팅 로그 옆에 저장합니다."""
+        return os.path.join(self.base_dir, f"chat_history_{username}.summary.json")
+
+    def chat_log(self, username):
+        """사용자의 ChatLog 를 반환합니다. 기존 JSON 채팅 기록은 처음 열 때 자동으로 이전됩니다."""
+        return self._chat_logs.get(
+            username, lambda: ChatLog(self.chat_log_path(username), legacy_json_path=self.legacy_chat_path(username))
+        )
+
+    # --- 사용자 계정 ---
+    def load_users(self):
+        return _read_json(self.users_path, {})
+
+    def get_password_hash(self, username):
+        return self.load_users().get(username)
+
+    def create_user(self, username, password_hash):
+        with self._users_lock:
+            users = self.load_users()
+            if username in users:
+                return False
+            users[username] = password_hash
+            _write_json_atomic(self.users_path, users)
+            return True
+
+    def list_usernames(self):
+        return list(self.load_users())
+
+    # --- 채팅 기록 ---
+    def load_chats(self, username):
+        return self.chat_log(username).load()
+
+    def count_chats(self, username):
+        return self.chat_log(username).count()
+
+    def load_chat_page(self, username, offset, limit):
+        return self.chat_log(username).page(offset, limit)
+
+    def load_chat_records_from(self, username, start):
+        return self.chat_log(username).records_from(start)
+
+    def load_chats_by_ref(self, username, refs):
+        return self.chat_log(username).read_at(refs)
+
+    def append_chat(self, username, entry):
+        self.chat_log(username).append(entry)
+
+    def clear_chats(self, username):
+        self.chat_log(username).clear()
+
+    # --- 대화 검색 색인 ---
+    def load_search_index(self, username):
+        try:
+            data = _read_json(self.search_index_path(username), None)
+        except ValueError: # 저장 도중 깨진 색인은 다시 만듭니다.
+            data = None
+        deltas = []
+        try:
+            with open(self.search_delta_path(username), "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        deltas.append(json.loads(line))
+                    except ValueError:
+                        break # 쓰기 도중 끊긴 마지막 줄
+        except FileNotFoundError:
+            pass
+        return data, deltas
+
+    def save_search_index(self, username, data):
+        _write_json_atomic(self.search_index_path(username), data)
+        # 스냅샷을 먼저 교체하므로, 그 사이에 중단되어 남은 변경분은 읽을 때 (이미 포함된 기록이라) 무시됩니다.
+        try:
+            os.remove(self.search_delta_path(username))
+        except FileNotFoundError:
+            pass
+
+    def append_search_index(self, username, deltas):
+        with open(self.search_delta_path(username), "a", encoding="utf-8") as f:
+            for delta in deltas:
+                f.write(json.dumps(delta, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    # --- 누적 대화 요약 ---
+    def load_conversation_summary(self, username):
+        try:
+            return _read_json(self.conversation_summary_path(username), None)
+        except ValueError:
+            return None
+
+    def save_conversation_summary(self, username, data):
+        _write_json_atomic(self.conversation_summary_path(username), data)
+
+    # --- 일정 ---
+    def load_schedules(self, username):
+        schedules = _read_json(self.schedule_path(username), [])
+        # id 가 없는 이전 형식 일정에는 위치 기반 id 를 붙입니다. (다음 저장 때 함께 기록됨)
+        for i, schedule in enumerate(schedules):
+            schedule.setdefault("id", f"legacy-{i}")
+        return schedules
+
+    def save_schedules(self, username, schedules):
+        _write_json_atomic(self.schedule_path(username), [
+            {**s, "id": s.get("id") or new_schedule_id()} for s in schedules
+        ])
+
+    def apply_schedule_changes(self, username, inserts=(), updates=(), deletes=()):
+        # JSON 파일은 부분 수정이 불가능하므로, 잠금 안에서 최신 내용에 변경분만 적용하여 다시 씁니다.
+        with self._schedules_lock:
+            updated = {s["id"]: s for s in updates}
+            deleted = set(deletes)
+            schedules = [
+                {**s, **updated.get(s["id"], {})}
+                for s in self.load_schedules(username)
+                if s["id"] not in deleted
+            ]
+            schedules.extend({**s, "id": new_schedule_id()} for s in inserts)
+            self.save_schedules(username, schedules)
+
+    # --- AI 페르소나 ---
+    def load_persona(self, username):
+        return _read_json(self.persona_path(username), {})
+
+    def save_persona(self, username, persona):
+        _write_json_atomic(self.persona_path(username), persona)
+
+    # --- 변경 감지 ---
+    def data_version(self, username, kind):
+        if kind == CHATS:
+            self.chat_log(username) # 이전 형식 파일이 있으면 먼저 이전
+            return file_signature(self.chat_log_path(username))
+        if kind == SCHEDULES:
+            return file_signature(self.schedule_path(username))
+        return file_signature(self.persona_path(username))
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE TABLE IF NOT EXISTS chats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    timestamp TEXT NOT NULL DEFAULT '',
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL
+);
+DROP INDEX IF EXISTS idx_chats_user_time;
+CREATE INDEX IF NOT EXISTS idx_chats_user_id ON chats (username, id);
+CREATE TABLE IF NOT EXISTS schedules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_schedules_user_date_time ON schedules (username, date, time);
+CREATE TABLE IF NOT EXISTS personas (
+    username TEXT PRIMARY KEY,
+    settings TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chat_search_indexes (
+    username TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chat_search_deltas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chat_search_deltas_username ON chat_search_deltas (username, id);
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    username TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS data_versions (
+    username TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (username, kind)
+);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    하나의 SQLite 데이터베이스 파일에 모든 사용자 데이터를 저장하는 백엔드입니다.
+    WAL 모드와 공유 커넥션 풀을 사용하여 여러 세션이 동시에 읽고 쓸 수 있고,
+    모든 변경은 트랜잭션으로 처리되어 동시 저장 시에도 서로의 변경을 덮어쓰지 않습니다.
+    """
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, pool_size=SQLITE_POOL_SIZE):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(None) # 커넥션은 처음 필요할 때 만듭니다.
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False, # 풀에서 꺼낸 커넥션은 한 번에 한 스레드만 사용합니다.
+            isolation_level=None, # 트랜잭션은 _transaction 에서 직접 관리합니다.
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """풀에서 커넥션을 빌려 오고, 사용이 끝나면 반납합니다."""
+        conn = self._pool.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    @contextmanager
+    def _transaction(self):
+        """쓰기 트랜잭션을 시작합니다. (BEGIN IMMEDIATE 로 쓰기 잠금을 먼저 확보)"""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _bump_version(self, conn, username, kind):
+        conn.execute(
+            "INSERT INTO data_versions (username, kind, version) VALUES (?, ?, 1) "
+            "ON CONFLICT (username, kind) DO UPDATE SET version = version + 1",
+            (username, kind),
+        )
+
+    def close(self):
+        """풀에 있는 모든 커넥션을 닫습니다."""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                return
+            if conn is not None:
+                conn.close()
+
+    # --- 사용자 계정 ---
+    def get_password_hash(self, username):
+        with self._connection() as conn:
+            row = conn.execute("SELECT password_hash FROM users WHERE username = ?", (username,)).fetchone()
+        return row["password_hash"] if row else None
+
+    def create_user(self, username, password_hash):
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO users (username, password_hash) VALUES (?, ?)",
+                (username, password_hash),
+            )
+            return cursor.rowcount == 1
+
+    def list_usernames(self):
+        with self._connection() as conn:
+            return [row["username"] for row in conn.execute("SELECT username FROM users ORDER BY username")]
+
+    # --- 채팅 기록 ---
+    @staticmethod
+    def _chat_entry(row):
+        entry = {"질문": row["question"], "답변": row["answer"]}
+        if row["timestamp"]:
+            entry["timestamp"] = row["timestamp"]
+        return entry
+
+    def load_chats(self, username):
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT question, answer, timestamp FROM chats WHERE username = ? ORDER BY id",
+                (username,),
+            ).fetchall()
+        return [self._chat_entry(row) for row in rows]
+
+    def count_chats(self, username):
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM chats WHERE username = ?", (username,)).fetchone()[0]
+
+    def load_chat_page(self, username, offset, limit):
+        with self._connection() as conn:
+            rows = conn.execute(
+                # 페이지는 다른 조회와 같이 추가된 순서 기준입니다. (시각은 시계 조정이나 이전된 데이터로 뒤바뀔 수 있음)
+                "SELECT question, answer, timestamp FROM chats WHERE username = ? "
+                "ORDER BY id DESC LIMIT ? OFFSET ?",
+                (username, limit, offset),
+            ).fetchall()
+        return [self._chat_entry(row) for row in reversed(rows)]
+
+    def load_chat_records_from(self, username, start):
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id, question, answer, timestamp FROM chats WHERE username = ? ORDER BY id LIMIT -1 OFFSET ?",
+                (username, start),
+            ).fetchall()
+        return [(row["id"], self._chat_entry(row)) for row in rows]
+
+    def load_chats_by_ref(self, username, refs):
+        refs = list(refs)
+        if not refs:
+            return []
+        with self._connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, question, answer, timestamp FROM chats WHERE username = ? "
+                f"AND id IN ({', '.join('?' * len(refs))})",
+                (username, *refs),
+            ).fetchall()
+        by_id = {row["id"]: self._chat_entry(row) for row in rows}
+        return [by_id.get(ref) for ref in refs]
+
+    def append_chat(self, username, entry):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO chats (username, timestamp, question, answer) VALUES (?, ?, ?, ?)",
+                (username, entry.get("timestamp", ""), entry["질문"], entry["답변"]),
+            )
+            self._bump_version(conn, username, CHATS)
+
+    def clear_chats(self, username):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM chats WHERE username = ?", (username,))
+            self._bump_version(conn, username, CHATS)
+
+    # --- 대화 검색 색인 ---
+    def load_search_index(self, username):
+        with self._connection() as conn:
+            row = conn.execute("SELECT data FROM chat_search_indexes WHERE username = ?", (username,)).fetchone()
+            deltas = conn.execute(
+                "SELECT data FROM chat_search_deltas WHERE username = ? ORDER BY id", (username,)
+            ).fetchall()
+        return (json.loads(row["data"]) if row else None), [json.loads(delta["data"]) for delta in deltas]
+
+    def save_search_index(self, username, data):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO chat_search_indexes (username, data) VALUES (?, ?) "
+                "ON CONFLICT (username) DO UPDATE SET data = excluded.data",
+                (username, json.dumps(data, ensure_ascii=False, separators=(",", ":"))),
+            )
+            conn.execute("DELETE FROM chat_search_deltas WHERE username = ?", (username,))
+
+    def append_search_index(self, username, deltas):
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO chat_search_deltas (username, data) VALUES (?, ?)",
+                [(username, json.dumps(delta, ensure_ascii=False, separators=(",", ":"))) for delta in deltas],
+            )
+
+    # --- 누적 대화 요약 ---
+    def load_conversation_summary(self, username):
+        with self._connection() as conn:
+            row = conn.execute("SELECT data FROM conversation_summaries WHERE username = ?", (username,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def save_conversation_summary(self, username, data):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO conversation_summaries (username, data) VALUES (?, ?) "
+                "ON CONFLICT (username) DO UPDATE SET data = excluded.data",
+                (username, json.dumps(data, ensure_ascii=False)),
+            )
+
+    # --- 일정 ---
+    def load_schedules(self, username):
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id, date, time, event FROM schedules WHERE username = ? ORDER BY id",
+                (username,),
+            ).fetchall()
+        return [
+            {"id": str(row["id"]), "date": row["date"], "time": row["time"], "event": row["event"]}
+            for row in rows
+        ]
+
+    def save_schedules(self, username, schedules):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM schedules WHERE username = ?", (username,))
+            conn.executemany(
+                "INSERT INTO schedules (username, date, time, event) VALUES (?, ?, ?, ?)",
+                [(username, s["date"], s["time"], s["event"]) for s in schedules],
+            )
+            self._bump_version(conn, username, SCHEDULES)
+
+    def apply_schedule_changes(self, username, inserts=(), updates=(), deletes=()):
+        with self._transaction() as conn:
+            if deletes:
+                conn.executemany(
+                    "DELETE FROM schedules WHERE id = ? AND username = ?",
+                    [(int(schedule_id), username) for schedule_id in deletes],
+                )
+            if updates:
+                conn.executemany(
+                    "UPDATE schedules SET date = ?, time = ?, event = ? WHERE id = ? AND username = ?",
+                    [(s["date"], s["time"], s["event"], int(s["id"]), username) for s in updates],
+                )
+            if inserts:
+                conn.executemany(
+                    "INSERT INTO schedules (username, date, time, event) VALUES (?, ?, ?, ?)",
+                    [(username, s["date"], s["time"], s["event"]) for s in inserts],
+                )
+            self._bump_version(conn, username, SCHEDULES)
+
+    # --- AI 페르소나 ---
+    def load_persona(self, username):
+        with self._connection() as conn:
+            row = conn.execute("SELECT settings FROM personas WHERE username = ?", (username,)).fetchone()
+        return json.loads(row["settings"]) if row else {}
+
+    def save_persona(self, username, persona):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO personas (username, settings) VALUES (?, ?) "
+                "ON CONFLICT (username) DO UPDATE SET settings = excluded.settings",
+                (username, json.dumps(persona, ensure_ascii=False)),
+            )
+            self._bump_version(conn, username, PERSONA)
+
+    # --- 변경 감지 ---
+    def data_version(self, username, kind):
+        with self._connection() as conn:
+            row = conn.execute(
+                "SELECT version FROM data_versions WHERE username = ? AND kind = ?", (username, kind)
+            ).fetchone()
+        return row["version"] if row else 0
+
+
+def create_backend(kind=None, sqlite_path=None, base_dir="."):
+    """설정(인자 또는 STORAGE_BACKEND / SQLITE_PATH 환경 변수)에 맞는 저장소 백엔드를 만듭니다."""
+    kind = (kind or os.environ.get("STORAGE_BACKEND", "json")).lower()
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path or os.environ.get("SQLITE_PATH", DEFAULT_SQLITE_PATH))
+    if kind == "json":
+        return JsonFileBackend(base_dir)
+    raise ValueError(f"알 수 없는 저장소 백엔드입니다: {kind}")
+
+
+# --- JSON 파일 -> SQLite 이전 도구 ---
+def migrate_json_to_sqlite(source, target):
+    """
+    JsonFileBackend(source) 의 모든 사용자 데이터를 SQLiteBackend(target) 로 복사합니다.
+    이미 target 에 있는 사용자의 계정 정보는 유지하고, 데이터는 source 의 내용으로 덮어씁니다.
+    """
+    users = source.load_users()
+    for username, password_hash in users.items():
+        target.create_user(username, password_hash)
+        with target._transaction() as conn:
+            conn.execute("DELETE FROM chats WHERE username = ?", (username,))
+            conn.executemany(
+                "INSERT INTO chats (username, timestamp, question, answer) VALUES (?, ?, ?, ?)",
+                [
+                    (username, entry.get("timestamp", ""), entry.get("질문", ""), entry.get("답변", ""))
+                    for entry in source.load_chats(username)
+                ],
+            )
+            target._bump_version(conn, username, CHATS)
+        target.save_schedules(username, source.load_schedules(username))
+        persona = source.load_persona(username)
+        if persona:
+            target.save_persona(username, persona)
+    return len(users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 파일 사용자 데이터를 SQLite 데이터베이스로 이전합니다.")
+    parser.add_argument("--source", default=".", help="users.json 등 JSON 파일이 있는 디렉터리")
+    parser.add_argument("--db", default=DEFAULT_SQLITE_PATH, help="대상 SQLite 데이터베이스 파일 경로")
+    args = parser.parse_args()
+
+    target = SQLiteBackend(args.db)
+    try:
+        count = migrate_json_to_sqlite(JsonFileBackend(args.source), target)
+    finally:
+        target.close()
+    print(f"{count}명의 사용자 데이터를 {args.db} 로 이전했습니다.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- 문서 전체 맵-리듀스 요약 ---
+# 긴 문서를 토큰 예산에 맞는 구간(chunk)으로 나누어 동시에 요약(map)하고,
+# 부분 요약들을 다시 합쳐(reduce) 최종 요약에 사용할 컨텍스트를 만듭니다.
+CHUNK_TOKENS = 2000 # 구간 하나에 담을 최대 토큰 수 (llama3-8b-8192 컨텍스트 기준)
+REDUCE_TOKENS = 3000 # 최종 요약 요청에 넣을 부분 요약들의 최대 토큰 수
+PARTIAL_SUMMARY_TOKENS = 256 # 구간 요약 하나의 최대 출력 토큰 수
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 30
+
+MAP_INSTRUCTION = "아래 문서 구간의 핵심 내용을 빠짐없이 3~5문장으로 요약해 주세요."
+REDUCE_INSTRUCTION = "아래는 한 문서의 구간별 요약입니다. 중복을 제거하고 하나의 요약으로 5~7문장 이내로 정리해 주세요."
+
+_HANGUL_RE = re.compile(r"[ᄀ-ᇿ㄰-㆏가-힣]")
+
+
+def estimate_tokens(text):
+    """
+    외부 토크나이저 없이 토큰 수를 대략 추정합니다.
+    한글은 글자당 약 1토큰, 그 외 문자는 4글자당 약 1토큰으로 계산합니다.
+    """
+    if not text:
+        return 0
+    hangul = len(_HANGUL_RE.findall(text))
+    return hangul + (len(text) - hangul + 3) // 4
+
+
+def iter_chunks(lines, max_tokens=CHUNK_TOKENS):
+    """
+    줄들을 문단(줄) 경계를 최대한 지키면서 max_tokens 이하의 구간으로 묶어, 구간이 완성되는 대로 yield 합니다.
+    lines 는 PDF 페이지 추출처럼 아직 끝나지 않은 스트림이어도 됩니다.
+    """
+    current = []
+    current_tokens = 0
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        line_tokens = estimate_tokens(line)
+        if line_tokens > max_tokens:
+            # 한 줄이 예산보다 길면 글자 수 기준으로 잘라서 넣습니다.
+            if current:
+                yield "\n".join(current)
+            current, current_tokens = [], 0
+            step = max(1, len(line) * max_tokens // line_tokens)
+            for start in range(0, len(line), step):
+                yield line[start:start + step]
+            continue
+        if current_tokens + line_tokens > max_tokens:
+            yield "\n".join(current)
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        yield "\n".join(current)
+
+
+def split_into_chunks(text, max_tokens=CHUNK_TOKENS):
+    """텍스트를 문단(줄) 경계를 최대한 지키면서 max_tokens 이하의 구간 목록으로 나눕니다."""
+    return list(iter_chunks(text.splitlines(), max_tokens))
+
+
+class RateLimiter:
+    """여러 스레드가 공유하는 요청 간격 제한기입니다. (분당 requests_per_minute 회)"""
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """다음 요청을 보내도 되는 시점까지 대기합니다."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            scheduled = max(now, self._next_time)
+            self._next_time = scheduled + self.interval
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+
+def _is_rate_limited(error):
+    """429 (Too Many Requests) 응답으로 인한 예외인지 확인합니다."""
+    return getattr(error, "status_code", None) == 429
+
+
+def _retry_after(error):
+    """응답 헤더의 retry-after 값(초)을 반환합니다. 없으면 None 을 반환합니다."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(fn, max_retries=5, base_delay=1.0, max_delay=30.0):
+    """fn() 을 호출하고, 429 응답이면 지수 백오프(+지터)로 재시도합니다."""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if not _is_rate_limited(e) or attempt == max_retries:
+                raise
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * (2 ** attempt)) * (0.5 + random.random() / 2)
+            time.sleep(delay)
+
+
+def _summarizer(complete, instruction, limiter):
+    """구간 하나를 요약하는 함수(요청 간격 제한, 429 재시도 포함)를 반환합니다."""
+    def summarize(doc_text):
+        def request():
+            limiter.wait()
+            return complete(instruction, doc_text, PARTIAL_SUMMARY_TOKENS)
+        return call_with_retry(request)
+    return summarize
+
+
+def _summarize_all(texts, complete, instruction, concurrency, limiter):
+    """texts 의 각 항목을 동시에 요약하여 같은 순서의 요약 목록을 반환합니다."""
+    summarize = _summarizer(complete, instruction, limiter)
+    if len(texts) == 1:
+        return [summarize(texts[0])]
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(texts)))) as executor:
+        return list(executor.map(summarize, texts))
+
+
+def _reduce(partials, complete, chunk_tokens, reduce_tokens, concurrency, limiter):
+    """부분 요약들이 예산을 넘으면 묶음 단위로 다시 요약합니다. (트리 형태)"""
+    while True:
+        combined = "\n\n".join(partials)
+        if estimate_tokens(combined) <= reduce_tokens or len(partials) == 1:
+            return combined
+        groups = split_into_chunks("\n".join(partials), chunk_tokens)
+        if len(groups) >= len(partials):
+            # 더 이상 줄어들지 않으면 (부분 요약 하나가 너무 큰 경우) 앞부분만 사용합니다.
+            return combined[:reduce_tokens * 4]
+        partials = _summarize_all(groups, complete, REDUCE_INSTRUCTION, concurrency, limiter)
+
+
+def condense_document(text, complete, chunk_tokens=CHUNK_TOKENS, reduce_tokens=REDUCE_TOKENS,
+                      concurrency=DEFAULT_CONCURRENCY, limiter=None, on_progress=None):
+    """
+    문서 전체를 reduce_tokens 이하의 요약 컨텍스트로 압축합니다.
+    complete(instruction, doc_text, max_tokens) 는 LLM 을 호출해 문자열을 반환하는 함수입니다.
+    limiter 는 같은 API 키로 요청하는 모든 작업이 공유하는 RateLimiter 입니다. (없으면 간격을 제한하지 않음)
+    문서가 이미 예산 안에 들어가면 API 를 호출하지 않고 원문을 그대로 반환합니다.
+    on_progress(done, total) 로 단계별 진행 상황을 전달합니다.
+    """
+    return condense_pages([text], complete, chunk_tokens, reduce_tokens, concurrency, limiter, on_progress)
+
+
+def condense_pages(pages, complete, chunk_tokens=CHUNK_TOKENS, reduce_tokens=REDUCE_TOKENS,
+                   concurrency=DEFAULT_CONCURRENCY, limiter=None, on_progress=None):
+    """
+    페이지 텍스트를 받는 대로 구간으로 나누어 요약(map) 요청을 시작하고, 모두 끝나면 부분 요약을 합칩니다(reduce).
+    pages 는 PDF 추출 스트림(iter_pdf_pages)처럼 페이지를 하나씩 내놓는 iterable 이며, 추출이 끝나기 전에 map 단계가 진행됩니다.
+    문서가 reduce_tokens 를 넘는 것이 확인되기 전까지는 요청하지 않으므로, 짧은 문서는 API 를 호출하지 않고 원문을 반환합니다.
+    on_progress(done, total) 의 total 은 지금까지 만들어진 구간 수입니다.
+    """
+    limiter = limiter or RateLimiter(None)
+    summarize = _summarizer(complete, MAP_INSTRUCTION, limiter)
+    texts = []
+
+    def lines():
+        for page in pages:
+            texts.append(page)
+            yield from page.splitlines()
+
+    pending = [] # 예산을 넘는지 확인하기 전까지 보관하는 구간
+    pending_tokens = 0
+    futures = []
+    executor = None
+    try:
+        for chunk in iter_chunks(lines(), chunk_tokens):
+            if executor is None:
+                pending.append(chunk)
+                pending_tokens += estimate_tokens(chunk)
+                if pending_tokens <= reduce_tokens:
+                    continue
+                executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+                futures = [executor.submit(summarize, c) for c in pending]
+            else:
+                futures.append(executor.submit(summarize, chunk))
+            if on_progress:
+                on_progress(sum(f.done() for f in futures), len(futures))
+        if executor is None:
+            return "\n".join(texts).strip()
+
+        partials = []
+        for future in futures:
+            partials.append(future.result())
+            if on_progress:
+                on_progress(len(partials), len(futures))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+    return _reduce(partials, complete, chunk_tokens, reduce_tokens, concurrency, limiter)
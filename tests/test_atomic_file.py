@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+import atomic_file
+from atomic_file import write_atomic
+
+
+def test_writes_text_and_bytes(tmp_path):
+    path = str(tmp_path / "data.json")
+    write_atomic(path, '{"a": "가"}')
+    assert open(path, encoding="utf-8").read() == '{"a": "가"}'
+    write_atomic(path, b"raw", fsync=True)
+    assert open(path, "rb").read() == b"raw"
+    assert os.listdir(tmp_path) == ["data.json"]
+
+
+def test_failed_replace_keeps_original_and_removes_tmp(tmp_path, monkeypatch):
+    path = str(tmp_path / "data.json")
+    write_atomic(path, "old")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(atomic_file.os, "replace", fail)
+    with pytest.raises(OSError):
+        write_atomic(path, "new")
+    assert open(path, encoding="utf-8").read() == "old"
+    assert os.listdir(tmp_path) == ["data.json"]
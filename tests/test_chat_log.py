@@ -0,0 +1,150 @@
+import json
+import os
+import time
+
+import pytest
+
+import chat_log
+from chat_log import ChatLog
+
+
+def entry(i):
+    return {"질문": f"질문 {i}", "답변": "답변 " * (i % 7), "timestamp": f"2025-01-01T00:00:{i % 60:02d}"}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "chat_history_alice.jsonl")
+
+
+def test_tail_across_block_boundaries(path, monkeypatch):
+    monkeypatch.setattr(chat_log, "TAIL_BLOCK_SIZE", 37) # 줄 길이보다 작은 블록으로 줄이 블록 경계에 걸치게 합니다.
+    log = ChatLog(path)
+    entries = [entry(i) for i in range(50)]
+    for e in entries:
+        log.append(e)
+
+    assert log.tail(1) == entries[-1:]
+    assert log.tail(17) == entries[-17:]
+    assert log.tail(100) == entries
+    assert log.page(10, 5) == entries[35:40]
+    records = log.records_from(20)
+    assert [record for _, record in records] == entries[20:]
+    assert log.read_at([offset for offset, _ in records]) == entries[20:]
+
+
+def test_torn_last_line_is_skipped_and_not_joined(path):
+    log = ChatLog(path)
+    log.append(entry(0))
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b'{"\xec\xa7\x88\xeb\xac\xb8": "\xeb\x81\x8a') # 쓰기 도중 중단된 줄
+
+    reopened = ChatLog(path)
+    assert reopened.load() == [entry(0)]
+    assert reopened.tail(5) == [entry(0)]
+    reopened.append(entry(1))
+    assert reopened.load() == [entry(0), entry(1)]
+    assert ChatLog(path).count() == 2
+
+
+def test_clear_then_compaction(path):
+    log = ChatLog(path, compact_bytes=10**9)
+    for i in range(5):
+        log.append(entry(i))
+    log.clear()
+    log.append(entry(5))
+    assert log.load() == [entry(5)]
+    assert log.tail(10) == [entry(5)]
+    assert log.count() == 1
+    assert log.count_lines() == 7
+
+    log.compact()
+    assert log.count_lines() == 1
+    log.append(entry(6))
+    assert ChatLog(path).load() == [entry(5), entry(6)]
+
+
+def test_clear_triggers_background_compaction(path):
+    log = ChatLog(path, compact_bytes=200)
+    for i in range(10):
+        log.append(entry(i))
+    log.clear()
+    log.append(entry(10))
+    deadline = time.monotonic() + 5
+    while log.count_lines() > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert log.count_lines() == 1
+    assert log.load() == [entry(10)]
+
+
+def test_legacy_json_migration(tmp_path, path):
+    legacy = str(tmp_path / "chat_history_alice.json")
+    entries = [entry(i) for i in range(3)]
+    with open(legacy, "w", encoding="utf-8") as f:
+        json.dump(entries, f, ensure_ascii=False)
+
+    log = ChatLog(path, legacy_json_path=legacy)
+    assert log.load() == entries
+    assert not os.path.exists(legacy)
+    assert os.path.exists(f"{legacy}.migrated")
+    # 이미 이전했으면 다시 이전하지 않습니다.
+    ChatLog(path, legacy_json_path=legacy).append(entry(3))
+    assert ChatLog(path).load() == entries + [entry(3)]
+
+
+def test_single_append_is_synced_after_interval(path, monkeypatch):
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(chat_log.os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+    log = ChatLog(path, fsync_every=100, fsync_interval=0.05)
+    log.append(entry(0))
+    assert log._pending == 1
+
+    deadline = time.monotonic() + 5
+    while log._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert log._pending == 0
+    assert len(synced) == 1
+    assert log._file is None # fsync 한 뒤에는 파일 핸들을 닫습니다.
+    assert log not in chat_log._open_logs
+    log.close()
+
+
+def test_sync_every_n_records(path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(chat_log.os, "fsync", lambda fd: synced.append(fd))
+    log = ChatLog(path, fsync_every=3, fsync_interval=60)
+    for i in range(7):
+        log.append(entry(i))
+    assert len(synced) == 2
+    assert log._pending == 1
+    log.close()
+    assert len(synced) == 3
+
+
+def test_handle_is_closed_once_records_are_synced(path):
+    log = ChatLog(path, fsync_every=2, fsync_interval=60)
+    log.append(entry(0))
+    assert log._file is not None and log in chat_log._open_logs
+    log.append(entry(1))
+    assert log._file is None and log not in chat_log._open_logs
+    log.append(entry(2)) # 다시 열어 이어 씁니다.
+    log.close()
+    assert log.load() == [entry(0), entry(1), entry(2)]
+
+
+def test_backend_bounds_and_closes_cached_logs(tmp_path):
+    from storage import JsonFileBackend
+
+    backend = JsonFileBackend(str(tmp_path))
+    backend._chat_logs.max_items = 3
+    logs = []
+    for i in range(10):
+        backend.append_chat(f"user{i}", entry(i))
+        logs.append(backend.chat_log(f"user{i}"))
+    assert len(backend._chat_logs) == 3
+    assert all(log._file is None for log in logs[:-3]) # 제거된 로그는 닫혔습니다.
+    assert backend.load_chats("user0") == [entry(0)]
+    for log in logs:
+        log.close()
@@ -0,0 +1,110 @@
+import os
+import time
+from datetime import date
+
+import pytest
+
+from chat_search import ChatSearchIndex
+from storage import create_backend
+from user_store import UserDataStore
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    backend = create_backend(request.param, sqlite_path=str(tmp_path / "assistant.db"), base_dir=str(tmp_path))
+    return UserDataStore("alice", backend)
+
+
+def append(store, question, answer="답변", timestamp="2025-01-01T09:00:00"):
+    store.append_chat({"질문": question, "답변": answer, "timestamp": timestamp})
+
+
+def fill(store, count):
+    for i in range(count):
+        append(store, f"일반 질문 {i}", timestamp=f"2025-01-{i % 28 + 1:02d}T09:00:00")
+
+
+def wait_saved(index):
+    while index._saving:
+        time.sleep(0.01)
+
+
+def test_ranked_and_date_filtered_results(store):
+    fill(store, 30)
+    append(store, "예산 보고서 검토", "다음 주 예산 보고서를 검토합니다.", "2025-03-10T10:00:00")
+    append(store, "보고서 형식", "보고서 형식을 정리합니다.", "2025-04-01T10:00:00")
+    index = ChatSearchIndex()
+
+    results = index.search(store, "예산 보고서")
+    assert results[0]["entry"]["질문"] == "예산 보고서 검토"
+    dated = index.search(store, "보고서", date(2025, 4, 1), date(2025, 4, 30))
+    assert [r["entry"]["질문"] for r in dated] == ["보고서 형식"]
+
+
+def test_search_reads_only_candidate_entries(store):
+    fill(store, 200)
+    append(store, "고양이 사료")
+    index = ChatSearchIndex()
+    index.sync(store)
+
+    calls = []
+    store.chat_records_from = lambda start: calls.append(start) or []
+    read = []
+    by_ref = store.chats_by_ref
+    store.chats_by_ref = lambda refs: read.extend(refs) or by_ref(refs)
+
+    results = index.search(store, "고양이")
+    assert [r["position"] for r in results] == [200]
+    assert calls == [] # 기록 수가 그대로면 로그를 다시 읽지 않습니다.
+    assert len(read) == 1
+
+
+def test_appends_are_saved_as_deltas_and_reloaded(store):
+    fill(store, 10)
+    index = ChatSearchIndex()
+    index.sync(store)
+    wait_saved(index)
+    append(store, "새로운 강아지")
+    index.notify_append(store)
+    wait_saved(index)
+
+    snapshot, deltas = store.backend.load_search_index("alice")
+    assert len(snapshot["docs"]) == 10
+    assert [delta["doc"] for delta in deltas] == [10]
+
+    reloaded = ChatSearchIndex()
+    reloaded._load(store)
+    assert len(reloaded.docs) == 11
+    assert reloaded._unsaved == [] # 변경분에서 복원했으므로 다시 색인하지 않았습니다.
+    assert reloaded.search(store, "강아지")[0]["position"] == 10
+
+
+def test_cleared_history_rebuilds_index(store):
+    fill(store, 5)
+    index = ChatSearchIndex()
+    index.sync(store)
+    wait_saved(index)
+    store.clear_chat_history()
+    append(store, "다른 기록")
+
+    reloaded = ChatSearchIndex()
+    assert reloaded.search(store, "일반") == []
+    assert len(reloaded.docs) == 1
+
+
+def test_compaction_relocates_refs(tmp_path):
+    backend = create_backend("json", base_dir=str(tmp_path))
+    store = UserDataStore("alice", backend)
+    fill(store, 5)
+    store.clear_chat_history()
+    fill(store, 3)
+    append(store, "고양이")
+    index = ChatSearchIndex()
+    index.sync(store)
+    refs = [ref for _, _, ref in index.docs]
+
+    backend.chat_log("alice").compact() # 초기화 이전 기록이 지워져 파일 오프셋이 바뀝니다.
+    assert os.path.getsize(backend.chat_log_path("alice")) > 0
+    results = index.search(store, "고양이")
+    assert [r["entry"]["질문"] for r in results] == ["고양이"]
+    assert [ref for _, _, ref in index.docs] != refs
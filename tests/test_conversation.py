@@ -0,0 +1,72 @@
+import pytest
+
+from conversation import KEEP_TURNS, MAX_HISTORY_TURNS, ConversationMemory
+from storage import create_backend
+from user_store import UserDataStore
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    backend = create_backend(request.param, sqlite_path=str(tmp_path / "assistant.db"), base_dir=str(tmp_path))
+    return UserDataStore("alice", backend)
+
+
+def fill(store, start, count):
+    for i in range(start, start + count):
+        store.append_chat({"질문": f"질문 {i}", "답변": f"답변 {i}", "timestamp": f"2025-01-01T09:{i:02d}:00"})
+
+
+def fake_complete(calls):
+    def complete(messages, max_tokens):
+        calls.append(messages[-1]["content"])
+        return f"요약 {len(calls)}"
+    return complete
+
+
+def test_summary_is_restored_by_a_new_memory(store):
+    fill(store, 0, MAX_HISTORY_TURNS)
+    calls = []
+    memory = ConversationMemory()
+    assert memory.fold(store, fake_complete(calls)) == "요약 1"
+
+    restored = ConversationMemory() # 서버 재시작 또는 레지스트리에서 제거된 뒤
+    summary, turns = restored.context(store)
+    assert summary == "요약 1"
+    assert restored.covered == MAX_HISTORY_TURNS - KEEP_TURNS
+    assert [turn["질문"] for turn in turns] == [f"질문 {i}" for i in range(MAX_HISTORY_TURNS - KEEP_TURNS, MAX_HISTORY_TURNS)]
+
+    # 이어서 요약할 때 이미 요약한 턴은 다시 보내지 않습니다.
+    fill(store, MAX_HISTORY_TURNS, MAX_HISTORY_TURNS)
+    restored.fold(store, fake_complete(calls))
+    assert "질문 0\n" not in calls[-1]
+    assert "[기존 요약]\n요약 1" in calls[-1]
+
+
+def test_summary_saved_before_clear_is_discarded(store):
+    fill(store, 0, MAX_HISTORY_TURNS)
+    ConversationMemory().fold(store, fake_complete([]))
+    store.clear_chat_history() # 다른 프로세스에서 초기화되어 reset() 이 호출되지 않은 경우
+    fill(store, 50, MAX_HISTORY_TURNS)
+
+    summary, _ = ConversationMemory().context(store)
+    assert summary == ""
+
+
+def test_reset_clears_saved_summary(store):
+    fill(store, 0, MAX_HISTORY_TURNS)
+    memory = ConversationMemory()
+    memory.fold(store, fake_complete([]))
+    memory.reset(store)
+    assert ConversationMemory().context(store)[0] == ""
+
+
+def test_fold_is_scheduled_once_until_it_runs(store):
+    fill(store, 0, MAX_HISTORY_TURNS)
+    memory = ConversationMemory()
+    assert memory.schedule_fold(store)
+    fill(store, MAX_HISTORY_TURNS, 1)
+    assert not memory.schedule_fold(store) # 제출한 요약이 아직 실행되지 않았습니다.
+    memory.fold(store, fake_complete([]))
+    assert not memory.schedule_fold(store) # 요약되지 않은 턴이 KEEP_TURNS 만 남았습니다.
+    fill(store, MAX_HISTORY_TURNS + 1, MAX_HISTORY_TURNS)
+    assert memory.schedule_fold(store)
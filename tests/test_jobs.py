@@ -0,0 +1,41 @@
+import os
+import time
+
+import jobs
+from jobs import DONE, JobManager
+
+
+def wait_done(manager, job_id):
+    deadline = time.monotonic() + 5
+    while not manager.get(job_id).finished_state and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return manager.get(job_id)
+
+
+def test_persisted_result_is_reloaded(tmp_path):
+    manager = JobManager(max_workers=1, result_dir=str(tmp_path))
+    job_id = manager.submit("analysis", lambda job: {"답": 1}, persist=True)
+    assert wait_done(manager, job_id).status == DONE
+    manager.shutdown(wait=True)
+
+    restarted = JobManager(max_workers=1, result_dir=str(tmp_path))
+    assert restarted.get(job_id).result == {"답": 1}
+    restarted.shutdown(wait=True)
+
+
+def test_expired_result_files_are_pruned(tmp_path, monkeypatch):
+    old = time.time() - 2 * 60 * 60
+    for name in ["aaaa.json", "bbbb.json.1.2.tmp"]:
+        path = tmp_path / name
+        path.write_text("{}")
+        os.utime(path, (old, old))
+    (tmp_path / "cccc.json").write_text("{}")
+
+    manager = JobManager(max_workers=1, result_dir=str(tmp_path), result_ttl=60 * 60) # 시작할 때 정리
+    assert sorted(os.listdir(tmp_path)) == ["cccc.json"]
+
+    os.utime(tmp_path / "cccc.json", (old, old))
+    monkeypatch.setattr(jobs, "FILE_PRUNE_INTERVAL", 0) # 다음 제출 때 다시 정리
+    wait_done(manager, manager.submit("analysis", lambda job: None))
+    assert os.listdir(tmp_path) == []
+    manager.shutdown(wait=True)
@@ -0,0 +1,47 @@
+import os
+import threading
+
+import llm_cache
+from llm_cache import ResponseCache
+
+
+def test_disk_hit_after_memory_eviction(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), max_memory_items=1)
+    cache.set("aa01", "첫 응답")
+    cache.set("aa02", "둘째 응답") # 메모리에서는 aa01 이 밀려납니다.
+    assert cache.get("aa01") == "첫 응답"
+    assert cache.get("zz99") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_disk_limit_removes_oldest_files(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), max_disk_bytes=2000)
+    for i in range(20):
+        path = cache._path(f"aa{i:02d}")
+        cache.set(f"aa{i:02d}", "x" * 200)
+        os.utime(path, (1000 + i, 1000 + i)) # 먼저 저장한 항목일수록 오래된 파일
+    assert cache.stats()["disk_bytes"] <= 2000
+    files = os.listdir(os.path.join(str(tmp_path), "aa"))
+    assert "aa19.json" in files and "aa00.json" not in files
+
+
+def test_disk_read_does_not_block_memory_hits(tmp_path, monkeypatch):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    cache.set("aa01", "메모리 응답")
+    reading = threading.Event()
+    release = threading.Event()
+    real_read = ResponseCache._read_disk
+
+    def slow_read(self, key):
+        reading.set()
+        release.wait(5)
+        return real_read(self, key)
+
+    monkeypatch.setattr(llm_cache.ResponseCache, "_read_disk", slow_read)
+    thread = threading.Thread(target=cache.get, args=("bb01",))
+    thread.start()
+    assert reading.wait(5)
+    assert cache.get("aa01") == "메모리 응답" # 느린 디스크 조회가 진행 중이어도 바로 반환됩니다.
+    release.set()
+    thread.join()
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+
+import summarizer
+from model_router import TASK_CHAT, AllModelsFailed, ModelRouter
+
+ROUTES = {TASK_CHAT: ["model-a", "model-b"]}
+
+
+class RateLimited(Exception):
+    """groq.RateLimitError 처럼 status_code 와 response(헤더) 를 가진 오류입니다."""
+
+    status_code = 429
+
+    class response:
+        headers = {"retry-after": "0"}
+
+
+def test_all_models_failed_keeps_status_code_of_last_error():
+    router = ModelRouter(routes=ROUTES)
+
+    def fail(model):
+        raise RateLimited(model)
+
+    with pytest.raises(AllModelsFailed) as info:
+        router.complete(TASK_CHAT, 100, fail)
+    assert info.value.status_code == 429
+    assert info.value.response is RateLimited.response
+    assert isinstance(info.value.__cause__, RateLimited)
+
+
+def test_call_with_retry_retries_rate_limited_router(monkeypatch):
+    monkeypatch.setattr(summarizer.time, "sleep", lambda seconds: None)
+    router = ModelRouter(routes=ROUTES)
+    calls = []
+
+    def create(model):
+        calls.append(model)
+        if len(calls) <= 4: # 처음 두 번의 라우터 호출은 두 모델 모두 429
+            raise RateLimited(model)
+        return f"ok from {model}"
+
+    model, answer = summarizer.call_with_retry(lambda: router.complete(TASK_CHAT, 100, create))
+    assert (model, answer) == ("model-a", "ok from model-a")
+    assert calls == ["model-a", "model-b"] * 2 + ["model-a"]
+
+
+def test_other_errors_are_not_retried(monkeypatch):
+    monkeypatch.setattr(summarizer.time, "sleep", lambda seconds: None)
+    router = ModelRouter(routes=ROUTES)
+    calls = []
+
+    def create(model):
+        calls.append(model)
+        raise ValueError("bad request")
+
+    with pytest.raises(AllModelsFailed) as info:
+        summarizer.call_with_retry(lambda: router.complete(TASK_CHAT, 100, create))
+    assert info.value.status_code is None
+    assert calls == ["model-a", "model-b"]
+
+
+class FakeStream:
+    """close() 여부를 기록하는 groq Stream 대용입니다."""
+
+    def __init__(self, parts, delay=0.0):
+        self.parts = parts
+        self.delay = delay
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.closed = True
+
+    def __iter__(self):
+        time.sleep(self.delay)
+        yield from self.parts
+
+
+def open_with(streams):
+    def open_model_stream(model):
+        with streams[model] as stream:
+            yield from stream
+    return open_model_stream
+
+
+def test_hedge_loser_stream_is_closed():
+    router = ModelRouter(routes=ROUTES, default_hedge_delay=0.01)
+    streams = {"model-a": FakeStream(["slow"], delay=0.3), "model-b": FakeStream(["fast", "!"])}
+
+    assert list(router.stream(TASK_CHAT, 100, open_with(streams))) == ["fast", "!"]
+    assert streams["model-b"].closed
+    deadline = time.monotonic() + 2
+    while not streams["model-a"].closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert streams["model-a"].closed
+
+
+def test_abandoned_stream_is_closed():
+    router = ModelRouter(routes=ROUTES)
+    streams = {"model-a": FakeStream(["a", "b", "c"])}
+
+    iterator = router.stream(TASK_CHAT, 100, open_with(streams))
+    assert next(iterator) == "a"
+    iterator.close()
+    assert streams["model-a"].closed
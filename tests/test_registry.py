@@ -0,0 +1,45 @@
+import registry
+from registry import UserRegistry
+
+
+def test_returns_same_object_per_key():
+    users = UserRegistry(max_items=10, idle_seconds=None)
+    first = users.get("alice", object)
+    assert users.get("alice", object) is first
+    assert users.get("bob", object) is not first
+    assert len(users) == 2
+
+
+def test_evicts_least_recently_used_over_limit():
+    users = UserRegistry(max_items=2, idle_seconds=None)
+    alice = users.get("alice", object)
+    users.get("bob", object)
+    users.get("alice", object) # alice 를 최근 사용으로 갱신
+    users.get("carol", object)
+    assert len(users) == 2
+    assert users.evicted == 1
+    assert users.get("alice", object) is alice # bob 이 제거됨
+    assert users.get("bob", object) is not None
+    assert users.evicted == 2
+
+
+def test_evicts_idle_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(registry.time, "monotonic", lambda: now[0])
+    users = UserRegistry(max_items=10, idle_seconds=60)
+    alice = users.get("alice", object)
+    now[0] += 30
+    bob = users.get("bob", object)
+    now[0] += 45 # alice 는 75초, bob 은 45초 동안 사용되지 않음
+    users.get("carol", object)
+    assert len(users) == 2
+    assert users.get("bob", object) is bob
+    assert users.get("alice", object) is not alice
+
+
+def test_on_evict_receives_removed_objects():
+    closed = []
+    users = UserRegistry(max_items=1, idle_seconds=None, on_evict=closed.append)
+    alice = users.get("alice", object)
+    users.get("bob", object)
+    assert closed == [alice]
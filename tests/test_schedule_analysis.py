@@ -0,0 +1,20 @@
+from datetime import date
+
+from schedule_analysis import schedule_fingerprint
+
+
+def test_fingerprint_accepts_missing_fields():
+    schedules = [
+        {"date": "2025-01-02", "time": "09:00", "event": "회의"},
+        {"date": "2025-01-02", "time": None, "event": "산책"},
+        {"date": None, "event": "메모"},
+    ]
+    fingerprint = schedule_fingerprint(schedules, {}, date(2025, 1, 1), "model")
+    assert fingerprint == schedule_fingerprint(list(reversed(schedules)), {}, date(2025, 1, 1), "model")
+
+
+def test_fingerprint_treats_none_like_empty():
+    with_none = [{"date": "2025-01-02", "time": None, "event": "산책"}]
+    with_empty = [{"date": "2025-01-02", "time": "", "event": "산책"}]
+    today = date(2025, 1, 1)
+    assert schedule_fingerprint(with_none, {}, today, "m") == schedule_fingerprint(with_empty, {}, today, "m")
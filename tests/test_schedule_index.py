@@ -0,0 +1,32 @@
+from datetime import date
+
+from schedule_index import ScheduleIndex
+
+
+def schedule(day, event, time=""):
+    return {"date": day, "time": time, "event": event}
+
+
+def test_entries_before_window_in_same_month_are_summarized():
+    index = ScheduleIndex([
+        schedule("2025-08-20", "회의"),
+        schedule("2025-09-03", "치과"),
+        schedule("2025-09-16", "회의"),
+        schedule("2025-09-17", "운동"),
+    ])
+    summaries = index.month_summaries(before=date(2025, 9, 17))
+    assert [(s["month"], s["count"], s.get("until")) for s in summaries] == [
+        ("2025-09", 2, "2025-09-16"),
+        ("2025-08", 1, None),
+    ]
+
+    context = index.build_context(date(2025, 9, 17), date(2025, 9, 23))
+    assert "- 2025-09-17: 운동" in context
+    assert "- 2025-09-01 ~ 2025-09-16: 일정 2개 (주요: 치과 1회, 회의 1회)" in context
+    assert "- 2025-08: 일정 1개 (주요: 회의 1회)" in context
+
+
+def test_window_starting_on_first_day_has_no_partial_month():
+    index = ScheduleIndex([schedule("2025-08-31", "회의"), schedule("2025-09-01", "운동")])
+    assert [s["month"] for s in index.month_summaries(before="2025-09-01")] == ["2025-08"]
+    assert [s["month"] for s in index.month_summaries()] == ["2025-09", "2025-08"]
@@ -0,0 +1,72 @@
+from datetime import date, time
+
+import pandas as pd
+
+from schedule_table import DATE_COLUMN, EVENT_COLUMN, ID_COLUMN, TIME_COLUMN, diff_schedules, schedules_to_frame
+
+SCHEDULES = [
+    {"id": "1", "date": "2025-09-02", "time": "10:00", "event": "회의"},
+    {"id": "2", "date": "2025-09-01", "time": "", "event": "치과"},
+    {"id": "3", "date": "bad", "time": "9시", "event": "운동"},
+]
+
+
+def frame():
+    df, bad_times = schedules_to_frame(SCHEDULES)
+    return df, df.copy()
+
+
+def row(df, schedule_id):
+    return df.index[df[ID_COLUMN] == schedule_id][0]
+
+
+def test_frame_is_sorted_and_unparseable_values_are_blank():
+    df, bad_times = schedules_to_frame(SCHEDULES)
+    assert df[ID_COLUMN].tolist() == ["3", "2", "1"]
+    assert df.loc[0, DATE_COLUMN] is None and df.loc[0, TIME_COLUMN] is None
+    assert df.loc[2, TIME_COLUMN] == time(10, 0)
+    assert bad_times == 1
+
+
+def test_unchanged_table_has_no_changes():
+    df, edited = frame()
+    assert diff_schedules(df, edited) == ([], [], [])
+
+
+def test_edited_row_is_updated():
+    df, edited = frame()
+    edited.loc[row(edited, "1"), TIME_COLUMN] = time(11, 30)
+    edited.loc[row(edited, "2"), DATE_COLUMN] = date(2025, 9, 5)
+    inserts, updates, deletes = diff_schedules(df, edited)
+    assert inserts == [] and deletes == []
+    assert sorted(updates, key=lambda u: u["id"]) == [
+        {"id": "1", "date": "2025-09-02", "time": "11:30", "event": "회의"},
+        {"id": "2", "date": "2025-09-05", "time": "", "event": "치과"},
+    ]
+
+
+def test_unparseable_date_and_time_are_kept_when_other_fields_change():
+    df, edited = frame()
+    edited.loc[row(edited, "3"), EVENT_COLUMN] = "수영"
+    _, updates, _ = diff_schedules(df, edited)
+    assert updates == [{"id": "3", "date": "bad", "time": "9시", "event": "수영"}]
+
+    edited.loc[row(edited, "3"), TIME_COLUMN] = time(7, 0)
+    _, updates, _ = diff_schedules(df, edited)
+    assert updates == [{"id": "3", "date": "bad", "time": "07:00", "event": "수영"}]
+
+
+def test_added_row_is_inserted():
+    df, edited = frame()
+    added = pd.DataFrame([{DATE_COLUMN: date(2025, 9, 10), TIME_COLUMN: time(8, 0), EVENT_COLUMN: "출장", ID_COLUMN: None}])
+    edited = pd.concat([edited, added], ignore_index=True)
+    assert diff_schedules(df, edited) == ([{"date": "2025-09-10", "time": "08:00", "event": "출장"}], [], [])
+
+
+def test_deleted_and_blanked_rows_are_deleted():
+    df, edited = frame()
+    edited.loc[row(edited, "2"), EVENT_COLUMN] = "  " # 일정 내용을 지운 행
+    edited = edited.drop(index=row(edited, "1"))
+    inserts, updates, deletes = diff_schedules(df, edited)
+    assert inserts == [] and updates == []
+    assert sorted(deletes) == ["1", "2"]
@@ -0,0 +1,21 @@
+import pytest
+
+from storage import create_backend
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    return create_backend(request.param, sqlite_path=str(tmp_path / "assistant.db"), base_dir=str(tmp_path))
+
+
+def test_chat_pages_follow_insertion_order(backend):
+    # 시계가 뒤로 조정되어 나중 기록의 시각이 더 이른 경우
+    timestamps = ["2025-01-01T10:00:00", "2025-01-01T11:00:00", "2025-01-01T09:00:00", "2025-01-01T09:30:00"]
+    for i, timestamp in enumerate(timestamps):
+        backend.append_chat("alice", {"질문": f"질문 {i}", "답변": "답변", "timestamp": timestamp})
+
+    questions = [entry["질문"] for entry in backend.load_chats("alice")]
+    assert questions == ["질문 0", "질문 1", "질문 2", "질문 3"]
+    assert [entry["질문"] for entry in backend.load_chat_page("alice", 0, 2)] == questions[2:]
+    assert [entry["질문"] for entry in backend.load_chat_page("alice", 1, 2)] == questions[1:3]
+    assert [entry["질문"] for _, entry in backend.load_chat_records_from("alice", 1)] == questions[1:]
@@ -0,0 +1,65 @@
+import threading
+import time
+
+from summarizer import RateLimiter, condense_document, condense_pages, split_into_chunks
+
+
+def test_shared_limiter_spaces_requests_across_documents():
+    sent = []
+    lock = threading.Lock()
+
+    def complete(instruction, doc_text, max_tokens):
+        with lock:
+            sent.append(time.monotonic())
+        return "요약"
+
+    limiter = RateLimiter(requests_per_minute=60 * 20) # 요청 간격 0.05초
+    text = "\n".join(f"문장 {i} " * 40 for i in range(40))
+    threads = [
+        threading.Thread(target=condense_document, args=(text, complete),
+                         kwargs={"chunk_tokens": 400, "reduce_tokens": 200, "limiter": limiter})
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    sent.sort()
+    assert len(sent) >= 6
+    gaps = [b - a for a, b in zip(sent, sent[1:])]
+    assert min(gaps) >= 0.04 # 세 문서의 요청을 합쳐도 간격이 유지됩니다.
+
+
+def test_pages_are_summarized_while_extraction_continues():
+    started = threading.Event()
+    seen_before_last_page = []
+
+    def complete(instruction, doc_text, max_tokens):
+        started.set()
+        return "요약"
+
+    def pages():
+        for i in range(20):
+            if i == 19:
+                seen_before_last_page.append(started.wait(5)) # 마지막 페이지 전에 이미 요청이 시작되었습니다.
+            yield "\n".join(f"{i}쪽 문장 {j} " * 10 for j in range(10))
+
+    assert condense_pages(pages(), complete, chunk_tokens=300, reduce_tokens=1000).startswith("요약")
+    assert seen_before_last_page == [True]
+
+
+def test_short_document_is_returned_without_requests():
+    def complete(instruction, doc_text, max_tokens):
+        raise AssertionError("요청하면 안 됩니다.")
+
+    assert condense_pages(iter(["첫 쪽\n", "둘째 쪽"]), complete) == "첫 쪽\n\n둘째 쪽"
+    assert condense_document("  짧은 문서  \n", complete) == "짧은 문서"
+
+
+def test_chunks_match_split_of_whole_text():
+    text = "\n".join(f"문장 {i} " * (i % 13 + 1) for i in range(300))
+    chunks = []
+    condense_pages([text], lambda instruction, doc_text, max_tokens: chunks.append(doc_text) or "요약",
+                   chunk_tokens=200, reduce_tokens=100, concurrency=1)
+    assert chunks[:len(split_into_chunks(text, 200))] == split_into_chunks(text, 200)
@@ -0,0 +1,147 @@
+import threading
+
+from metrics import span
+from registry import UserRegistry
+from storage import CHATS, PERSONA, SCHEDULES
+
+# --- 사용자 데이터 저장소 (세션 간 공유, write-through) ---
+# 저장소 백엔드의 사용자 데이터를 한 번만 읽어 메모리에 보관하고, 변경 시에는 즉시 백엔드에 기록합니다.
+# 다른 프로세스가 데이터를 바꾼 경우(backend.data_version 변경)에만 다시 읽습니다.
+
+
+class UserDataStore:
+    """
+    한 사용자의 채팅 기록, 일정, AI 페르소나 설정을 메모리에 보관하는 저장소입니다.
+    Streamlit 재실행마다 데이터를 다시 파싱하지 않도록 여러 세션이 같은 인스턴스를 공유합니다.
+    """
+
+    def __init__(self, username, backend):
+        self.username = username
+        self.backend = backend
+        self._loaders = {
+            CHATS: backend.load_chats,
+            SCHEDULES: backend.load_schedules,
+            PERSONA: backend.load_persona,
+        }
+        self._entries = {} # kind -> (version, data)
+        self._chat_views = {} # ("count",) 또는 ("page", offset, limit) -> data
+        self._chat_views_version = None
+        self._lock = threading.RLock()
+
+    # --- 내부 함수들 ---
+    def _get(self, kind):
+        """메모리에 있는 데이터를 반환합니다. 백엔드의 데이터가 바뀌었으면 다시 로드합니다."""
+        version = self.backend.data_version(self.username, kind)
+        with self._lock:
+            entry = self._entries.get(kind)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+            with span("store.load", kind=kind):
+                data = self._loaders[kind](self.username)
+            self._entries[kind] = (version, data)
+            return data
+
+    def _remember(self, kind, data):
+        """방금 기록한 데이터를 현재 버전과 함께 메모리에 보관합니다."""
+        self._entries[kind] = (self.backend.data_version(self.username, kind), data)
+
+    def _chat_view(self, key, loader):
+        """채팅 기록의 일부(개수, 페이지)만 백엔드에서 읽어 버전과 함께 보관합니다."""
+        version = self.backend.data_version(self.username, CHATS)
+        with self._lock:
+            if version != self._chat_views_version:
+                self._chat_views = {}
+                self._chat_views_version = version
+            if key not in self._chat_views:
+                self._chat_views[key] = loader()
+            return self._chat_views[key]
+
+    # --- 조회 ---
+    @property
+    def chat_history(self):
+        """전체 채팅 기록입니다. 화면 표시에는 chat_page 를 사용하세요."""
+        return self._get(CHATS)
+
+    def chat_count(self):
+        """채팅 기록 수를 반환합니다."""
+        return self._chat_view(("count",), lambda: self.backend.count_chats(self.username))
+
+    def chat_page(self, offset, limit):
+        """최신 기록부터 offset 개를 건너뛴 limit 개의 기록을 오래된 것부터 순서대로 반환합니다."""
+        return self._chat_view(
+            ("page", offset, limit),
+            lambda: self.backend.load_chat_page(self.username, offset, limit),
+        )
+
+    def chat_records_from(self, start):
+        """오래된 것부터 start 번째(0부터) 이후의 (ref, 기록) 목록을 반환합니다. (대화 검색 색인용, 메모리에 보관하지 않음)"""
+        return self.backend.load_chat_records_from(self.username, start)
+
+    def chats_by_ref(self, refs):
+        """chat_records_from 이 돌려준 ref 의 기록만 읽습니다. 유효하지 않은 ref 의 자리는 None 입니다."""
+        return self.backend.load_chats_by_ref(self.username, refs)
+
+    @property
+    def schedules(self):
+        return self._get(SCHEDULES)
+
+    @property
+    def persona(self):
+        return self._get(PERSONA)
+
+    # --- 변경 (즉시 백엔드에 기록) ---
+    def append_chat(self, entry):
+        """채팅 기록에 질문/답변 한 쌍을 추가합니다."""
+        with self._lock:
+            version_before = self.backend.data_version(self.username, CHATS)
+            self.backend.append_chat(self.username, entry)
+            # 최신 상태의 전체 기록을 이미 읽어 둔 경우에만 메모리에서 이어 붙입니다. (아니면 필요할 때 다시 읽음)
+            entry_cache = self._entries.get(CHATS)
+            if entry_cache is not None and entry_cache[0] == version_before:
+                entry_cache[1].append(entry)
+                self._remember(CHATS, entry_cache[1])
+            else:
+                self._entries.pop(CHATS, None)
+
+    def clear_chat_history(self):
+        """채팅 기록을 모두 삭제합니다."""
+        with self._lock:
+            self.backend.clear_chats(self.username)
+            self._remember(CHATS, [])
+
+    def save_schedules(self, schedules):
+        """일정 목록 전체를 저장합니다."""
+        schedules = list(schedules)
+        with self._lock:
+            self.backend.save_schedules(self.username, schedules)
+            self._remember(SCHEDULES, schedules)
+
+    def add_schedule(self, schedule):
+        """일정 하나를 추가합니다."""
+        self.apply_schedule_changes(inserts=[schedule])
+
+    def apply_schedule_changes(self, inserts=(), updates=(), deletes=()):
+        """바뀐 일정만 백엔드에 반영하고, 다음 조회 때 최신 목록을 다시 읽습니다."""
+        with self._lock:
+            self.backend.apply_schedule_changes(self.username, inserts=inserts, updates=updates, deletes=deletes)
+            self._entries.pop(SCHEDULES, None)
+
+    def save_persona(self, persona):
+        """AI 페르소나 설정을 저장합니다."""
+        persona = dict(persona)
+        with self._lock:
+            self.backend.save_persona(self.username, persona)
+            self._remember(PERSONA, persona)
+
+    def invalidate(self):
+        """메모리에 보관한 데이터를 버리고 다음 조회 때 백엔드에서 다시 읽도록 합니다."""
+        with self._lock:
+            self._entries.clear()
+
+
+_stores = UserRegistry()
+
+
+def get_user_store(username, backend):
+    """프로세스 전체에서 사용자별로 하나씩 공유되는 UserDataStore 를 반환합니다."""
+    return _stores.get((id(backend), username), lambda: UserDataStore(username, backend))